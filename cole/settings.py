@@ -138,3 +138,62 @@ CORS_ALLOWED_ORIGINS = [
 AUTHENTICATION_BACKENDS = [
     'gestion_escolar.authentication.UsuarioAuthBackend',
 ]
+
+# Los listados de /api/<recurso>/ se paginan por cursor (ordenados por id):
+# tamaño por defecto y máximo admitido en ?tamanio_pagina=
+API_TAMANIO_PAGINA = int(os.environ.get('API_TAMANIO_PAGINA', '100'))
+API_TAMANIO_PAGINA_MAXIMO = int(os.environ.get('API_TAMANIO_PAGINA_MAXIMO', '1000'))
+# Máximo de registros por petición en los endpoints masivos /api/<recurso>/lote/
+API_MAX_LOTE = int(os.environ.get('API_MAX_LOTE', '1000'))
+# Filas por bloque de /api/export/<recurso>/: las que se leen del cursor del
+# servidor y se escriben de una vez en la respuesta
+API_EXPORT_TAMANIO_BLOQUE = int(os.environ.get('API_EXPORT_TAMANIO_BLOQUE', '5000'))
+
+REST_FRAMEWORK = {
+    'DEFAULT_PAGINATION_CLASS': 'gestion_escolar.paginacion.PaginacionCursor',
+    # Cada ViewSet declara sus parámetros de filtro en `filtros`
+    'DEFAULT_FILTER_BACKENDS': ['gestion_escolar.filtros.FiltrosDeclarados'],
+}
+
+# Backend de caché de Django. Por defecto la caché en memoria de cada proceso;
+# en producción, p. ej. CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# y CACHE_LOCATION=redis://127.0.0.1:6379 para compartirla entre workers
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'cole'),
+    }
+}
+
+# Caché de consultas de los ViewSets que la activan (usar_cache_consultas = True):
+# alias de CACHES y segundos que se guarda cada respuesta. Las entradas no se
+# borran al escribir: su clave lleva la versión de las tablas de las que
+# dependen y una escritura hace que las siguientes lecturas usen otra clave
+API_CACHE_ALIAS = os.environ.get('API_CACHE_ALIAS', 'default')
+API_CACHE_TIMEOUT = int(os.environ.get('API_CACHE_TIMEOUT', '300'))
+
+# Caché de predicciones de /api/mlmodel/
+# Número de resultados guardados en memoria por proceso (LRU). 0 la desactiva.
+ML_PREDICCIONES_CACHE_TAMANIO = int(os.environ.get('ML_PREDICCIONES_CACHE_TAMANIO', '256'))
+# Alias de CACHES usado como segundo nivel compartido entre workers (opcional)
+ML_PREDICCIONES_CACHE_ALIAS = os.environ.get('ML_PREDICCIONES_CACHE_ALIAS') or None
+
+# Modo streaming de /api/mlmodel/ (?stream=1 o Accept: application/x-ndjson):
+# alumnos por bloque y máximo admitido en ?tamanio_bloque=
+ML_STREAM_TAMANIO_BLOQUE = int(os.environ.get('ML_STREAM_TAMANIO_BLOQUE', '500'))
+ML_STREAM_TAMANIO_BLOQUE_MAXIMO = int(os.environ.get('ML_STREAM_TAMANIO_BLOQUE_MAXIMO', '5000'))
+
+# Recomendaciones de /api/mlmodel/ para un curso y año: percentiles leídos de
+# PercentilesCurso (histograma, error ±0.05) en lugar de calcularlos exactos
+ML_PERCENTILES_HISTOGRAMA = os.environ.get('ML_PERCENTILES_HISTOGRAMA', '1') == '1'
+
+# Clasificación en cascada de /api/mlmodel/: regla de categorizar_nota sobre la
+# nota predicha y RandomForest solo a menos de ML_CASCADA_MARGEN puntos de un
+# umbral. Por petición: ?cascada=1&margen=3
+ML_CASCADA_ACTIVA = os.environ.get('ML_CASCADA_ACTIVA', '0') == '1'
+ML_CASCADA_MARGEN = float(os.environ.get('ML_CASCADA_MARGEN', '2'))
+
+# Simulación "what-if" (/api/mlmodel/simulacion/): máximo de escenarios por
+# petición y de celdas alumnos × escenarios puntuadas de una vez
+ML_SIMULACION_MAX_ESCENARIOS = int(os.environ.get('ML_SIMULACION_MAX_ESCENARIOS', '500'))
+ML_SIMULACION_MAX_CELDAS = int(os.environ.get('ML_SIMULACION_MAX_CELDAS', '500000'))
@@ -10,7 +10,11 @@ from rest_framework.routers import DefaultRouter
 from gestion_escolar import views
 from gestion_escolar.views import (
     CustomAuthToken, 
-    MLModelEndpoint
+    MLModelEndpoint,
+    MLCacheEstadisticasEndpoint,
+    CacheConsultasEstadisticasEndpoint,
+    ExportacionEndpoint,
+    MLSimulacionEndpoint
 )
 
 router = DefaultRouter()
@@ -35,4 +39,8 @@ urlpatterns = [
     path('api/', include(router.urls)),
     path('api/login/', CustomAuthToken.as_view(), name='api_token_auth'),
     path('api/mlmodel/', MLModelEndpoint.as_view(), name='ml_model_endpoint'),
+    path('api/mlmodel/cache/', MLCacheEstadisticasEndpoint.as_view(), name='ml_model_cache_stats'),
+    path('api/mlmodel/simulacion/', MLSimulacionEndpoint.as_view(), name='ml_model_simulacion'),
+    path('api/cache/consultas/', CacheConsultasEstadisticasEndpoint.as_view(), name='api_cache_stats'),
+    path('api/export/<str:recurso>/', ExportacionEndpoint.as_view(), name='api_export'),
 ]
\ No newline at end of file
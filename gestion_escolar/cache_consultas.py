@@ -0,0 +1,74 @@
+# gestion_escolar/cache_consultas.py
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+# ==============================================================================
+# CACHÉ DE CONSULTAS DE LOS VIEWSETS
+# ==============================================================================
+# Los ViewSets con usar_cache_consultas = True guardan los datos de cada respuesta
+# 200 de list() y retrieve() en el backend API_CACHE_ALIAS. La clave es la
+# huella de condicional.py: endpoint, URL con sus parámetros, formato pedido y
+# versión de cada tabla de la que depende la consulta (la del ViewSet, las de
+# ?expand= y las que cruzan los filtros). Una escritura en cualquiera de esas
+# tablas cambia la clave de las consultas afectadas, y solo de ellas; las
+# entradas viejas caducan con API_CACHE_TIMEOUT.
+#
+# Los aciertos y fallos se cuentan por endpoint en cada proceso
+# (/api/cache/consultas/).
+
+
+class CacheConsultas:
+    def __init__(self, alias, timeout):
+        self.alias = alias
+        self.timeout = timeout
+        self._contadores = defaultdict(lambda: {'aciertos': 0, 'fallos': 0})
+        self._lock = threading.Lock()
+
+    def _contar(self, endpoint, resultado):
+        with self._lock:
+            self._contadores[endpoint][resultado] += 1
+
+    def responder(self, endpoint, huella, vista, request, *args, **kwargs):
+        """Respuesta guardada para `huella` o la de `vista`, que se guarda si es 200."""
+        clave = f'api:{endpoint}:{huella}'
+        backend = caches[self.alias]
+        datos = backend.get(clave)
+        if datos is not None:
+            self._contar(endpoint, 'aciertos')
+            return Response(datos)
+        self._contar(endpoint, 'fallos')
+        response = vista(request, *args, **kwargs)
+        if response.status_code == 200:
+            backend.set(clave, response.data, self.timeout)
+        return response
+
+    def limpiar_estadisticas(self):
+        with self._lock:
+            self._contadores.clear()
+
+    def estadisticas(self):
+        with self._lock:
+            endpoints = {}
+            for endpoint, contador in sorted(self._contadores.items()):
+                consultas = contador['aciertos'] + contador['fallos']
+                endpoints[endpoint] = {
+                    **contador, 'tasa_aciertos': round(contador['aciertos'] / consultas, 4) if consultas else 0.0,
+                }
+            aciertos = sum(contador['aciertos'] for contador in endpoints.values())
+            consultas = aciertos + sum(contador['fallos'] for contador in endpoints.values())
+            return {
+                'backend': self.alias,
+                'timeout': self.timeout,
+                'tasa_aciertos': round(aciertos / consultas, 4) if consultas else 0.0,
+                'endpoints': endpoints,
+            }
+
+
+cache_consultas = CacheConsultas(
+    alias=getattr(settings, 'API_CACHE_ALIAS', 'default'),
+    timeout=getattr(settings, 'API_CACHE_TIMEOUT', 300),
+)
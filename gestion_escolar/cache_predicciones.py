@@ -0,0 +1,111 @@
+# gestion_escolar/cache_predicciones.py
+import hashlib
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .versiones import clave_alumno, clave_curso, obtener_versiones
+
+# ==============================================================================
+# CACHÉ DE PREDICCIONES DE /api/mlmodel/
+# ==============================================================================
+# La clave de cada resultado incluye el grupo pedido (curso o lista ordenada
+# de alumnos), la versión de los modelos cargados y la versión de los datos de
+# ese grupo. Cuando cambia una Nota, Asistencia, Participacion o Inscripcion
+# del grupo su versión avanza, la clave deja de coincidir y la entrada antigua
+# termina saliendo por LRU: no hace falta borrar nada explícitamente.
+#
+# Primer nivel: LRU en memoria del proceso (ML_PREDICCIONES_CACHE_TAMANIO
+# entradas). Segundo nivel opcional: el backend de caché de Django indicado
+# en ML_PREDICCIONES_CACHE_ALIAS, compartido entre workers si es Redis,
+# Memcached o la caché en base de datos.
+
+
+class CachePredicciones:
+    def __init__(self, tamanio, alias=None):
+        self.tamanio = tamanio
+        self.alias = alias
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.aciertos_backend = 0
+        self.fallos = 0
+
+    def _backend(self):
+        return caches[self.alias] if self.alias else None
+
+    def obtener(self, clave):
+        with self._lock:
+            if clave in self._entradas:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return self._entradas[clave]
+        backend = self._backend()
+        valor = backend.get(clave) if backend is not None else None
+        with self._lock:
+            if valor is None:
+                self.fallos += 1
+                return None
+            self.aciertos_backend += 1
+        self._guardar_local(clave, valor)
+        return valor
+
+    def guardar(self, clave, valor):
+        self._guardar_local(clave, valor)
+        backend = self._backend()
+        if backend is not None:
+            backend.set(clave, valor)
+
+    def _guardar_local(self, clave, valor):
+        if self.tamanio <= 0:
+            return
+        with self._lock:
+            self._entradas[clave] = valor
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.tamanio:
+                self._entradas.popitem(last=False)
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def estadisticas(self):
+        with self._lock:
+            consultas = self.aciertos + self.aciertos_backend + self.fallos
+            return {
+                'aciertos': self.aciertos,
+                'aciertos_backend': self.aciertos_backend,
+                'fallos': self.fallos,
+                'tasa_aciertos': round((self.aciertos + self.aciertos_backend) / consultas, 4) if consultas else 0.0,
+                'entradas': len(self._entradas),
+                'tamanio_maximo': self.tamanio,
+                'backend': self.alias,
+            }
+
+
+cache_predicciones = CachePredicciones(
+    tamanio=getattr(settings, 'ML_PREDICCIONES_CACHE_TAMANIO', 256),
+    alias=getattr(settings, 'ML_PREDICCIONES_CACHE_ALIAS', None),
+)
+
+
+def clave_prediccion(version_modelos, curso_id=None, alumnos_ids=None, anio_academico=None, periodo=None):
+    """Clave de caché para un grupo. Hace una consulta (indexada) para leer las
+    versiones de datos del curso o de cada alumno."""
+    if alumnos_ids:
+        ids = sorted(set(alumnos_ids))
+        grupo = 'alumnos:' + ','.join(map(str, ids))
+        claves_datos = [clave_alumno(alumno_id) for alumno_id in ids]
+    else:
+        grupo = f'curso:{curso_id}'
+        claves_datos = [clave_curso(curso_id)]
+    if anio_academico is not None:
+        grupo += f'|anio:{anio_academico}'
+    if periodo:
+        grupo += f'|periodo:{periodo}'
+    versiones = obtener_versiones(claves_datos)
+    version_datos = ','.join(str(versiones[clave]) for clave in claves_datos)
+    huella = hashlib.sha1(f'{grupo}|{version_datos}'.encode()).hexdigest()
+    return f'mlmodel:{version_modelos}:{huella}'
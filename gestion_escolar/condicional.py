@@ -0,0 +1,92 @@
+# gestion_escolar/condicional.py
+import hashlib
+
+from django.core.exceptions import FieldDoesNotExist
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .cache_consultas import cache_consultas
+from .serializers import parametros_lectura, rutas_select_related
+from .versiones import versiones_tablas
+
+# ==============================================================================
+# GET CONDICIONAL (ETag / Last-Modified)
+# ==============================================================================
+# La respuesta de un listado o detalle solo depende de las tablas que lee: la
+# del ViewSet, las de las relaciones de ?expand= y las que cruzan los filtros
+# activos (p. ej. ?anio_academico= de /api/notas/ pasa por Inscripcion). Cada
+# tabla tiene una versión en VersionCambios que avanza con cualquier alta,
+# cambio o baja (signals.versionar_tabla y VersionadoQuerySet), así que el
+# ETag se calcula con esas versiones sin tocar las tablas: una consulta.
+
+
+def _modelos_ruta(modelo, ruta):
+    """Modelos por los que pasa `ruta` ('inscripcion__alumno_id',
+    'materia__nombre_materia__icontains'...) a partir de `modelo`."""
+    modelos = []
+    for parte in ruta.split('__'):
+        try:
+            campo = modelo._meta.get_field(parte)
+        except FieldDoesNotExist:
+            break
+        # 'alumno_id' es la columna de la clave foránea: no sale de la tabla
+        if not campo.is_relation or parte != campo.name:
+            break
+        modelo = campo.related_model
+        modelos.append(modelo)
+    return modelos
+
+
+def modelos_consulta(vista):
+    """Modelos cuyas filas determinan la respuesta de `vista` a su petición."""
+    request = vista.request
+    modelo = vista.get_queryset().model
+    modelos = {modelo}
+    _, expandir = parametros_lectura(request)
+    for ruta in rutas_select_related(vista.get_serializer_class(), expandir):
+        modelos.update(_modelos_ruta(modelo, ruta))
+    for parametro, (lookup, _) in getattr(vista, 'filtros', {}).items():
+        if request.query_params.get(parametro) not in (None, ''):
+            modelos.update(_modelos_ruta(modelo, lookup))
+    return modelos
+
+
+def huella_consulta(vista):
+    """(huella, last_modified) de la respuesta de `vista`. La representación
+    cambia también con la URL (página, ?fields=...; con el host, que va en los
+    enlaces 'next' y 'previous') y con el formato pedido."""
+    versiones = versiones_tablas(modelos_consulta(vista))
+    firma = '|'.join(sorted(f'{modelo._meta.label_lower}:{version}' for modelo, (version, _) in versiones.items()))
+    firma += f'|{vista.request.build_absolute_uri()}|{vista.request.accepted_media_type}'
+    fechas = [actualizado for version, actualizado in versiones.values() if actualizado is not None]
+    return hashlib.sha1(firma.encode()).hexdigest(), int(max(fechas).timestamp()) if fechas else None
+
+
+class GetCondicionalMixin:
+    """ETag y Last-Modified en list() y retrieve(); If-None-Match e
+    If-Modified-Since responden 304 sin consultar la tabla. Con
+    usar_cache_consultas = True, además, la respuesta sale de la caché de
+    consultas (cache_consultas.py) mientras no cambien sus tablas."""
+    usar_cache_consultas = False
+
+    def list(self, request, *args, **kwargs):
+        return self._condicional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._condicional(super().retrieve, request, *args, **kwargs)
+
+    def _condicional(self, vista, request, *args, **kwargs):
+        huella, last_modified = huella_consulta(self)
+        etag = f'W/"{huella}"'
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            if self.usar_cache_consultas:
+                response = cache_consultas.responder(self.basename, huella, vista, request, *args, **kwargs)
+            else:
+                response = vista(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
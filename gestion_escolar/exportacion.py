@@ -0,0 +1,99 @@
+# gestion_escolar/exportacion.py
+import csv
+import io
+import itertools
+
+from .models import Asistencia, Nota, Participacion
+from .renderers import linea_ndjson
+
+# ==============================================================================
+# EXPORTACIÓN MASIVA (/api/export/<recurso>/)
+# ==============================================================================
+# Las exportaciones de notas, asistencias y participaciones pueden ser de
+# decenas de millones de filas: no se instancian modelos ni se arma la
+# respuesta entera. Los nombres de alumno, curso y materia salen en la misma
+# consulta (JOIN con values_list()), las filas se leen con iterator(), que en
+# PostgreSQL usa un cursor del lado del servidor, y cada bloque se escribe y
+# se envía antes de leer el siguiente. La cabecera se envía antes de ejecutar
+# la consulta, así que el cliente empieza a recibir bytes enseguida.
+
+_COLUMNAS_INSCRIPCION = [
+    ('alumno_id', 'inscripcion__alumno_id'),
+    ('alumno_nombre', 'inscripcion__alumno__nombre'),
+    ('alumno_apellido', 'inscripcion__alumno__apellido'),
+    ('curso_id', 'inscripcion__curso_id'),
+    ('curso', 'inscripcion__curso__nombre_curso'),
+    ('anio_academico', 'inscripcion__anio_academico'),
+    ('periodo', 'inscripcion__periodo'),
+    ('materia_id', 'materia_id'),
+    ('materia', 'materia__nombre_materia'),
+]
+
+# {modelo: [(columna del archivo, lookup de values_list())]}
+COLUMNAS_EXPORTACION = {
+    Nota: [
+        ('id', 'id'), *_COLUMNAS_INSCRIPCION,
+        ('tipo_evaluacion', 'tipo_evaluacion'),
+        ('calificacion', 'calificacion'),
+        ('fecha_evaluacion', 'fecha_evaluacion'),
+        ('profesor_id', 'profesor_id'),
+        ('comentarios_profesor', 'comentarios_profesor'),
+    ],
+    Asistencia: [
+        ('id', 'id'), *_COLUMNAS_INSCRIPCION,
+        ('fecha', 'fecha'),
+        ('estado', 'estado'),
+        ('profesor_id', 'profesor_id'),
+        ('observaciones', 'observaciones'),
+    ],
+    Participacion: [
+        ('id', 'id'), *_COLUMNAS_INSCRIPCION,
+        ('fecha', 'fecha'),
+        ('puntuacion', 'puntuacion'),
+        ('profesor_id', 'profesor_id'),
+        ('comentarios', 'comentarios'),
+    ],
+}
+
+
+def bloques_exportacion(queryset, tamanio_bloque):
+    """(encabezados, generador de listas de filas) de `queryset` en orden de
+    id. Solo hay un bloque de filas en memoria a la vez."""
+    encabezados, lookups = zip(*COLUMNAS_EXPORTACION[queryset.model])
+    filas = queryset.order_by('id').values_list(*lookups).iterator(chunk_size=tamanio_bloque)
+
+    def bloques():
+        while bloque := list(itertools.islice(filas, tamanio_bloque)):
+            yield bloque
+
+    return list(encabezados), bloques()
+
+
+def exportar_csv(queryset, tamanio_bloque):
+    encabezados, bloques = bloques_exportacion(queryset, tamanio_bloque)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(encabezados)
+    yield buffer.getvalue()
+    for bloque in bloques:
+        buffer.seek(0)
+        buffer.truncate()
+        # Decimal y date se escriben con str(): '87.50', '2024-03-15'
+        writer.writerows(bloque)
+        yield buffer.getvalue()
+
+
+def _valor_json(valor):
+    # Decimal como texto (igual que la API) y fechas en ISO 8601
+    return valor if valor is None or isinstance(valor, (str, int, float)) else str(valor)
+
+
+def exportar_ndjson(queryset, tamanio_bloque):
+    encabezados, bloques = bloques_exportacion(queryset, tamanio_bloque)
+    for bloque in bloques:
+        yield ''.join(
+            linea_ndjson(dict(zip(encabezados, map(_valor_json, fila)))) for fila in bloque
+        )
+
+
+EXPORTADORES = {'csv': exportar_csv, 'ndjson': exportar_ndjson}
@@ -0,0 +1,61 @@
+# gestion_escolar/filtros.py
+from datetime import date
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+
+# --- Conversores de los valores de la query string ---
+
+def entero(valor):
+    return int(valor)
+
+
+def texto(valor):
+    return valor
+
+
+def fecha(valor):
+    return date.fromisoformat(valor)
+
+
+def booleano(valor):
+    if valor.lower() in ('1', 'true'):
+        return True
+    if valor.lower() in ('0', 'false'):
+        return False
+    raise ValueError(valor)
+
+
+def rango_fechas(campo):
+    """?fecha__gte= y ?fecha__lte= (AAAA-MM-DD, inclusivas) sobre `campo`."""
+    return {
+        'fecha__gte': (f'{campo}__gte', fecha),
+        'fecha__lte': (f'{campo}__lte', fecha),
+    }
+
+
+class FiltrosDeclarados(BaseFilterBackend):
+    """Filtra los listados por los parámetros que declara cada ViewSet en
+    `filtros` = {parametro: (lookup del ORM, conversor)}, p. ej.
+    /api/notas/?materia=3&fecha__gte=2024-03-01. Los parámetros no declarados
+    se ignoran y un valor que no se puede convertir responde 400.
+
+    Todas las condiciones van en un solo filter(): las que cruzan una relación
+    (p. ej. alumno y anio_academico a través de la inscripción) se aplican a
+    la misma fila relacionada. Cada filtro declarado tiene detrás un índice
+    (ver Meta.indexes de models.py)."""
+
+    def filter_queryset(self, request, queryset, view):
+        condiciones, errores = {}, {}
+        for parametro, (lookup, conversor) in getattr(view, 'filtros', {}).items():
+            valor = request.query_params.get(parametro)
+            if valor in (None, ''):
+                continue
+            try:
+                condiciones[lookup] = conversor(valor)
+            except (TypeError, ValueError):
+                errores[parametro] = f'Valor no válido: {valor!r}.'
+        if errores:
+            raise ValidationError(errores)
+        return queryset.filter(**condiciones) if condiciones else queryset
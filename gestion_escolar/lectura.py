@@ -0,0 +1,125 @@
+# gestion_escolar/lectura.py
+import datetime
+import decimal
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .renderers import JSONRapidoRenderer
+
+# ==============================================================================
+# LECTURA RÁPIDA DE LOS LISTADOS
+# ==============================================================================
+# Con un ModelSerializer, cada fila de un listado cuesta instanciar el modelo y
+# recorrer los campos del serializer (get_attribute, to_representation...).
+# Cuando todos los campos que se devuelven son columnas del propio modelo, el
+# listado lee las filas con values_list() y las convierte a dicts con un
+# conversor por campo calculado una vez por petición; el JSON resultante es el
+# mismo que el del serializer. Si hay campos que no encajan (p. ej. ?expand=
+# o campos calculados) se usa el serializer normal.
+
+# Campos de DRF cuya representación de un valor leído de la BD es el propio valor
+_IDENTIDAD = (
+    serializers.CharField, serializers.IntegerField, serializers.BooleanField,
+    serializers.ChoiceField, serializers.FloatField, serializers.PrimaryKeyRelatedField,
+)
+
+
+def _conversor_decimal(campo):
+    # DecimalField.to_representation con el exponente y el contexto precalculados
+    coerce_to_string = getattr(campo, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if not coerce_to_string or campo.localize or campo.decimal_places is None:
+        return campo.to_representation
+    exponente = decimal.Decimal(1).scaleb(-campo.decimal_places)
+    contexto = decimal.getcontext().copy()
+    if campo.max_digits is not None:
+        contexto.prec = campo.max_digits
+    return lambda valor: format(valor.quantize(exponente, rounding=campo.rounding, context=contexto), 'f')
+
+
+def _conversor(campo):
+    """Función valor -> representación del campo, o None si es la identidad."""
+    if isinstance(campo, serializers.DecimalField):
+        return _conversor_decimal(campo)
+    if isinstance(campo, serializers.DateTimeField):
+        return campo.to_representation
+    if isinstance(campo, serializers.DateField):
+        formato = getattr(campo, 'format', api_settings.DATE_FORMAT)
+        if formato and formato.lower() == 'iso-8601':
+            return datetime.date.isoformat
+        return campo.to_representation
+    if isinstance(campo, _IDENTIDAD):
+        return None
+    return campo.to_representation
+
+
+class PlanLectura:
+    """Columnas de values_list() y conversión de cada fila al dict que
+    devolvería el serializer. La clave primaria va siempre en la primera
+    columna (PaginacionCursor la usa para el cursor)."""
+
+    def __init__(self, columnas, nombres, conversores, desde):
+        self.columnas = columnas
+        self.nombres = nombres
+        self.conversores = conversores
+        self.desde = desde
+
+    @classmethod
+    def desde_serializer(cls, serializer):
+        """Plan para `serializer` (ya con ?fields= aplicado) o None si algún
+        campo no es una columna del modelo."""
+        modelo = serializer.Meta.model
+        columnas, nombres, conversores = [], [], []
+        for nombre, campo in serializer.fields.items():
+            if campo.write_only:
+                continue
+            if isinstance(campo, (serializers.BaseSerializer, serializers.ManyRelatedField)) or '.' in campo.source:
+                return None
+            try:
+                campo_modelo = modelo._meta.get_field(campo.source)
+            except FieldDoesNotExist:
+                return None
+            if not campo_modelo.concrete or campo_modelo.many_to_many:
+                return None
+            columnas.append(campo_modelo.attname)
+            nombres.append(nombre)
+            conversor = _conversor(campo)
+            if conversor is not None:
+                conversores.append((nombre, conversor))
+        pk = modelo._meta.pk.attname
+        desde = 0
+        if not columnas or columnas[0] != pk:
+            columnas.insert(0, pk)
+            desde = 1
+        return cls(columnas, nombres, conversores, desde)
+
+    def fila(self, valores):
+        datos = dict(zip(self.nombres, valores[self.desde:] if self.desde else valores))
+        for nombre, conversor in self.conversores:
+            valor = datos[nombre]
+            if valor is not None:
+                datos[nombre] = conversor(valor)
+        return datos
+
+
+class LecturaRapidaMixin:
+    """list() por values_list() y JSONRapidoRenderer en los ViewSets del
+    router. Con lectura_rapida = False el ViewSet usa siempre el serializer."""
+    lectura_rapida = True
+    renderer_classes = [
+        JSONRapidoRenderer if renderer is JSONRenderer else renderer for renderer in api_settings.DEFAULT_RENDERER_CLASSES
+    ]
+
+    def list(self, request, *args, **kwargs):
+        plan = PlanLectura.desde_serializer(self.get_serializer()) if self.lectura_rapida else None
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+        filas = self.filter_queryset(self.get_queryset()).values_list(*plan.columnas)
+        pagina = self.paginate_queryset(filas)
+        datos = [plan.fila(valores) for valores in (filas if pagina is None else pagina)]
+        if pagina is None:
+            return Response(datos)
+        return self.get_paginated_response(datos)
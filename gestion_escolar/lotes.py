@@ -0,0 +1,205 @@
+# gestion_escolar/lotes.py
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.validators import UniqueTogetherValidator
+
+# ==============================================================================
+# ESCRITURAS MASIVAS: /api/<recurso>/lote/
+# ==============================================================================
+# Un lote de registros (p. ej. las notas de un examen de todo el curso) en una
+# sola petición:
+#   POST   [{...}, {...}]                -> bulk_create, 201 con lo creado
+#   PATCH  [{"id": 1, ...}, ...]         -> bulk_update (parcial), 200
+#   DELETE [1, 2, 3]                     -> un solo DELETE, 204
+# El lote se valida entero antes de escribir: cada clave foránea se comprueba
+# con un in_bulk() para todos los registros y cada unique_together con una
+# consulta, en lugar de una consulta por registro. Si algún registro falla no
+# se escribe nada y la respuesta es 400 con una lista alineada con la de
+# entrada ({} para los registros válidos), como los errores de many=True.
+# Si otra petición inserta una fila con la misma clave entre la validación y
+# la escritura, la IntegrityError se traduce en esa misma respuesta.
+
+
+class RelacionPrecargada(serializers.PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField que resuelve los ids contra los objetos leídos
+    de antemano para todo el lote."""
+
+    def __init__(self, objetos, **kwargs):
+        self.objetos = objetos
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return self.objetos[int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+
+def _id(valor):
+    if isinstance(valor, bool):
+        return None
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+class OperacionesMasivasMixin:
+
+    @action(detail=False, methods=['post', 'patch', 'delete'])
+    def lote(self, request):
+        datos = request.data
+        if not isinstance(datos, list):
+            return Response({'error': 'Se esperaba una lista de registros.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(datos) > settings.API_MAX_LOTE:
+            return Response(
+                {'error': f'Como máximo {settings.API_MAX_LOTE} registros por petición.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if request.method == 'POST':
+            return self._crear_lote(datos)
+        if request.method == 'PATCH':
+            return self._actualizar_lote(datos)
+        return self._borrar_lote(datos)
+
+    # --- Validación del lote ---
+
+    def _serializer_lote(self, datos, partial=False):
+        """Serializer para validar cada registro sin consultas: las claves
+        foráneas se resuelven contra un in_bulk() por campo y los
+        unique_together se comprueban después para todo el lote."""
+        serializer = self.get_serializer(partial=partial)
+        serializer.validators = [v for v in serializer.validators if not isinstance(v, UniqueTogetherValidator)]
+        for nombre, campo in list(serializer.fields.items()):
+            if campo.read_only or not isinstance(campo, serializers.PrimaryKeyRelatedField):
+                continue
+            ids = {_id(item.get(nombre)) for item in datos if isinstance(item, dict)} - {None}
+            serializer.fields[nombre] = RelacionPrecargada(
+                campo.get_queryset().in_bulk(ids),
+                queryset=campo.queryset, required=campo.required, allow_null=campo.allow_null,
+            )
+        return serializer
+
+    def _validar(self, serializer, datos, errores):
+        validados = {}
+        for indice, item in enumerate(datos):
+            if errores[indice]:
+                continue
+            if not isinstance(item, dict):
+                errores[indice] = {'non_field_errors': ['Se esperaba un objeto.']}
+                continue
+            try:
+                validados[indice] = serializer.run_validation(item)
+            except ValidationError as exc:
+                errores[indice] = exc.detail
+        return validados
+
+    def _comprobar_unicidad(self, objs, errores):
+        """Marca los registros de `objs` ({indice: instancia}) que repiten un
+        unique_together del modelo, dentro del lote o con otra fila de la BD."""
+        modelo = self.get_queryset().model
+        propios = [obj.pk for obj in objs.values() if obj.pk is not None]
+        for campos in modelo._meta.unique_together:
+            columnas = [modelo._meta.get_field(campo).attname for campo in campos]
+            claves = {indice: tuple(getattr(obj, columna) for columna in columnas) for indice, obj in objs.items()}
+            if not claves:
+                continue
+            # Una consulta: candidatas que coinciden en cada columna por separado
+            existentes = set(
+                modelo._default_manager.filter(**{
+                    f'{columna}__in': {clave[i] for clave in claves.values()} for i, columna in enumerate(columnas)
+                }).exclude(pk__in=propios).values_list(*columnas)
+            )
+            vistas = set()
+            for indice, clave in claves.items():
+                if clave in existentes or clave in vistas:
+                    errores[indice] = {'non_field_errors': [
+                        f'Ya existe un registro con los mismos {", ".join(campos)}.'
+                    ]}
+                vistas.add(clave)
+
+    def _escribir(self, escritura, objs, errores):
+        """Ejecuta `escritura` en una transacción. Si choca con un
+        unique_together por una fila que otra petición escribió después de
+        validar, devuelve la respuesta 400 que habría dado la validación."""
+        try:
+            with transaction.atomic():
+                escritura()
+        except IntegrityError:
+            self._comprobar_unicidad(objs, errores)
+            if not any(errores):
+                raise
+            return Response(errores, status=status.HTTP_400_BAD_REQUEST)
+        return None
+
+    # --- Operaciones ---
+
+    def _crear_lote(self, datos):
+        modelo = self.get_queryset().model
+        errores = [{} for _ in datos]
+        validados = self._validar(self._serializer_lote(datos), datos, errores)
+        objs = {indice: modelo(**attrs) for indice, attrs in validados.items()}
+        self._comprobar_unicidad(objs, errores)
+        if any(errores):
+            return Response(errores, status=status.HTTP_400_BAD_REQUEST)
+        creados = list(objs.values())
+        conflicto = self._escribir(lambda: modelo._default_manager.bulk_create(creados), objs, errores)
+        if conflicto is not None:
+            return conflicto
+        return Response(self.get_serializer(creados, many=True).data, status=status.HTTP_201_CREATED)
+
+    def _actualizar_lote(self, datos):
+        modelo = self.get_queryset().model
+        errores = [{} for _ in datos]
+        ids = [_id(item.get('id')) if isinstance(item, dict) else None for item in datos]
+        instancias = self.filter_queryset(self.get_queryset()).in_bulk({i for i in ids if i is not None})
+        vistos = set()
+        for indice, id_ in enumerate(ids):
+            if id_ is None:
+                errores[indice] = {'id': ['Cada registro debe incluir su id.']}
+            elif id_ not in instancias:
+                errores[indice] = {'id': [f'No existe el registro {id_}.']}
+            elif id_ in vistos:
+                errores[indice] = {'id': [f'El registro {id_} aparece más de una vez en el lote.']}
+            vistos.add(id_)
+
+        validados = self._validar(self._serializer_lote(datos, partial=True), datos, errores)
+        objs, campos = {}, set()
+        for indice, attrs in validados.items():
+            obj = instancias[ids[indice]]
+            for campo, valor in attrs.items():
+                setattr(obj, campo, valor)
+            objs[indice] = obj
+            campos.update(attrs)
+        self._comprobar_unicidad(objs, errores)
+        if any(errores):
+            return Response(errores, status=status.HTTP_400_BAD_REQUEST)
+        if campos:
+            conflicto = self._escribir(
+                lambda: modelo._default_manager.bulk_update(list(objs.values()), sorted(campos)), objs, errores
+            )
+            if conflicto is not None:
+                return conflicto
+        return Response(self.get_serializer(list(objs.values()), many=True).data, status=status.HTTP_200_OK)
+
+    def _borrar_lote(self, datos):
+        ids = [_id(valor) for valor in datos]
+        queryset = self.filter_queryset(self.get_queryset())
+        existentes = set(queryset.filter(pk__in={i for i in ids if i is not None}).values_list('pk', flat=True))
+        errores = [
+            {} if id_ in existentes else {'id': [f'No existe el registro {valor}.']}
+            for id_, valor in zip(ids, datos)
+        ]
+        if any(errores):
+            return Response(errores, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            queryset.filter(pk__in=existentes).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
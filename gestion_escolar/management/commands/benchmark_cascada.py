@@ -0,0 +1,63 @@
+# gestion_escolar/management/commands/benchmark_cascada.py
+import time
+
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand
+
+from modelo import COLUMNAS_FEATURES, generar_datos_sinteticos, obtener_modelos
+from gestion_escolar.models import Alumno
+from gestion_escolar.prediccion import metricas_alumnos
+
+
+def _mejor_tiempo(funcion, repeticiones):
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    return mejor
+
+
+class Command(BaseCommand):
+    help = ('Mide la clasificación en cascada (regla + RandomForest cerca de los umbrales) frente al '
+            'RandomForest completo sobre todos los alumnos del colegio: fracción que pasa por el bosque, '
+            'coincidencia con el bosque completo y alumnos por segundo.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--margen', type=float, action='append', help='Margen a medir (repetible). Por defecto 0.5, 1, 2, 5 y 10.')
+        parser.add_argument('--sinteticos', type=int, default=0, help='Añade N estudiantes sintéticos (python modelo.py) a los reales.')
+        parser.add_argument('--repeticiones', type=int, default=5, help='Repeticiones por medición (se reporta la mejor).')
+
+    def handle(self, *args, **kwargs):
+        modelos = obtener_modelos()
+        if not modelos.disponible:
+            self.stderr.write(self.style.ERROR('No hay modelos cargados: ejecuta "python modelo.py" primero.'))
+            return
+        alumnos_ids = list(Alumno.objects.values_list('id', flat=True))
+        partes = [pd.DataFrame(metricas_alumnos(alumnos_ids=alumnos_ids), columns=['id', *COLUMNAS_FEATURES])]
+        if kwargs['sinteticos']:
+            partes.append(generar_datos_sinteticos(kwargs['sinteticos'], semilla=0))
+        df = pd.concat([parte[COLUMNAS_FEATURES] for parte in partes], ignore_index=True)
+        if df.empty:
+            self.stderr.write(self.style.ERROR('No hay alumnos que puntuar.'))
+            return
+        repeticiones = kwargs['repeticiones']
+
+        _, completo = modelos.predecir(df)
+        t_completo = _mejor_tiempo(lambda: modelos.predecir(df), repeticiones)
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'{len(df)} alumnos ({len(partes[0])} reales) | RandomForest completo: {t_completo * 1000:.1f} ms '
+            f'({len(df) / t_completo:,.0f} alumnos/s)'
+        ))
+        for margen in kwargs['margen'] or [0.5, 1, 2, 5, 10]:
+            _, cascada, usa_bosque, acuerdos = modelos.predecir_cascada(df, margen)
+            t_cascada = _mejor_tiempo(lambda: modelos.predecir_cascada(df, margen), repeticiones)
+            iguales = float(np.mean(cascada == completo))
+            acuerdo_bosque = acuerdos / usa_bosque.sum() if usa_bosque.any() else 1.0
+            self.stdout.write(
+                f'margen {margen:>4g}: bosque {usa_bosque.mean():6.1%} | igual al completo {iguales:8.4%} | '
+                f'regla = bosque en la franja {acuerdo_bosque:6.1%} | {t_cascada * 1000:7.1f} ms '
+                f'({len(df) / t_cascada:,.0f} alumnos/s, x{t_completo / t_cascada:.1f})'
+            )
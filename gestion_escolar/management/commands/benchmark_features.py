@@ -0,0 +1,99 @@
+# gestion_escolar/management/commands/benchmark_features.py
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Avg, Count, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.test.utils import CaptureQueriesContext
+
+from gestion_escolar.models import Alumno, Curso, Inscripcion, Nota, Asistencia, Participacion
+from gestion_escolar.prediccion import alumnos_para_prediccion, metricas_alumnos_desde_registros
+
+
+def _metricas_fan_out(alumnos_queryset):
+    """Consulta original de MLModelEndpoint: un único annotate() que une Nota,
+    Participacion y Asistencia a través de Inscripcion. Se conserva aquí solo
+    como referencia para medir la diferencia."""
+    return list(alumnos_queryset.annotate(
+        evaluaciones_avg=Avg('inscripcion__nota__calificacion', default=0.0),
+        participacion_avg_raw=Avg('inscripcion__participacion__puntuacion', default=0.0),
+        total_asistencias=Count('inscripcion__asistencia', distinct=True),
+        presentes=Count('inscripcion__asistencia', filter=Q(inscripcion__asistencia__estado='Presente'), distinct=True)
+    ).values(
+        'id', 'nombre', 'apellido', 'evaluaciones_avg',
+        'participacion_avg_raw', 'total_asistencias', 'presentes'
+    ))
+
+
+def _conteo(modelo):
+    subconsulta = (
+        modelo.objects.filter(inscripcion=OuterRef('pk'))
+        .values('inscripcion').annotate(n=Count('id')).values('n')
+    )
+    return Coalesce(Subquery(subconsulta, output_field=IntegerField()), Value(0))
+
+
+def _filas_procesadas(curso_id):
+    """Filas que produce cada estrategia: el join en abanico genera
+    max(1, N) × max(1, P) × max(1, A) filas por inscripción, mientras que las
+    agregaciones independientes leen N + P + A filas."""
+    conteos = Inscripcion.objects.filter(curso_id=curso_id).annotate(
+        n_notas=_conteo(Nota), n_participaciones=_conteo(Participacion), n_asistencias=_conteo(Asistencia)
+    ).values_list('n_notas', 'n_participaciones', 'n_asistencias')
+    fan_out, independientes = 0, 0
+    for n, p, a in conteos:
+        fan_out += max(1, n) * max(1, p) * max(1, a)
+        independientes += n + p + a
+    return fan_out, independientes
+
+
+def _medir(funcion, repeticiones):
+    mejor = None
+    for _ in range(repeticiones):
+        with CaptureQueriesContext(connection) as consultas:
+            inicio = time.perf_counter()
+            funcion()
+            duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    return mejor, len(consultas.captured_queries)
+
+
+class Command(BaseCommand):
+    help = ('Compara la extracción de features de MLModelEndpoint con el join en abanico '
+            'original frente a las agregaciones independientes por tabla. '
+            'Ejecutar sobre una BD poblada con populate_db2.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--curso_id', type=int, action='append', help='Curso a medir (repetible). Por defecto, todos.')
+        parser.add_argument('--repeticiones', type=int, default=3, help='Repeticiones por medición (se reporta la mejor).')
+        parser.add_argument('--sin_fan_out', action='store_true', help='Omite la consulta original (útil con muchos datos).')
+
+    def handle(self, *args, **kwargs):
+        cursos_ids = kwargs['curso_id'] or list(Curso.objects.order_by('id').values_list('id', flat=True))
+        repeticiones = kwargs['repeticiones']
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'Notas: {Nota.objects.count()} | Participaciones: {Participacion.objects.count()} | '
+            f'Asistencias: {Asistencia.objects.count()}'
+        ))
+        total_antes, total_despues = 0.0, 0.0
+        for curso_id in cursos_ids:
+            alumnos, filtro = alumnos_para_prediccion(curso_id=curso_id)
+            filas_fan_out, filas_independientes = _filas_procesadas(curso_id)
+            despues, consultas_despues = _medir(lambda: metricas_alumnos_desde_registros(alumnos, filtro), repeticiones)
+            total_despues += despues
+
+            linea = (f'Curso {curso_id}: filas {filas_fan_out} -> {filas_independientes} | '
+                     f'después {despues * 1000:.1f} ms ({consultas_despues} consulta/s)')
+            if not kwargs['sin_fan_out']:
+                alumnos_fan_out = Alumno.objects.filter(inscripcion__curso_id=curso_id).distinct()
+                antes, _ = _medir(lambda: _metricas_fan_out(alumnos_fan_out), repeticiones)
+                total_antes += antes
+                linea += f' | antes {antes * 1000:.1f} ms (x{antes / despues:.1f})'
+            self.stdout.write(linea)
+
+        resumen = f'Total después: {total_despues * 1000:.1f} ms'
+        if not kwargs['sin_fan_out']:
+            resumen = f'Total antes: {total_antes * 1000:.1f} ms | ' + resumen
+        self.stdout.write(self.style.SUCCESS(resumen))
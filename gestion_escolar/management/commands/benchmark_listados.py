@@ -0,0 +1,106 @@
+# gestion_escolar/management/commands/benchmark_listados.py
+import json
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from gestion_escolar.lectura import PlanLectura
+from gestion_escolar.renderers import JSONRapidoRenderer, orjson
+from gestion_escolar.views import AsistenciaViewSet, NotaViewSet, ParticipacionViewSet
+
+RECURSOS = {
+    'notas': NotaViewSet,
+    'asistencias': AsistenciaViewSet,
+    'participaciones': ParticipacionViewSet,
+}
+
+
+def _mediana_ms(funcion, repeticiones):
+    funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return round(statistics.median(tiempos), 3)
+
+
+def _medir(recurso, viewset, tamanio, cliente, repeticiones):
+    queryset = viewset.queryset.order_by('id')
+    serializer_class = viewset.serializer_class
+    plan = PlanLectura.desde_serializer(serializer_class())
+
+    def serializer():
+        return JSONRenderer().render(serializer_class(list(queryset[:tamanio]), many=True).data)
+
+    def rapida():
+        return JSONRapidoRenderer().render([plan.fila(v) for v in queryset.values_list(*plan.columnas)[:tamanio]])
+
+    if serializer() != rapida():
+        raise CommandError(f'{recurso}: la lectura rápida no devuelve el mismo JSON que el serializer.')
+
+    def endpoint():
+        respuesta = cliente.get(f'/api/{recurso}/', {'tamanio_pagina': tamanio})
+        if respuesta.status_code != 200:
+            raise CommandError(f'/api/{recurso}/ respondió {respuesta.status_code}')
+
+    medidas = {'serializacion_serializer_ms': _mediana_ms(serializer, repeticiones),
+               'serializacion_rapida_ms': _mediana_ms(rapida, repeticiones)}
+    viewset.lectura_rapida = False
+    try:
+        medidas['endpoint_serializer_ms'] = _mediana_ms(endpoint, repeticiones)
+    finally:
+        viewset.lectura_rapida = True
+    medidas['endpoint_rapido_ms'] = _mediana_ms(endpoint, repeticiones)
+    medidas['aceleracion_serializacion'] = round(medidas['serializacion_serializer_ms'] / medidas['serializacion_rapida_ms'], 2)
+    medidas['aceleracion_endpoint'] = round(medidas['endpoint_serializer_ms'] / medidas['endpoint_rapido_ms'], 2)
+    return medidas
+
+
+class Command(BaseCommand):
+    help = ('Compara la lectura rápida de los listados (values_list + orjson) con los ModelSerializer '
+            'en /api/notas/, /api/asistencias/ y /api/participaciones/: lectura + serialización + render '
+            'de N filas, y la petición completa con una página de N filas. Comprueba además que las dos '
+            'devuelven el mismo JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamanios', type=int, nargs='+', default=[100, 1000],
+                            help=f'Filas por página (máximo API_TAMANIO_PAGINA_MAXIMO={settings.API_TAMANIO_PAGINA_MAXIMO}).')
+        parser.add_argument('--recursos', nargs='+', choices=list(RECURSOS), default=list(RECURSOS))
+        parser.add_argument('--repeticiones', type=int, default=5, help='Ejecuciones medidas (se reporta la mediana).')
+        parser.add_argument('--salida', help='Archivo donde guardar el JSON (por defecto, la salida estándar).')
+
+    # El APIClient envía Host: testserver, que ALLOWED_HOSTS rechaza fuera de los tests
+    @override_settings(ALLOWED_HOSTS=['testserver'])
+    def handle(self, *args, **kwargs):
+        tamanios = sorted({min(t, settings.API_TAMANIO_PAGINA_MAXIMO) for t in kwargs['tamanios']})
+        cliente = APIClient()
+        informe = {'orjson': orjson is not None, 'repeticiones': kwargs['repeticiones'], 'resultados': []}
+        for recurso in kwargs['recursos']:
+            viewset = RECURSOS[recurso]
+            disponibles = viewset.queryset.count()
+            for tamanio in tamanios:
+                if tamanio > disponibles:
+                    self.stderr.write(self.style.WARNING(f'{recurso}: solo hay {disponibles} filas, se omite {tamanio}.'))
+                    continue
+                medidas = _medir(recurso, viewset, tamanio, cliente, kwargs['repeticiones'])
+                informe['resultados'].append({'recurso': recurso, 'tamanio': tamanio, **medidas})
+                self.stderr.write(
+                    f"{recurso} x{tamanio}: serialización {medidas['serializacion_serializer_ms']:.1f} -> "
+                    f"{medidas['serializacion_rapida_ms']:.1f} ms (x{medidas['aceleracion_serializacion']}) | "
+                    f"endpoint {medidas['endpoint_serializer_ms']:.1f} -> {medidas['endpoint_rapido_ms']:.1f} ms "
+                    f"(x{medidas['aceleracion_endpoint']})"
+                )
+
+        salida = json.dumps(informe, ensure_ascii=False, indent=2)
+        if kwargs['salida']:
+            with open(kwargs['salida'], 'w', encoding='utf-8') as f:
+                f.write(salida + '\n')
+            self.stderr.write(self.style.SUCCESS(f"Informe guardado en {kwargs['salida']}"))
+        else:
+            self.stdout.write(salida)
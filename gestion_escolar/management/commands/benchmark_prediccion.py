@@ -0,0 +1,175 @@
+# gestion_escolar/management/commands/benchmark_prediccion.py
+import json
+import platform
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+import sklearn
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from modelo import MAX_FILAS_COMPILADO, generar_recomendaciones_lote, obtener_modelos, predecir_lote
+from gestion_escolar.cache_predicciones import cache_predicciones
+from gestion_escolar.models import Alumno
+from gestion_escolar.prediccion import (
+    metricas_alumnos, metricas_alumnos_desde_registros, percentiles_grupo, resultados_prediccion,
+)
+
+TAMANIOS = [1, 10, 100, 1000, 5000]
+
+# Etapas de /api/mlmodel/ en el orden en que se ejecutan. 'resultados' es
+# resultados_prediccion completo (predicción + recomendaciones + armado de
+# los diccionarios) y 'endpoint' la petición entera por el cliente de DRF,
+# con la caché de predicciones vacía.
+ETAPAS = [
+    'orm_metricas', 'orm_registros', 'dataframe', 'percentiles', 'prediccion',
+    'recomendaciones', 'resultados', 'render_drf', 'endpoint',
+]
+
+
+def _medir(funcion, repeticiones):
+    """Tiempos en ms de `repeticiones` ejecuciones, tras una de calentamiento,
+    y número de consultas SQL de la última."""
+    funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        with CaptureQueriesContext(connection) as consultas:
+            inicio = time.perf_counter()
+            funcion()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+    return {
+        'min_ms': round(min(tiempos), 4),
+        'mediana_ms': round(statistics.median(tiempos), 4),
+        'media_ms': round(statistics.fmean(tiempos), 4),
+        'consultas': len(consultas.captured_queries),
+    }
+
+
+def _medir_grupo(alumnos_ids, modelos, cliente, repeticiones):
+    metricas = metricas_alumnos(alumnos_ids=alumnos_ids)
+    df = pd.DataFrame(metricas)
+    percentiles = percentiles_grupo(df)
+    resultados = resultados_prediccion(metricas, df, percentiles, modelos)
+
+    def endpoint():
+        cache_predicciones.limpiar()
+        respuesta = cliente.post('/api/mlmodel/', {'alumnos_ids': alumnos_ids}, format='json')
+        if respuesta.status_code != 200:
+            raise CommandError(f'/api/mlmodel/ respondió {respuesta.status_code}')
+
+    funciones = {
+        'orm_metricas': lambda: metricas_alumnos(alumnos_ids=alumnos_ids),
+        'orm_registros': lambda: metricas_alumnos_desde_registros(Alumno.objects.filter(id__in=alumnos_ids)),
+        'dataframe': lambda: pd.DataFrame(metricas),
+        'percentiles': lambda: percentiles_grupo(df),
+        'prediccion': lambda: predecir_lote(df, modelos),
+        'recomendaciones': lambda: generar_recomendaciones_lote(df, percentiles),
+        'resultados': lambda: resultados_prediccion(metricas, df, percentiles, modelos),
+        'render_drf': lambda: JSONRenderer().render(resultados),
+        'endpoint': endpoint,
+    }
+    return {etapa: _medir(funciones[etapa], repeticiones) for etapa in ETAPAS}
+
+
+def _comparar(anterior, actual, tolerancia):
+    """Etapas cuya mediana creció más que `tolerancia` (p. ej. 1.2 = +20 %)
+    respecto a un informe anterior, para los tamaños presentes en ambos."""
+    previos = {fila['tamanio']: fila['etapas'] for fila in anterior['resultados']}
+    regresiones = []
+    for fila in actual['resultados']:
+        for etapa, medida in fila['etapas'].items():
+            previa = previos.get(fila['tamanio'], {}).get(etapa)
+            if previa and previa['mediana_ms'] > 0 and medida['mediana_ms'] / previa['mediana_ms'] > tolerancia:
+                regresiones.append({
+                    'tamanio': fila['tamanio'], 'etapa': etapa,
+                    'anterior_ms': previa['mediana_ms'], 'actual_ms': medida['mediana_ms'],
+                    'ratio': round(medida['mediana_ms'] / previa['mediana_ms'], 2),
+                })
+    return regresiones
+
+
+class Command(BaseCommand):
+    help = ('Mide por separado cada etapa de /api/mlmodel/ (agregación del ORM, DataFrame, percentiles, '
+            'predicción, recomendaciones, armado, render de DRF y la petición completa) para grupos de '
+            '1 a 5000 alumnos y escribe el resultado en JSON. Pensado para una BD local poblada con '
+            'populate_db2; con --comparar señala las etapas que empeoraron respecto a un informe anterior.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamanios', type=int, nargs='+', default=TAMANIOS, help='Alumnos por grupo.')
+        parser.add_argument('--repeticiones', type=int, default=5, help='Ejecuciones medidas por etapa.')
+        parser.add_argument('--salida', help='Archivo donde guardar el JSON (por defecto, la salida estándar).')
+        parser.add_argument('--poblar', action='store_true',
+                            help='Si faltan alumnos para el mayor tamaño, los crea con populate_db2 (pensado para una BD local vacía).')
+        parser.add_argument('--comparar', help='Informe JSON anterior con el que comparar.')
+        parser.add_argument('--tolerancia', type=float, default=1.2, help='Ratio de la mediana a partir del cual se señala una etapa.')
+
+    # El APIClient envía Host: testserver, que ALLOWED_HOSTS rechaza fuera de los tests
+    @override_settings(ALLOWED_HOSTS=['testserver'])
+    def handle(self, *args, **kwargs):
+        modelos = obtener_modelos()
+        if not modelos.disponible:
+            raise CommandError('No hay modelos cargados: ejecuta "python modelo.py" primero.')
+        tamanios = sorted(set(kwargs['tamanios']))
+
+        faltan = tamanios[-1] - Alumno.objects.count()
+        if faltan > 0 and kwargs['poblar']:
+            self.stderr.write(f'Creando {faltan} alumnos con populate_db2...')
+            call_command('populate_db2', num_alumnos=faltan, stdout=self.stderr)
+        # Los primeros alumnos por id; los que no tienen inscripciones recorren
+        # las mismas etapas (con features a 0)
+        alumnos_ids = list(Alumno.objects.order_by('id').values_list('id', flat=True)[:tamanios[-1]])
+        if len(alumnos_ids) < tamanios[-1]:
+            self.stderr.write(self.style.WARNING(
+                f'Solo hay {len(alumnos_ids)} alumnos: se omiten los tamaños mayores (usa --poblar para crearlos).'
+            ))
+
+        cliente = APIClient()
+        informe = {
+            'fecha': timezone.now().isoformat(timespec='seconds'),
+            'version_modelo': modelos.version,
+            'motor': (
+                'sklearn' if modelos.compilado is None else 'compilado' if modelos.clasificacion is None
+                else f'compilado hasta {MAX_FILAS_COMPILADO} filas, sklearn por encima'
+            ),
+            'base_de_datos': connection.vendor,
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'sklearn': sklearn.__version__,
+            'repeticiones': kwargs['repeticiones'],
+            'resultados': [],
+        }
+        for tamanio in tamanios:
+            if tamanio > len(alumnos_ids):
+                break
+            self.stderr.write(f'Grupo de {tamanio} alumnos...')
+            etapas = _medir_grupo(alumnos_ids[:tamanio], modelos, cliente, kwargs['repeticiones'])
+            informe['resultados'].append({'tamanio': tamanio, 'etapas': etapas})
+            self.stderr.write('  ' + ' | '.join(f"{etapa} {medida['mediana_ms']:.2f} ms" for etapa, medida in etapas.items()))
+
+        if kwargs['comparar']:
+            with open(kwargs['comparar'], encoding='utf-8') as f:
+                informe['regresiones'] = _comparar(json.load(f), informe, kwargs['tolerancia'])
+            for regresion in informe['regresiones']:
+                self.stderr.write(self.style.WARNING(
+                    f"{regresion['etapa']} ({regresion['tamanio']} alumnos): {regresion['anterior_ms']:.2f} -> "
+                    f"{regresion['actual_ms']:.2f} ms (x{regresion['ratio']})"
+                ))
+
+        salida = json.dumps(informe, ensure_ascii=False, indent=2)
+        if kwargs['salida']:
+            with open(kwargs['salida'], 'w', encoding='utf-8') as f:
+                f.write(salida + '\n')
+            self.stderr.write(self.style.SUCCESS(f"Informe guardado en {kwargs['salida']}"))
+        else:
+            self.stdout.write(salida)
+        if informe.get('regresiones'):
+            raise CommandError(f"{len(informe['regresiones'])} medidas empeoraron más de x{kwargs['tolerancia']:g}.")
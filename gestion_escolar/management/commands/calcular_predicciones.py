@@ -0,0 +1,124 @@
+# gestion_escolar/management/commands/calcular_predicciones.py
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+from multiprocessing import get_context
+
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from modelo import obtener_modelos
+from gestion_escolar.models import Inscripcion, PrediccionAlumno
+from gestion_escolar.prediccion import predecir_grupo
+from gestion_escolar.versiones import clave_curso, obtener_versiones
+
+CAMPOS_RESULTADO = [
+    'asistencia', 'participaciones', 'evaluaciones', 'nota_final_predicha',
+    'rendimiento_predicho', 'recomendaciones', 'version_modelo',
+]
+
+# Modelos con los que se calcula toda la ejecución. Se fija en el proceso
+# principal antes de crear los procesos hijos, que lo heredan con fork.
+_modelos = None
+
+
+def _lotes_de_cursos(inscripciones_por_curso, chunk_size):
+    """Agrupa los cursos en lotes de hasta chunk_size inscripciones. Un curso
+    nunca se parte (sus percentiles se calculan sobre el curso entero), así
+    que un curso más grande que chunk_size forma un lote propio."""
+    lotes, lote, tamanio = [], [], 0
+    for curso_id, inscripciones in inscripciones_por_curso:
+        if lote and tamanio + inscripciones > chunk_size:
+            lotes.append(lote)
+            lote, tamanio = [], 0
+        lote.append(curso_id)
+        tamanio += inscripciones
+    if lote:
+        lotes.append(lote)
+    return lotes
+
+
+def _predecir_cursos(cursos_ids, anio_academico):
+    """Predice cada curso del lote y devuelve las filas de PrediccionAlumno.
+    Solo lee de la BD: las escrituras las hace el proceso principal."""
+    # La versión de los datos se lee antes que las métricas: si algo cambia
+    # mientras tanto, la fila queda marcada como desactualizada
+    versiones = obtener_versiones([clave_curso(curso_id) for curso_id in cursos_ids])
+    filas = []
+    for curso_id in cursos_ids:
+        for resultado in predecir_grupo(_modelos, curso_id=curso_id, anio_academico=anio_academico):
+            filas.append({
+                'alumno_id': resultado['alumno_id'],
+                'curso_id': curso_id,
+                'version_datos': versiones[clave_curso(curso_id)],
+                **{campo: resultado[campo] for campo in CAMPOS_RESULTADO},
+            })
+    return filas
+
+
+class Command(BaseCommand):
+    help = ('Calcula las predicciones de todas las inscripciones activas de un año académico y las guarda '
+            'en PrediccionAlumno, desde donde /api/mlmodel/ las sirve sin recalcular. Pensado para '
+            'ejecutarse cada noche.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--anio_academico', type=int, default=date.today().year)
+        parser.add_argument('--chunk_size', type=int, default=2000, help='Inscripciones (aprox.) por lote de cursos.')
+        parser.add_argument('--procesos', type=int, default=os.cpu_count() or 1, help='Procesos en paralelo.')
+
+    def handle(self, *args, **kwargs):
+        global _modelos
+        anio_academico = kwargs['anio_academico']
+        _modelos = obtener_modelos()
+        if not _modelos.disponible:
+            self.stderr.write(self.style.ERROR('No hay modelos cargados: ejecuta "python modelo.py" primero.'))
+            return
+
+        inscripciones_por_curso = list(
+            Inscripcion.objects.filter(anio_academico=anio_academico, estado_inscripcion='Activa')
+            .values('curso_id').annotate(n=Count('id')).order_by('curso_id').values_list('curso_id', 'n')
+        )
+        lotes = _lotes_de_cursos(inscripciones_por_curso, kwargs['chunk_size'])
+        procesos = max(1, min(kwargs['procesos'], len(lotes)))
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'Año {anio_academico}: {sum(n for _, n in inscripciones_por_curso)} inscripciones activas en '
+            f'{len(inscripciones_por_curso)} cursos, {len(lotes)} lotes, {procesos} proceso/s, '
+            f'modelos versión {_modelos.version}'
+        ))
+
+        inicio = time.perf_counter()
+        calculado = timezone.now()
+        total = 0
+        if procesos == 1:
+            for lote in lotes:
+                total += self._guardar(_predecir_cursos(lote, anio_academico), anio_academico, calculado)
+        else:
+            # Los procesos hijos no deben heredar la conexión abierta del padre
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=procesos, mp_context=get_context('fork')) as executor:
+                futuros = [executor.submit(_predecir_cursos, lote, anio_academico) for lote in lotes]
+                for futuro in as_completed(futuros):
+                    total += self._guardar(futuro.result(), anio_academico, calculado)
+
+        # Las filas que no se recalcularon son de inscripciones que ya no están activas
+        eliminadas, _ = PrediccionAlumno.objects.filter(anio_academico=anio_academico).exclude(
+            calculado=calculado
+        ).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} predicciones guardadas ({eliminadas} obsoletas eliminadas) en '
+            f'{time.perf_counter() - inicio:.1f} s.'
+        ))
+
+    @transaction.atomic
+    def _guardar(self, filas, anio_academico, calculado):
+        PrediccionAlumno.objects.bulk_create(
+            [PrediccionAlumno(anio_academico=anio_academico, calculado=calculado, **fila) for fila in filas],
+            update_conflicts=True,
+            unique_fields=['alumno', 'curso', 'anio_academico'],
+            update_fields=[*CAMPOS_RESULTADO, 'version_datos', 'calculado'],
+            batch_size=1000,
+        )
+        return len(filas)
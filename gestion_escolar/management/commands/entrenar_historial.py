@@ -0,0 +1,199 @@
+# gestion_escolar/management/commands/entrenar_historial.py
+import resource
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Q, Sum
+
+from modelo import (
+    COLUMNAS_FEATURES, RUTA_REGISTRO, categorizar_notas, compilar_modelos, entrenar_modelos, registro_modelos,
+)
+from gestion_escolar.models import Inscripcion, Nota, Asistencia, Participacion
+
+# ==============================================================================
+# DATOS DE ENTRENAMIENTO DESDE EL HISTORIAL
+# ==============================================================================
+# Una muestra por inscripción de los años académicos cerrados:
+#   - features: las mismas que usa /api/mlmodel/ (asistencia %, participación
+#     0-100 y promedio de evaluaciones), pero sin contar los exámenes finales;
+#   - nota_final: el promedio de sus notas de EXAMEN_FINAL, y de ella el
+#     rendimiento con la misma regla que los datos sintéticos.
+# Solo se usan las inscripciones con al menos una evaluación y un examen final.
+#
+# Cada tabla se agrega por inscripción en la BD y las filas agregadas se leen
+# con .iterator(chunk_size) (cursor del servidor en PostgreSQL) directamente a
+# arrays de NumPy reservados de antemano, una columna por contador. La memoria
+# depende del número de inscripciones, no de las filas de Nota, Asistencia y
+# Participacion que haya detrás.
+
+EXAMEN_FINAL = 'Examen Final'
+
+CONTADORES_HISTORIAL = [
+    'suma_evaluaciones', 'num_evaluaciones', 'suma_final', 'num_final',
+    'suma_participaciones', 'num_participaciones', 'total_asistencias', 'presentes',
+]
+
+
+def _rss_maximo():
+    # Pico de memoria residente del proceso, en MiB (ru_maxrss está en KiB en Linux)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _bloques(queryset, chunk_size):
+    bloque = []
+    for fila in queryset.iterator(chunk_size=chunk_size):
+        bloque.append(fila)
+        if len(bloque) == chunk_size:
+            yield bloque
+            bloque = []
+    if bloque:
+        yield bloque
+
+
+def _ids_inscripciones(inscripciones, chunk_size):
+    ids = np.empty(inscripciones.count(), dtype=np.int64)
+    n = 0
+    for bloque in _bloques(inscripciones.values_list('id', flat=True).order_by('id'), chunk_size):
+        bloque = bloque[:len(ids) - n]
+        ids[n:n + len(bloque)] = bloque
+        n += len(bloque)
+        if n == len(ids):
+            break
+    return ids[:n]
+
+
+def extraer_historial(anios, chunk_size=5000, limite=None):
+    """DataFrame con COLUMNAS_FEATURES, nota_final y rendimiento de las
+    inscripciones de `anios` (las `limite` primeras por id, si se indica)."""
+    inscripciones = Inscripcion.objects.filter(anio_academico__in=anios)
+    if limite is not None:
+        inscripciones = inscripciones.filter(
+            id__in=inscripciones.order_by('id').values('id')[:limite]
+        )
+    ids = _ids_inscripciones(inscripciones, chunk_size)
+    contadores = {campo: np.zeros(len(ids), dtype=np.float64) for campo in CONTADORES_HISTORIAL}
+    if not len(ids):
+        return pd.DataFrame(columns=[*COLUMNAS_FEATURES, 'nota_final', 'rendimiento'])
+
+    # Las inscripciones del conjunto son exactamente las de esos años con id <= ids[-1]
+    filtro = {'inscripcion__anio_academico__in': anios, 'inscripcion_id__lte': int(ids[-1])}
+    final = Q(tipo_evaluacion=EXAMEN_FINAL)
+    consultas = [
+        (Nota, {
+            'suma_evaluaciones': Sum('calificacion', filter=~final),
+            'num_evaluaciones': Count('id', filter=~final),
+            'suma_final': Sum('calificacion', filter=final),
+            'num_final': Count('id', filter=final),
+        }),
+        (Participacion, {'suma_participaciones': Sum('puntuacion'), 'num_participaciones': Count('id')}),
+        (Asistencia, {'total_asistencias': Count('id'), 'presentes': Count('id', filter=Q(estado='Presente'))}),
+    ]
+    for modelo, agregados in consultas:
+        filas = (
+            modelo.objects.filter(**filtro).values('inscripcion_id').annotate(**agregados)
+            .order_by('inscripcion_id').values_list('inscripcion_id', *agregados)
+        )
+        for bloque in _bloques(filas, chunk_size):
+            # Decimal y None (suma sin filas) pasan a float64 y NaN
+            valores = np.array(bloque, dtype=np.float64)
+            posiciones = np.searchsorted(ids, valores[:, 0].astype(np.int64))
+            for j, campo in enumerate(agregados, start=1):
+                contadores[campo][posiciones] = np.nan_to_num(valores[:, j])
+
+    # Mismas fórmulas que metricas.features_desde_contadores, por columnas
+    c = contadores
+    validas = (c['num_evaluaciones'] > 0) & (c['num_final'] > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df = pd.DataFrame({
+            'asistencia': np.where(
+                c['total_asistencias'] > 0, np.trunc(c['presentes'] / c['total_asistencias'] * 100), 0
+            )[validas],
+            'participaciones': np.where(
+                c['num_participaciones'] > 0, c['suma_participaciones'] / c['num_participaciones'] * 10, 0
+            )[validas],
+            'evaluaciones': (c['suma_evaluaciones'] / c['num_evaluaciones'])[validas],
+            'nota_final': np.round(c['suma_final'] / c['num_final'], 2)[validas],
+        })
+    df['rendimiento'] = categorizar_notas(df['nota_final'].to_numpy())
+    return df
+
+
+class Command(BaseCommand):
+    help = ('Entrena la regresión y el RandomForest con el historial real de la BD (años académicos '
+            'cerrados) y publica una versión nueva en el registro de modelos. Informa del tiempo y el '
+            'pico de memoria de cada fase; con --limite o --escalas se puede medir a distintas escalas.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--anios', type=int, nargs='+', help='Años académicos a usar. Por defecto, todos los anteriores al actual.')
+        parser.add_argument('--chunk_size', type=int, default=5000, help='Filas por lectura del cursor.')
+        parser.add_argument('--limite', type=int, help='Usa solo las N primeras inscripciones (para medir a distintas escalas).')
+        parser.add_argument('--escalas', type=int, nargs='+',
+                            help='Solo mide: extrae y entrena con cada número de inscripciones, p. ej. --escalas 1000 10000 100000.')
+        parser.add_argument('--arboles', type=int, default=100, help='Árboles del RandomForest.')
+        parser.add_argument('--n_jobs', type=int, default=-1, help='Procesos para entrenar el RandomForest (-1: todos).')
+        parser.add_argument('--activar', action='store_true', help='Activa la versión publicada.')
+        parser.add_argument('--sin_publicar', action='store_true', help='Solo entrena y mide, sin publicar la versión.')
+
+    def handle(self, *args, **kwargs):
+        anios = kwargs['anios']
+        if not anios:
+            actual = date.today().year
+            anios = sorted(
+                Inscripcion.objects.filter(anio_academico__lt=actual)
+                .values_list('anio_academico', flat=True).distinct()
+            )
+        if not anios:
+            raise CommandError('No hay años académicos cerrados en la BD.')
+
+        if kwargs['escalas']:
+            # De menor a mayor: ru_maxrss es el pico de todo el proceso, así que
+            # el de una escala puede venir de otra anterior (más pequeña). Para
+            # el pico aislado de una escala, una ejecución con --limite.
+            for limite in sorted(set(kwargs['escalas'])):
+                self.stdout.write(self.style.MIGRATE_HEADING(
+                    f'Años {", ".join(map(str, anios))}, {limite} inscripciones'
+                ))
+                self._entrenar(anios, kwargs, limite)
+            return
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Años {", ".join(map(str, anios))}'))
+        df, regresion, clasificacion, metricas = self._entrenar(anios, kwargs, kwargs['limite'])
+        if kwargs['sin_publicar']:
+            return
+        version = registro_modelos.publicar(
+            compilar_modelos(regresion, clasificacion), regresion=regresion, clasificacion=clasificacion,
+            origen='historial de la BD',
+            anios=anios, muestras=len(df), **metricas,
+        )
+        if kwargs['activar']:
+            registro_modelos.activar(version)
+            self.stdout.write(self.style.SUCCESS(f'Versión {version} publicada y activada en {RUTA_REGISTRO}.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'Versión {version} publicada en {RUTA_REGISTRO}. Para servirla: python modelo.py activar {version}'
+            ))
+
+    def _entrenar(self, anios, kwargs, limite):
+        """Extrae el historial y entrena, informando del tiempo y el pico de
+        memoria de cada fase. Devuelve (df, regresion, clasificacion, metricas)."""
+        inicio = time.perf_counter()
+        df = extraer_historial(anios, kwargs['chunk_size'], limite)
+        t_extraccion = time.perf_counter() - inicio
+        self.stdout.write(
+            f'Extracción: {len(df)} muestras en {t_extraccion:.2f} s, pico de memoria {_rss_maximo():.0f} MiB'
+        )
+        if df['rendimiento'].nunique() < 2:
+            raise CommandError('El historial no tiene muestras suficientes de al menos dos rendimientos.')
+        self.stdout.write(', '.join(f'{clase}: {n}' for clase, n in df['rendimiento'].value_counts().items()))
+
+        inicio = time.perf_counter()
+        regresion, clasificacion, metricas = entrenar_modelos(df, kwargs['n_jobs'], kwargs['arboles'])
+        t_entrenamiento = time.perf_counter() - inicio
+        self.stdout.write(
+            f'Entrenamiento: {t_entrenamiento:.2f} s, pico de memoria {_rss_maximo():.0f} MiB | '
+            + ', '.join(f'{clave}={valor}' for clave, valor in metricas.items())
+        )
+        return df, regresion, clasificacion, metricas
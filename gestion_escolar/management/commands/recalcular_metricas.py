@@ -0,0 +1,39 @@
+# gestion_escolar/management/commands/recalcular_metricas.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from gestion_escolar.models import Alumno, Inscripcion, InscripcionMetricas, AlumnoMetricas
+from gestion_escolar.metricas import recalcular_inscripciones, recalcular_alumnos
+from gestion_escolar.percentiles import reconstruir_percentiles
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye desde cero las tablas InscripcionMetricas y AlumnoMetricas a partir de Nota, Asistencia y Participacion.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk_size', type=int, default=2000, help='Inscripciones/alumnos procesados por lote.')
+
+    @transaction.atomic
+    def handle(self, *args, **kwargs):
+        chunk_size = kwargs['chunk_size']
+
+        self.stdout.write(self.style.WARNING('Eliminando métricas existentes...'))
+        InscripcionMetricas.objects.all().delete()
+        AlumnoMetricas.objects.all().delete()
+
+        inscripciones_ids = list(Inscripcion.objects.order_by('id').values_list('id', flat=True))
+        self.stdout.write(f'Recalculando métricas de {len(inscripciones_ids)} inscripciones...')
+        for inicio in range(0, len(inscripciones_ids), chunk_size):
+            recalcular_inscripciones(
+                inscripciones_ids[inicio:inicio + chunk_size], incluir_alumnos=False, incluir_percentiles=False
+            )
+
+        alumnos_ids = list(Alumno.objects.order_by('id').values_list('id', flat=True))
+        self.stdout.write(f'Recalculando métricas de {len(alumnos_ids)} alumnos...')
+        for inicio in range(0, len(alumnos_ids), chunk_size):
+            recalcular_alumnos(alumnos_ids[inicio:inicio + chunk_size])
+
+        self.stdout.write('Recalculando percentiles por curso y año...')
+        reconstruir_percentiles()
+
+        self.stdout.write(self.style.SUCCESS('Métricas reconstruidas.'))
@@ -0,0 +1,28 @@
+# gestion_escolar/management/commands/reconstruir_percentiles.py
+from django.core.management.base import BaseCommand
+
+from gestion_escolar.models import Inscripcion, PercentilesCurso
+from gestion_escolar.percentiles import ERROR_MAXIMO, reconstruir_percentiles
+
+
+class Command(BaseCommand):
+    help = ('Reconstruye desde InscripcionMetricas los histogramas y percentiles por curso y año '
+            '(PercentilesCurso) que usan las recomendaciones de /api/mlmodel/.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--anio_academico', type=int, action='append', help='Año a reconstruir (repetible). Por defecto, todos.')
+
+    def handle(self, *args, **kwargs):
+        anios = kwargs['anio_academico']
+        if anios:
+            grupos = set(
+                Inscripcion.objects.filter(anio_academico__in=anios)
+                .values_list('curso_id', 'anio_academico').distinct()
+            )
+            grupos |= set(PercentilesCurso.objects.filter(anio_academico__in=anios).values_list('curso_id', 'anio_academico'))
+            total = reconstruir_percentiles(grupos)
+        else:
+            total = reconstruir_percentiles()
+        self.stdout.write(self.style.SUCCESS(
+            f'{total or 0} grupos (curso, año) reconstruidos. Error máximo de cada percentil: ±{ERROR_MAXIMO:g}.'
+        ))
@@ -0,0 +1,228 @@
+# gestion_escolar/metricas.py
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, Count, F, Q, Sum, Value, When
+
+from .models import (
+    Inscripcion, Nota, Asistencia, Participacion,
+    InscripcionMetricas, AlumnoMetricas
+)
+from .versiones import incrementar_versiones_inscripciones
+
+# ==============================================================================
+# MANTENIMIENTO INCREMENTAL DE InscripcionMetricas / AlumnoMetricas
+# ==============================================================================
+# Cada Nota, Participacion o Asistencia aporta una cantidad fija a los
+# contadores de su inscripción (y del alumno de esa inscripción). Al crear un
+# registro se suma su aporte, al borrarlo se resta y al modificarlo se resta
+# el aporte anterior y se suma el nuevo.
+
+CONTADORES = [
+    'suma_calificaciones', 'num_notas', 'suma_participaciones',
+    'num_participaciones', 'total_asistencias', 'presentes',
+]
+
+# Campos de cada modelo que influyen en las métricas
+_CAMPOS_METRICAS = {
+    Nota: {'inscripcion', 'inscripcion_id', 'calificacion'},
+    Participacion: {'inscripcion', 'inscripcion_id', 'puntuacion'},
+    Asistencia: {'inscripcion', 'inscripcion_id', 'estado'},
+}
+
+_CENTESIMA = Decimal('0.01')
+
+
+def _decimal(valor):
+    # Los datos de populate_db llegan como float de numpy: se redondean igual
+    # que al guardarse en las columnas DecimalField(decimal_places=2)
+    return Decimal(str(valor)).quantize(_CENTESIMA)
+
+
+def features_desde_contadores(contadores):
+    """Features de los modelos de ML (asistencia %, participación 0-100 y
+    promedio de evaluaciones) a partir de los contadores acumulados."""
+    total_asistencias = contadores['total_asistencias'] or 0
+    num_notas = contadores['num_notas'] or 0
+    num_participaciones = contadores['num_participaciones'] or 0
+    return {
+        'asistencia': int((contadores['presentes'] / total_asistencias) * 100) if total_asistencias > 0 else 0,
+        'participaciones': float(contadores['suma_participaciones'] / num_participaciones) * 10 if num_participaciones > 0 else 0.0,
+        'evaluaciones': float(contadores['suma_calificaciones'] / num_notas) if num_notas > 0 else 0.0,
+    }
+
+
+def campos_metricas(modelo):
+    return _CAMPOS_METRICAS.get(modelo, set())
+
+
+def aporte(modelo, valores):
+    """Aporte de un registro a los contadores. `valores` es un dict con los
+    campos del registro (calificacion, puntuacion o estado)."""
+    if modelo is Nota:
+        return {'suma_calificaciones': _decimal(valores['calificacion']), 'num_notas': 1}
+    if modelo is Participacion:
+        return {'suma_participaciones': _decimal(valores['puntuacion']), 'num_participaciones': 1}
+    if modelo is Asistencia:
+        return {'total_asistencias': 1, 'presentes': 1 if valores['estado'] == 'Presente' else 0}
+    return {}
+
+
+def valores_registro(instancia):
+    return {
+        'inscripcion_id': instancia.inscripcion_id,
+        'calificacion': getattr(instancia, 'calificacion', None),
+        'puntuacion': getattr(instancia, 'puntuacion', None),
+        'estado': getattr(instancia, 'estado', None),
+    }
+
+
+def _acumular(deltas, inscripcion_id, aporte_registro, signo):
+    for campo, valor in aporte_registro.items():
+        deltas[inscripcion_id][campo] += signo * valor
+
+
+def _aplicar(modelo_metricas, campo_clave, deltas, crear):
+    claves = [clave for clave, delta in deltas.items() if any(delta.values())]
+    if not claves:
+        return
+    if crear:
+        modelo_metricas.objects.bulk_create(
+            [modelo_metricas(**{campo_clave: clave}) for clave in claves],
+            ignore_conflicts=True,
+        )
+    # Un solo UPDATE para todas las claves: cada contador suma el delta de su
+    # fila con un CASE (las escrituras masivas tocan decenas de inscripciones)
+    cambios = {}
+    for campo in {campo for clave in claves for campo, valor in deltas[clave].items() if valor}:
+        tipo = modelo_metricas._meta.get_field(campo)
+        casos = [
+            When(**{campo_clave: clave}, then=Value(deltas[clave][campo], output_field=tipo))
+            for clave in claves if deltas[clave][campo]
+        ]
+        cambios[campo] = F(campo) + Case(*casos, default=Value(0, output_field=tipo), output_field=tipo)
+    modelo_metricas.objects.filter(**{f'{campo_clave}__in': claves}).update(**cambios)
+
+
+def aplicar_deltas(deltas_por_inscripcion, crear=True):
+    """Aplica {inscripcion_id: {contador: delta}} a las métricas de cada
+    inscripción y del alumno correspondiente, con incrementos atómicos F().
+
+    Con crear=False (solo bajas) no se crean filas de métricas: si no existen
+    es porque la inscripción o el alumno se están borrando en cascada."""
+    if not deltas_por_inscripcion:
+        return
+    from .percentiles import actualizar_percentiles, features_miembros, miembros_afectados
+
+    filas = list(Inscripcion.objects.filter(id__in=deltas_por_inscripcion.keys()).values_list(
+        'id', 'alumno_id', 'curso_id', 'anio_academico', 'estado_inscripcion'
+    ))
+    inscripciones = {fila[0]: (fila[1], fila[2]) for fila in filas}
+    miembros = miembros_afectados(filas)
+    alumno_de = {inscripcion_id: alumno_id for inscripcion_id, (alumno_id, _) in inscripciones.items()}
+    deltas_por_alumno = defaultdict(lambda: defaultdict(int))
+    for inscripcion_id, delta in deltas_por_inscripcion.items():
+        alumno_id = alumno_de.get(inscripcion_id)
+        if alumno_id is None:
+            continue
+        for campo, valor in delta.items():
+            deltas_por_alumno[alumno_id][campo] += valor
+
+    with transaction.atomic():
+        antes = features_miembros(miembros)
+        _aplicar(InscripcionMetricas, 'inscripcion_id',
+                 {i: d for i, d in deltas_por_inscripcion.items() if i in alumno_de}, crear)
+        _aplicar(AlumnoMetricas, 'alumno_id', deltas_por_alumno, crear)
+        actualizar_percentiles(antes, features_miembros(miembros), crear)
+        incrementar_versiones_inscripciones(inscripciones.values())
+
+
+def aplicar_cambio(modelo, anteriores=None, nuevos=None):
+    """Registra el alta (solo `nuevos`), baja (solo `anteriores`) o
+    modificación de un registro."""
+    deltas = defaultdict(lambda: defaultdict(int))
+    if anteriores is not None:
+        _acumular(deltas, anteriores['inscripcion_id'], aporte(modelo, anteriores), -1)
+    if nuevos is not None:
+        _acumular(deltas, nuevos['inscripcion_id'], aporte(modelo, nuevos), 1)
+    aplicar_deltas(deltas, crear=nuevos is not None)
+
+
+def aplicar_altas(modelo, objs):
+    """Suma en bloque el aporte de los registros creados con bulk_create."""
+    deltas = defaultdict(lambda: defaultdict(int))
+    for obj in objs:
+        _acumular(deltas, obj.inscripcion_id, aporte(modelo, valores_registro(obj)), 1)
+    aplicar_deltas(deltas)
+
+
+# ==============================================================================
+# RECÁLCULO DESDE LOS REGISTROS
+# ==============================================================================
+
+def _contadores_por_inscripcion(inscripciones_ids):
+    contadores = defaultdict(lambda: dict.fromkeys(CONTADORES, 0))
+    consultas = [
+        (Nota, {'suma_calificaciones': Sum('calificacion'), 'num_notas': Count('id')}),
+        (Participacion, {'suma_participaciones': Sum('puntuacion'), 'num_participaciones': Count('id')}),
+        (Asistencia, {'total_asistencias': Count('id'), 'presentes': Count('id', filter=Q(estado='Presente'))}),
+    ]
+    for modelo, agregados in consultas:
+        filas = (
+            modelo.objects.filter(inscripcion_id__in=inscripciones_ids)
+            .values('inscripcion_id').annotate(**agregados).order_by()
+        )
+        for fila in filas:
+            inscripcion_id = fila.pop('inscripcion_id')
+            contadores[inscripcion_id].update({campo: valor or 0 for campo, valor in fila.items()})
+    return contadores
+
+
+def recalcular_alumnos(alumnos_ids):
+    """Recalcula AlumnoMetricas como la suma de las métricas de sus inscripciones."""
+    contadores = {alumno_id: dict.fromkeys(CONTADORES, 0) for alumno_id in alumnos_ids}
+    if not contadores:
+        return
+    filas = (
+        InscripcionMetricas.objects.filter(inscripcion__alumno_id__in=list(contadores))
+        .values('inscripcion__alumno_id')
+        .annotate(**{f'acumulado_{campo}': Sum(campo) for campo in CONTADORES})
+        .order_by()
+    )
+    for fila in filas:
+        contadores[fila['inscripcion__alumno_id']] = {campo: fila[f'acumulado_{campo}'] for campo in CONTADORES}
+    AlumnoMetricas.objects.bulk_create(
+        [AlumnoMetricas(alumno_id=alumno_id, **valores) for alumno_id, valores in contadores.items()],
+        update_conflicts=True, unique_fields=['alumno'], update_fields=CONTADORES,
+    )
+
+
+@transaction.atomic
+def recalcular_inscripciones(inscripciones_ids, incluir_alumnos=True, incluir_percentiles=True):
+    """Recalcula desde cero las métricas de las inscripciones indicadas (y, por
+    defecto, de sus alumnos y los percentiles de sus cursos). Se usa tras
+    operaciones masivas cuyo efecto sobre cada registro no se conoce
+    (update(), bulk_update(), bulk_create con conflictos) y al reconstruir las
+    tablas."""
+    from .percentiles import actualizar_percentiles, features_miembros, miembros_afectados
+
+    # Solo las inscripciones que siguen existiendo
+    filas = list(Inscripcion.objects.filter(
+        id__in=[i for i in inscripciones_ids if i is not None]
+    ).values_list('id', 'alumno_id', 'curso_id', 'anio_academico', 'estado_inscripcion'))
+    inscripciones = {fila[0]: (fila[1], fila[2]) for fila in filas}
+    if not inscripciones:
+        return
+    miembros = miembros_afectados(filas) if incluir_percentiles else set()
+    antes = features_miembros(miembros)
+    alumno_de = {inscripcion_id: alumno_id for inscripcion_id, (alumno_id, _) in inscripciones.items()}
+    contadores = _contadores_por_inscripcion(list(alumno_de))
+    InscripcionMetricas.objects.bulk_create(
+        [InscripcionMetricas(inscripcion_id=i, **contadores[i]) for i in alumno_de],
+        update_conflicts=True, unique_fields=['inscripcion'], update_fields=CONTADORES,
+    )
+    if incluir_alumnos:
+        recalcular_alumnos(set(alumno_de.values()))
+    actualizar_percentiles(antes, features_miembros(miembros))
+    incrementar_versiones_inscripciones(inscripciones.values())
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_escolar', '0002_alter_asistencia_estado_alter_nota_calificacion_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlumnoMetricas',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('suma_calificaciones', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('num_notas', models.IntegerField(default=0)),
+                ('suma_participaciones', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('num_participaciones', models.IntegerField(default=0)),
+                ('total_asistencias', models.IntegerField(default=0)),
+                ('presentes', models.IntegerField(default=0)),
+                ('alumno', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='metricas', to='gestion_escolar.alumno')),
+            ],
+            options={
+                'verbose_name': 'Métricas de Alumno',
+                'verbose_name_plural': 'Métricas de Alumnos',
+            },
+        ),
+        migrations.CreateModel(
+            name='InscripcionMetricas',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('suma_calificaciones', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('num_notas', models.IntegerField(default=0)),
+                ('suma_participaciones', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('num_participaciones', models.IntegerField(default=0)),
+                ('total_asistencias', models.IntegerField(default=0)),
+                ('presentes', models.IntegerField(default=0)),
+                ('inscripcion', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='metricas', to='gestion_escolar.inscripcion')),
+            ],
+            options={
+                'verbose_name': 'Métricas de Inscripción',
+                'verbose_name_plural': 'Métricas de Inscripciones',
+            },
+        ),
+    ]
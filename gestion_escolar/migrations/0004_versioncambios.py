@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_escolar', '0003_alumnometricas_inscripcionmetricas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionCambios',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=100, unique=True)),
+                ('version', models.BigIntegerField(default=0)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Versión de Cambios',
+                'verbose_name_plural': 'Versiones de Cambios',
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_escolar', '0004_versioncambios'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrediccionAlumno',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('anio_academico', models.IntegerField()),
+                ('asistencia', models.IntegerField()),
+                ('participaciones', models.FloatField()),
+                ('evaluaciones', models.FloatField()),
+                ('nota_final_predicha', models.FloatField()),
+                ('rendimiento_predicho', models.CharField(max_length=50)),
+                ('recomendaciones', models.JSONField(default=list)),
+                ('version_modelo', models.CharField(max_length=100)),
+                ('version_datos', models.BigIntegerField()),
+                ('calculado', models.DateTimeField()),
+                ('alumno', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='gestion_escolar.alumno')),
+                ('curso', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='gestion_escolar.curso')),
+            ],
+            options={
+                'verbose_name': 'Predicción de Alumno',
+                'verbose_name_plural': 'Predicciones de Alumnos',
+                'indexes': [models.Index(fields=['curso', 'anio_academico'], name='gestion_esc_curso_i_5609e7_idx')],
+                'unique_together': {('alumno', 'curso', 'anio_academico')},
+            },
+        ),
+    ]
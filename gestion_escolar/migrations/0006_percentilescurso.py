@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_escolar', '0005_prediccionalumno'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PercentilesCurso',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('anio_academico', models.IntegerField()),
+                ('num_alumnos', models.IntegerField(default=0)),
+                ('histogramas', models.JSONField(default=dict)),
+                ('percentil_asistencia', models.FloatField(blank=True, null=True)),
+                ('percentil_participaciones', models.FloatField(blank=True, null=True)),
+                ('percentil_evaluaciones', models.FloatField(blank=True, null=True)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+                ('curso', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='gestion_escolar.curso')),
+            ],
+            options={
+                'verbose_name': 'Percentiles de Curso',
+                'verbose_name_plural': 'Percentiles de Cursos',
+                'unique_together': {('curso', 'anio_academico')},
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_escolar', '0006_percentilescurso'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='asistencia',
+            index=models.Index(fields=['inscripcion', 'fecha'], name='gestion_esc_inscrip_a7bff7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inscripcion',
+            index=models.Index(fields=['curso', 'anio_academico', 'periodo'], name='gestion_esc_curso_i_418135_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='nota',
+            index=models.Index(fields=['inscripcion', 'fecha_evaluacion'], name='gestion_esc_inscrip_e00827_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='nota',
+            index=models.Index(fields=['inscripcion', 'materia', 'fecha_evaluacion'], name='gestion_esc_inscrip_246eea_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='participacion',
+            index=models.Index(fields=['inscripcion', 'fecha'], name='gestion_esc_inscrip_15e337_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_escolar', '0007_indices_ventana'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='actividadproyecto',
+            index=models.Index(fields=['materia', 'fecha_entrega_limite'], name='gestion_esc_materia_96b4ae_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asignacioncursomateria',
+            index=models.Index(fields=['profesor', 'anio_academico'], name='gestion_esc_profeso_dcff4b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asignacioncursomateria',
+            index=models.Index(fields=['materia', 'anio_academico'], name='gestion_esc_materia_e8101f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asistencia',
+            index=models.Index(fields=['materia', 'fecha'], name='gestion_esc_materia_5a5f7e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inscripcion',
+            index=models.Index(fields=['anio_academico', 'estado_inscripcion'], name='gestion_esc_anio_ac_c0b83c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='nota',
+            index=models.Index(fields=['materia', 'fecha_evaluacion'], name='gestion_esc_materia_2d7cb9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='participacion',
+            index=models.Index(fields=['materia', 'fecha'], name='gestion_esc_materia_e57e9d_idx'),
+        ),
+    ]
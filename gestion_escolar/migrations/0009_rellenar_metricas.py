@@ -0,0 +1,79 @@
+from django.db import migrations
+from django.db.models import Count, Q, Sum
+
+# 0003 creó InscripcionMetricas y AlumnoMetricas vacías. Sin filas de métricas,
+# /api/mlmodel/ puntúa con features a 0 y la primera escritura de un registro
+# crea una fila con solo su aporte. Aquí se calculan desde Nota, Participacion y
+# Asistencia (lo mismo que 'manage.py recalcular_metricas', con los modelos
+# históricos). Los histogramas de PercentilesCurso guardados hasta ahora salían
+# de esas métricas vacías: se borran y cada curso y año se reconstruye con la
+# siguiente escritura (mientras tanto se usan los percentiles exactos).
+
+CONTADORES = [
+    'suma_calificaciones', 'num_notas', 'suma_participaciones',
+    'num_participaciones', 'total_asistencias', 'presentes',
+]
+TAMANIO_LOTE = 2000
+
+
+def rellenar_metricas(apps, schema_editor):
+    Alumno = apps.get_model('gestion_escolar', 'Alumno')
+    Inscripcion = apps.get_model('gestion_escolar', 'Inscripcion')
+    InscripcionMetricas = apps.get_model('gestion_escolar', 'InscripcionMetricas')
+    AlumnoMetricas = apps.get_model('gestion_escolar', 'AlumnoMetricas')
+    PercentilesCurso = apps.get_model('gestion_escolar', 'PercentilesCurso')
+    consultas = [
+        (apps.get_model('gestion_escolar', 'Nota'),
+         {'suma_calificaciones': Sum('calificacion'), 'num_notas': Count('id')}),
+        (apps.get_model('gestion_escolar', 'Participacion'),
+         {'suma_participaciones': Sum('puntuacion'), 'num_participaciones': Count('id')}),
+        (apps.get_model('gestion_escolar', 'Asistencia'),
+         {'total_asistencias': Count('id'), 'presentes': Count('id', filter=Q(estado='Presente'))}),
+    ]
+
+    inscripciones_ids = list(Inscripcion.objects.order_by('id').values_list('id', flat=True))
+    for inicio in range(0, len(inscripciones_ids), TAMANIO_LOTE):
+        lote = inscripciones_ids[inicio:inicio + TAMANIO_LOTE]
+        contadores = {inscripcion_id: dict.fromkeys(CONTADORES, 0) for inscripcion_id in lote}
+        for modelo, agregados in consultas:
+            filas = (
+                modelo.objects.filter(inscripcion_id__in=lote)
+                .values('inscripcion_id').annotate(**agregados).order_by()
+            )
+            for fila in filas:
+                inscripcion_id = fila.pop('inscripcion_id')
+                contadores[inscripcion_id].update({campo: valor or 0 for campo, valor in fila.items()})
+        InscripcionMetricas.objects.bulk_create(
+            [InscripcionMetricas(inscripcion_id=i, **valores) for i, valores in contadores.items()],
+            update_conflicts=True, unique_fields=['inscripcion'], update_fields=CONTADORES,
+        )
+
+    alumnos_ids = list(Alumno.objects.order_by('id').values_list('id', flat=True))
+    for inicio in range(0, len(alumnos_ids), TAMANIO_LOTE):
+        lote = alumnos_ids[inicio:inicio + TAMANIO_LOTE]
+        contadores = {alumno_id: dict.fromkeys(CONTADORES, 0) for alumno_id in lote}
+        filas = (
+            InscripcionMetricas.objects.filter(inscripcion__alumno_id__in=lote)
+            .values('inscripcion__alumno_id')
+            .annotate(**{f'acumulado_{campo}': Sum(campo) for campo in CONTADORES})
+            .order_by()
+        )
+        for fila in filas:
+            contadores[fila['inscripcion__alumno_id']] = {campo: fila[f'acumulado_{campo}'] for campo in CONTADORES}
+        AlumnoMetricas.objects.bulk_create(
+            [AlumnoMetricas(alumno_id=alumno_id, **valores) for alumno_id, valores in contadores.items()],
+            update_conflicts=True, unique_fields=['alumno'], update_fields=CONTADORES,
+        )
+
+    PercentilesCurso.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_escolar', '0008_indices_filtros'),
+    ]
+
+    operations = [
+        migrations.RunPython(rellenar_metricas, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,58 @@
 # gestion_escolar/models.py
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator, MaxValueValidator
 
+# --- Versión de cada tabla (GET condicional y cachés) ---
+
+class VersionadoQuerySet(models.QuerySet):
+    """QuerySet de los modelos que expone la API: hace avanzar la versión de
+    la tabla (versiones.clave_tabla) en las operaciones masivas, que no
+    disparan post_save/post_delete. Los cambios de una instancia los versiona
+    signals.versionar_tabla."""
+
+    def _versionar(self):
+        from .versiones import incrementar_versiones_tablas
+        incrementar_versiones_tablas([self.model])
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        if objs:
+            self._versionar()
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        filas = super().bulk_update(objs, fields, *args, **kwargs)
+        if filas:
+            self._versionar()
+        return filas
+
+    def update(self, **kwargs):
+        filas = super().update(**kwargs)
+        if filas:
+            self._versionar()
+        return filas
+
+class AlumnoQuerySet(VersionadoQuerySet):
+    """El nombre del alumno sale en los resultados de /api/mlmodel/: update()
+    y bulk_update() hacen avanzar su versión y la de sus cursos, igual que
+    save() (signals.versionar_alumno)."""
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        from .versiones import incrementar_versiones_alumnos
+        objs = list(objs)
+        filas = super().bulk_update(objs, fields, *args, **kwargs)
+        if filas:
+            incrementar_versiones_alumnos(obj.pk for obj in objs)
+        return filas
+
+    def update(self, **kwargs):
+        from .versiones import incrementar_versiones_alumnos
+        alumnos_ids = list(self.values_list('pk', flat=True))
+        filas = super().update(**kwargs)
+        if filas:
+            incrementar_versiones_alumnos(alumnos_ids)
+        return filas
+
 # --- Entidades Base ---
 
 class Alumno(models.Model):
@@ -23,6 +74,8 @@ class Alumno(models.Model):
     nacionalidad = models.CharField(max_length=50, null=True, blank=True)
     foto_perfil_url = models.URLField(max_length=255, null=True, blank=True)
 
+    objects = AlumnoQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.nombre} {self.apellido}"
 
@@ -37,6 +90,8 @@ class Profesor(models.Model):
     titulo_academico = models.CharField(max_length=100, null=True, blank=True)
     # departamento_id necesitaría una tabla Departamentos primero, lo omitimos por ahora
 
+    objects = VersionadoQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.nombre} {self.apellido}"
 
@@ -52,6 +107,8 @@ class Curso(models.Model):
     nivel_educativo = models.CharField(max_length=50, choices=NIVEL_EDUCATIVO_CHOICES, null=True, blank=True)
     activo = models.BooleanField(default=True, null=False)
 
+    objects = VersionadoQuerySet.as_manager()
+
     def __str__(self):
         return self.nombre_curso
 
@@ -61,6 +118,8 @@ class Materia(models.Model):
     codigo_materia = models.CharField(max_length=20, unique=True, null=True, blank=True)
     creditos = models.DecimalField(max_digits=3, decimal_places=1, null=True, blank=True)
 
+    objects = VersionadoQuerySet.as_manager()
+
     def __str__(self):
         return self.nombre_materia
 
@@ -85,14 +144,58 @@ class AsignacionCursoMateria(models.Model):
     # aula = models.ForeignKey(Aula, on_delete=models.SET_NULL, null=True, blank=True)
     # horario = models.CharField(max_length=255, null=True, blank=True)
 
+    objects = VersionadoQuerySet.as_manager()
+
     class Meta:
         unique_together = (('curso', 'materia', 'profesor', 'anio_academico', 'periodo'),)
+        # Filtros ?profesor= y ?materia= con ?anio_academico= de /api/asignaciones/
+        indexes = [
+            models.Index(fields=['profesor', 'anio_academico']),
+            models.Index(fields=['materia', 'anio_academico']),
+        ]
         verbose_name = "Asignación de Curso y Materia"
         verbose_name_plural = "Asignaciones de Cursos y Materias"
 
     def __str__(self):
         return f"{self.curso.nombre_curso} - {self.materia.nombre_materia} ({self.anio_academico} {self.periodo})"
 
+class InscripcionQuerySet(VersionadoQuerySet):
+    """Las operaciones masivas cambian qué alumnos pertenecen a cada curso y
+    año, igual que save() y delete() (signals.versionar_inscripcion): hacen
+    avanzar las versiones de los alumnos y cursos afectados, antes y después
+    del cambio, y reconstruyen los percentiles de sus cursos y años (solo
+    cuentan las inscripciones activas)."""
+
+    def _grupos(self, pks=None):
+        filas = self if pks is None else self.model.objects.filter(pk__in=pks)
+        return {fila[0]: fila[1:] for fila in filas.values_list('pk', 'alumno_id', 'curso_id', 'anio_academico')}
+
+    def _versionar_grupos(self, afectadas):
+        from .percentiles import reconstruir_percentiles
+        from .versiones import incrementar_versiones_inscripciones
+        incrementar_versiones_inscripciones({(alumno_id, curso_id) for alumno_id, curso_id, _ in afectadas})
+        reconstruir_percentiles({(curso_id, anio) for _, curso_id, anio in afectadas})
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        self._versionar_grupos({(obj.alumno_id, obj.curso_id, obj.anio_academico) for obj in objs})
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        antes = self._grupos([obj.pk for obj in objs])
+        filas = super().bulk_update(objs, fields, *args, **kwargs)
+        if filas:
+            self._versionar_grupos({*antes.values(), *self._grupos(antes).values()})
+        return filas
+
+    def update(self, **kwargs):
+        antes = self._grupos()
+        filas = super().update(**kwargs)
+        if filas:
+            self._versionar_grupos({*antes.values(), *self._grupos(antes).values()})
+        return filas
+
 class Inscripcion(models.Model):
     alumno = models.ForeignKey(Alumno, on_delete=models.CASCADE, null=False)
     curso = models.ForeignKey(Curso, on_delete=models.CASCADE, null=False)
@@ -110,14 +213,87 @@ class Inscripcion(models.Model):
     # Propuesta adicional
     fecha_baja = models.DateField(null=True, blank=True)
 
+    objects = InscripcionQuerySet.as_manager()
+
     class Meta:
         unique_together = (('alumno', 'curso', 'anio_academico', 'periodo'),)
+        # Inscripciones de un curso por año y periodo (features por ventana) y
+        # de un año por estado (?anio_academico=&estado= de /api/inscripciones/)
+        indexes = [
+            models.Index(fields=['curso', 'anio_academico', 'periodo']),
+            models.Index(fields=['anio_academico', 'estado_inscripcion']),
+        ]
         verbose_name = "Inscripción"
         verbose_name_plural = "Inscripciones"
 
     def __str__(self):
         return f"{self.alumno.nombre} en {self.curso.nombre_curso} ({self.anio_academico} {self.periodo})"
 
+class RegistroAcademicoQuerySet(VersionadoQuerySet):
+    """QuerySet de Nota, Asistencia y Participacion que mantiene al día las
+    tablas de métricas también en las operaciones masivas, que no disparan
+    las señales post_save/post_delete."""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        from .metricas import aplicar_altas, recalcular_inscripciones
+        objs = super().bulk_create(objs, *args, **kwargs)
+        if kwargs.get('ignore_conflicts') or kwargs.get('update_conflicts'):
+            # No sabemos qué filas se insertaron realmente: se recalculan
+            recalcular_inscripciones({obj.inscripcion_id for obj in objs})
+        else:
+            aplicar_altas(self.model, objs)
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        from .metricas import campos_metricas, recalcular_inscripciones
+        objs = list(objs)
+        afectadas = set()
+        if campos_metricas(self.model) & set(fields):
+            afectadas = set(self.model.objects.filter(pk__in=[obj.pk for obj in objs]).values_list('inscripcion_id', flat=True))
+        filas = super().bulk_update(objs, fields, *args, **kwargs)
+        if afectadas:
+            recalcular_inscripciones(afectadas | {obj.inscripcion_id for obj in objs})
+        return filas
+
+    def update(self, **kwargs):
+        from .metricas import campos_metricas, recalcular_inscripciones
+        afectadas = set()
+        if campos_metricas(self.model) & set(kwargs):
+            afectadas = set(self.values_list('inscripcion_id', flat=True).distinct())
+        filas = super().update(**kwargs)
+        if afectadas:
+            nueva = kwargs.get('inscripcion_id', kwargs.get('inscripcion'))
+            if nueva is not None:
+                afectadas.add(getattr(nueva, 'pk', nueva))
+            recalcular_inscripciones(afectadas)
+        return filas
+
+    def delete(self):
+        from .metricas import recalcular_inscripciones
+        if self.query.is_sliced:
+            raise TypeError("Cannot use 'limit' or 'offset' with delete().")
+        # Ningún modelo apunta a Nota, Asistencia o Participacion: se borran
+        # con un solo DELETE, sin las señales post_delete fila a fila, y se
+        # recalculan las métricas de las inscripciones afectadas.
+        #
+        # QuerySet.delete() solo borra así (Collector.can_fast_delete) si el
+        # modelo no tiene receptores de pre_delete/post_delete, y estos los
+        # tienen (signals.py): cargaría cada fila para enviar su señal.
+        # _raw_delete es privado, pero es el que usa el propio Collector para
+        # ese borrado directo; CosteEscrituraTests.test_delete_masivo falla si
+        # deja de existir o de hacer un solo DELETE al actualizar Django.
+        afectadas = set(self.values_list('inscripcion_id', flat=True).distinct())
+        borrar = self._chain()
+        borrar.query.select_related = False
+        borrar.query.clear_ordering(force=True)
+        with transaction.atomic(using=self.db):
+            filas = borrar._raw_delete(borrar.db)
+            recalcular_inscripciones(afectadas)
+            if filas:
+                self._versionar()
+        return filas, {self.model._meta.label: filas}
+    delete.alters_data = True
+
 class   Nota(models.Model):
     inscripcion = models.ForeignKey(Inscripcion, on_delete=models.CASCADE, null=False)
     materia = models.ForeignKey(Materia, on_delete=models.CASCADE, null=False)
@@ -143,6 +319,18 @@ class   Nota(models.Model):
     profesor = models.ForeignKey(Profesor, on_delete=models.CASCADE, null=False)
     comentarios_profesor = models.TextField(null=True, blank=True)
 
+    objects = RegistroAcademicoQuerySet.as_manager()
+
+    class Meta:
+        # Recorridos por rango de fechas dentro de cada inscripción, con o sin
+        # materia (features por ventana en prediccion.py y ?inscripcion=&materia=
+        # de /api/notas/), y por materia y fechas (?materia=&fecha__gte=)
+        indexes = [
+            models.Index(fields=['inscripcion', 'fecha_evaluacion']),
+            models.Index(fields=['inscripcion', 'materia', 'fecha_evaluacion']),
+            models.Index(fields=['materia', 'fecha_evaluacion']),
+        ]
+
     def __str__(self):
         return f"Nota de {self.inscripcion.alumno.nombre} en {self.materia.nombre_materia}: {self.calificacion}"
 
@@ -160,8 +348,12 @@ class Asistencia(models.Model):
     observaciones = models.TextField(null=True, blank=True)
     profesor = models.ForeignKey(Profesor, on_delete=models.CASCADE, null=True, blank=True) # Profesor que tomó la asistencia
 
+    objects = RegistroAcademicoQuerySet.as_manager()
+
     class Meta:
+        # unique_together ya indexa (inscripcion, materia, fecha)
         unique_together = (('inscripcion', 'materia', 'fecha'),)
+        indexes = [models.Index(fields=['inscripcion', 'fecha']), models.Index(fields=['materia', 'fecha'])]
         verbose_name = "Asistencia"
         verbose_name_plural = "Asistencias"
 
@@ -185,6 +377,12 @@ class ActividadProyecto(models.Model):
     tipo_actividad = models.CharField(max_length=50, choices=TIPO_ACTIVIDAD_CHOICES, null=False)
     profesor = models.ForeignKey(Profesor, on_delete=models.CASCADE, null=False)
 
+    objects = VersionadoQuerySet.as_manager()
+
+    class Meta:
+        # ?materia=&fecha__gte= de /api/actividades/
+        indexes = [models.Index(fields=['materia', 'fecha_entrega_limite'])]
+
     def __str__(self):
         return f"{self.titulo} para {self.materia.nombre_materia} (Max: {self.max_puntuacion})"
 
@@ -203,6 +401,8 @@ class EntregaActividad(models.Model):
     ]
     estado_entrega = models.CharField(max_length=50, choices=ESTADO_ENTREGA_CHOICES, default='Entregado', null=False)
 
+    objects = VersionadoQuerySet.as_manager()
+
     class Meta:
         unique_together = (('actividad', 'alumno'),)
         verbose_name = "Entrega de Actividad"
@@ -226,14 +426,117 @@ class Participacion(models.Model):
     comentarios = models.TextField(null=True, blank=True)
     profesor = models.ForeignKey(Profesor, on_delete=models.CASCADE, null=False)
 
+    objects = RegistroAcademicoQuerySet.as_manager()
+
     class Meta:
+        # unique_together ya indexa (inscripcion, materia, fecha, ...)
         unique_together = (('inscripcion', 'materia', 'fecha', 'profesor'),)
+        indexes = [models.Index(fields=['inscripcion', 'fecha']), models.Index(fields=['materia', 'fecha'])]
         verbose_name = "Participación"
         verbose_name_plural = "Participaciones"
 
     def __str__(self):
         return f"Participación de {self.inscripcion.alumno.nombre} en {self.materia.nombre_materia} el {self.fecha}: {self.puntuacion}"
 
+# --- Métricas Agregadas (features de los modelos de ML) ---
+# Sumas y conteos acumulados de Nota, Participacion y Asistencia. Se mantienen
+# de forma incremental (ver gestion_escolar/metricas.py) y se pueden
+# reconstruir con 'python manage.py recalcular_metricas'.
+
+class MetricasBase(models.Model):
+    suma_calificaciones = models.DecimalField(max_digits=14, decimal_places=2, default=0, null=False)
+    num_notas = models.IntegerField(default=0, null=False)
+    suma_participaciones = models.DecimalField(max_digits=12, decimal_places=2, default=0, null=False)
+    num_participaciones = models.IntegerField(default=0, null=False)
+    total_asistencias = models.IntegerField(default=0, null=False)
+    presentes = models.IntegerField(default=0, null=False)
+
+    class Meta:
+        abstract = True
+
+class InscripcionMetricas(MetricasBase):
+    inscripcion = models.OneToOneField(Inscripcion, on_delete=models.CASCADE, related_name='metricas', null=False)
+
+    class Meta:
+        verbose_name = "Métricas de Inscripción"
+        verbose_name_plural = "Métricas de Inscripciones"
+
+    def __str__(self):
+        return f"Métricas de la inscripción {self.inscripcion_id}"
+
+class AlumnoMetricas(MetricasBase):
+    alumno = models.OneToOneField(Alumno, on_delete=models.CASCADE, related_name='metricas', null=False)
+
+    class Meta:
+        verbose_name = "Métricas de Alumno"
+        verbose_name_plural = "Métricas de Alumnos"
+
+    def __str__(self):
+        return f"Métricas del alumno {self.alumno_id}"
+
+class VersionCambios(models.Model):
+    # Contador que avanza cada vez que cambian los datos identificados por
+    # 'clave' (p. ej. 'curso:3' o 'alumno:17'). Lo usan las cachés para saber
+    # si un resultado guardado sigue siendo válido.
+    clave = models.CharField(max_length=100, unique=True, null=False)
+    version = models.BigIntegerField(default=0, null=False)
+    actualizado = models.DateTimeField(auto_now=True, null=False)
+
+    class Meta:
+        verbose_name = "Versión de Cambios"
+        verbose_name_plural = "Versiones de Cambios"
+
+    def __str__(self):
+        return f"{self.clave} v{self.version}"
+
+class PercentilesCurso(models.Model):
+    # Histograma de las features de los alumnos con inscripción activa en un
+    # curso y año (ver gestion_escolar/percentiles.py) y el percentil 25 de
+    # cada feature ya calculado a partir de él.
+    curso = models.ForeignKey(Curso, on_delete=models.CASCADE, null=False)
+    anio_academico = models.IntegerField(null=False)
+    num_alumnos = models.IntegerField(default=0, null=False)
+    histogramas = models.JSONField(default=dict, null=False)
+    percentil_asistencia = models.FloatField(null=True, blank=True)
+    percentil_participaciones = models.FloatField(null=True, blank=True)
+    percentil_evaluaciones = models.FloatField(null=True, blank=True)
+    actualizado = models.DateTimeField(auto_now=True, null=False)
+
+    class Meta:
+        unique_together = (('curso', 'anio_academico'),)
+        verbose_name = "Percentiles de Curso"
+        verbose_name_plural = "Percentiles de Cursos"
+
+    def __str__(self):
+        return f"Percentiles del curso {self.curso_id} ({self.anio_academico})"
+
+class PrediccionAlumno(models.Model):
+    # Resultado de /api/mlmodel/ para un alumno en un curso y año, calculado en
+    # lote por 'python manage.py calcular_predicciones'. version_datos es la
+    # versión del curso (VersionCambios) leída antes de calcular: si ya no es
+    # la actual, la fila está desactualizada.
+    alumno = models.ForeignKey(Alumno, on_delete=models.CASCADE, null=False)
+    curso = models.ForeignKey(Curso, on_delete=models.CASCADE, null=False)
+    anio_academico = models.IntegerField(null=False)
+    asistencia = models.IntegerField(null=False)
+    participaciones = models.FloatField(null=False)
+    evaluaciones = models.FloatField(null=False)
+    nota_final_predicha = models.FloatField(null=False)
+    rendimiento_predicho = models.CharField(max_length=50, null=False)
+    recomendaciones = models.JSONField(default=list, null=False)
+    version_modelo = models.CharField(max_length=100, null=False)
+    version_datos = models.BigIntegerField(null=False)
+    calculado = models.DateTimeField(null=False)
+
+    class Meta:
+        unique_together = (('alumno', 'curso', 'anio_academico'),)
+        indexes = [models.Index(fields=['curso', 'anio_academico'])]
+        verbose_name = "Predicción de Alumno"
+        verbose_name_plural = "Predicciones de Alumnos"
+
+    def __str__(self):
+        return f"Predicción del alumno {self.alumno_id} en el curso {self.curso_id} ({self.anio_academico})"
+
 # --- Gestión de Usuarios y Tutores ---
 
 class Tutor(models.Model):
@@ -253,6 +556,8 @@ class Tutor(models.Model):
     ]
     preferencia_contacto = models.CharField(max_length=50, choices=PREFERENCIA_CONTACTO_CHOICES, null=True, blank=True)
 
+    objects = VersionadoQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.nombre} {self.apellido} (Tutor)"
 
@@ -272,6 +577,8 @@ class AlumnoTutor(models.Model):
     relacion = models.CharField(max_length=50, choices=RELACION_CHOICES, null=False)
     es_contacto_principal = models.BooleanField(default=False, null=False)
 
+    objects = VersionadoQuerySet.as_manager()
+
     class Meta:
         unique_together = (('alumno', 'tutor', 'relacion'),)
         # Esto es más complejo en Django sin raw SQL. Para asegurar un solo contacto principal por alumno
@@ -303,6 +610,8 @@ class Usuario(models.Model):
     profesor = models.OneToOneField(Profesor, on_delete=models.CASCADE, null=True, blank=True)
     tutor = models.OneToOneField(Tutor, on_delete=models.CASCADE, null=True, blank=True)
 
+    objects = VersionadoQuerySet.as_manager()
+
     # Validación a nivel de modelo para asegurar que solo una FK esté seteada según el rol
     def clean(self):
         related_fields = [self.alumno, self.profesor, self.tutor]
@@ -0,0 +1,24 @@
+# gestion_escolar/paginacion.py
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class PaginacionCursor(CursorPagination):
+    """Paginación por cursor (keyset) para los ViewSets del router.
+
+    Cada página es 'WHERE id > <último id> ORDER BY id LIMIT n' sobre la clave
+    primaria: una página profunda cuesta lo mismo que la primera, sin OFFSET
+    ni COUNT(*). La respuesta trae 'next' y 'previous' (URLs con ?cursor=) y
+    'results'. El tamaño se elige con ?tamanio_pagina=, hasta
+    API_TAMANIO_PAGINA_MAXIMO."""
+    ordering = 'id'
+    page_size = settings.API_TAMANIO_PAGINA
+    page_size_query_param = 'tamanio_pagina'
+    max_page_size = settings.API_TAMANIO_PAGINA_MAXIMO
+
+    def _get_position_from_instance(self, instance, ordering):
+        # Filas de values_list() de la lectura rápida (lectura.py): el id va
+        # en la primera columna
+        if isinstance(instance, tuple):
+            return str(instance[0])
+        return super()._get_position_from_instance(instance, ordering)
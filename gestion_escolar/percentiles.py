@@ -0,0 +1,219 @@
+# gestion_escolar/percentiles.py
+import numpy as np
+from django.db import transaction
+from django.db.models import Q, Sum
+
+from modelo import COLUMNAS_FEATURES
+
+from .metricas import CONTADORES, features_desde_contadores
+from .models import Inscripcion, PercentilesCurso
+
+# ==============================================================================
+# PERCENTILES POR CURSO Y AÑO (recomendaciones de /api/mlmodel/)
+# ==============================================================================
+# Por cada curso y año se guarda un histograma de las tres features de sus
+# alumnos (inscripciones activas) y el percentil 25 de cada una. Las tres
+# features están acotadas en [0, 100], así que en lugar de un t-digest o un
+# KLL se usa un histograma de cubetas fijas de 0.1: a diferencia de esos
+# sketches admite quitar valores, que es lo que hace falta cuando cambian las
+# métricas de un alumno (se quita su valor anterior y se añade el nuevo).
+#
+# Cota de error: cada valor se redondea al múltiplo de 0.1 más cercano y el
+# percentil se interpola igual que pandas/NumPy (método lineal) sobre los
+# valores redondeados. Como el redondeo no cambia el orden y la interpolación
+# es una media ponderada de dos valores, el percentil difiere del exacto en
+# como mucho ERROR_MAXIMO = 0.05. La asistencia es un entero: su percentil es
+# exacto. Valores fuera de [0, 100] se acumulan en la cubeta del extremo.
+#
+# Los histogramas se actualizan junto con InscripcionMetricas (ver
+# metricas.aplicar_deltas) y se reconstruyen con
+# 'python manage.py reconstruir_percentiles'.
+
+RESOLUCION = 10  # cubetas por unidad
+NUM_CUBETAS = 100 * RESOLUCION + 1
+CUANTIL = 0.25
+ERROR_MAXIMO = 0.5 / RESOLUCION
+
+
+def cubetas(valores):
+    return np.clip(np.rint(np.asarray(valores, dtype=np.float64) * RESOLUCION), 0, NUM_CUBETAS - 1).astype(np.int64)
+
+
+def cuantil_histograma(conteos, q=CUANTIL):
+    """Cuantil q de los valores de un histograma, con la misma interpolación
+    lineal que Series.quantile. None si el histograma está vacío."""
+    n = int(conteos.sum())
+    if n == 0:
+        return None
+    posicion = q * (n - 1)
+    k = int(np.floor(posicion))
+    fraccion = posicion - k
+    acumulado = np.cumsum(conteos)
+    # Valor del elemento k (base 0) en orden: primera cubeta cuyo acumulado supera k
+    inferior = np.searchsorted(acumulado, k + 1) / RESOLUCION
+    if fraccion == 0:
+        return float(inferior)
+    superior = np.searchsorted(acumulado, k + 2) / RESOLUCION
+    return float(inferior + fraccion * (superior - inferior))
+
+
+def _histogramas_vacios():
+    return {columna: np.zeros(NUM_CUBETAS, dtype=np.int64) for columna in COLUMNAS_FEATURES}
+
+
+def _cargar_histogramas(guardados):
+    histogramas = _histogramas_vacios()
+    for columna, conteos in guardados.items():
+        for cubeta, conteo in conteos.items():
+            histogramas[columna][int(cubeta)] = conteo
+    return histogramas
+
+
+def _serializar_histogramas(histogramas):
+    # Solo las cubetas no vacías
+    return {
+        columna: {str(cubeta): int(conteos[cubeta]) for cubeta in np.flatnonzero(conteos)}
+        for columna, conteos in histogramas.items()
+    }
+
+
+def _asignar(fila, histogramas):
+    fila.histogramas = _serializar_histogramas(histogramas)
+    fila.num_alumnos = int(histogramas[COLUMNAS_FEATURES[0]].sum())
+    for columna in COLUMNAS_FEATURES:
+        setattr(fila, f'percentil_{columna}', cuantil_histograma(histogramas[columna]))
+
+
+# --- Features de los alumnos de cada grupo ---
+
+def miembros_afectados(inscripciones):
+    """(alumno_id, curso_id, anio_academico) de las inscripciones activas entre
+    las filas (id, alumno_id, curso_id, anio_academico, estado_inscripcion)."""
+    return {
+        (alumno_id, curso_id, anio_academico)
+        for _, alumno_id, curso_id, anio_academico, estado in inscripciones
+        if estado == 'Activa'
+    }
+
+
+def _features(filtro):
+    # Las métricas de todas las inscripciones activas del alumno en el curso y
+    # año (una por periodo) se suman, igual que en prediccion.metricas_alumnos
+    filas = (
+        Inscripcion.objects.filter(filtro, estado_inscripcion='Activa')
+        .values('alumno_id', 'curso_id', 'anio_academico')
+        .annotate(**{campo: Sum(f'metricas__{campo}') for campo in CONTADORES})
+        .order_by()
+    )
+    return {
+        (fila['alumno_id'], fila['curso_id'], fila['anio_academico']): features_desde_contadores(fila)
+        for fila in filas
+    }
+
+
+def features_miembros(miembros):
+    """{(alumno_id, curso_id, anio): features} de los miembros indicados que
+    siguen teniendo una inscripción activa en ese curso y año."""
+    if not miembros:
+        return {}
+    alumnos, cursos, anios = (set(valores) for valores in zip(*miembros))
+    features = _features(Q(alumno_id__in=alumnos, curso_id__in=cursos, anio_academico__in=anios))
+    return {miembro: valores for miembro, valores in features.items() if miembro in miembros}
+
+
+# --- Mantenimiento ---
+
+def actualizar_percentiles(antes, despues, crear=True):
+    """Mueve en el histograma de su curso y año a cada alumno cuyas features
+    pasaron de `antes` a `despues` (ambos de features_miembros).
+
+    Un grupo sin histograma guardado se reconstruye entero (solo con
+    crear=True: con bajas en cascada el curso puede estar borrándose)."""
+    grupos = {(curso_id, anio) for _, curso_id, anio in antes.keys() | despues.keys()}
+    if not grupos:
+        return
+    with transaction.atomic():
+        cursos, anios = (set(valores) for valores in zip(*grupos))
+        guardados = {
+            (fila.curso_id, fila.anio_academico): fila
+            for fila in PercentilesCurso.objects.select_for_update().filter(
+                curso_id__in=cursos, anio_academico__in=anios
+            )
+        }
+        sin_histograma = set()
+        for grupo in grupos:
+            fila = guardados.get(grupo)
+            if fila is None:
+                if crear:
+                    sin_histograma.add(grupo)
+                continue
+            histogramas = _cargar_histogramas(fila.histogramas)
+            for signo, features in ((-1, antes), (1, despues)):
+                for (_, curso_id, anio), valores in features.items():
+                    if (curso_id, anio) != grupo:
+                        continue
+                    for columna in COLUMNAS_FEATURES:
+                        histogramas[columna][cubetas(valores[columna])] += signo
+            for conteos in histogramas.values():
+                np.maximum(conteos, 0, out=conteos)
+            _asignar(fila, histogramas)
+            fila.save()
+        reconstruir_percentiles(sin_histograma)
+
+
+def reconstruir_percentiles(grupos=None):
+    """Recalcula desde las métricas el histograma de cada (curso_id, anio) de
+    `grupos`, o de todos si es None. Los grupos sin alumnos se eliminan."""
+    if grupos is not None:
+        grupos = set(grupos)
+        if not grupos:
+            return
+        cursos, anios = (set(valores) for valores in zip(*grupos))
+        features = _features(Q(curso_id__in=cursos, anio_academico__in=anios))
+        existentes = PercentilesCurso.objects.filter(curso_id__in=cursos, anio_academico__in=anios)
+    else:
+        features = _features(Q())
+        existentes = PercentilesCurso.objects.all()
+
+    valores_por_grupo = {}
+    for (_, curso_id, anio), valores in features.items():
+        if grupos is None or (curso_id, anio) in grupos:
+            valores_por_grupo.setdefault((curso_id, anio), []).append(valores)
+
+    filas = []
+    for (curso_id, anio), valores in valores_por_grupo.items():
+        histogramas = _histogramas_vacios()
+        for columna in COLUMNAS_FEATURES:
+            histogramas[columna] += np.bincount(
+                cubetas([v[columna] for v in valores]), minlength=NUM_CUBETAS
+            )
+        fila = PercentilesCurso(curso_id=curso_id, anio_academico=anio)
+        _asignar(fila, histogramas)
+        filas.append(fila)
+
+    with transaction.atomic():
+        vacios = [
+            fila.pk for fila in existentes
+            if (grupos is None or (fila.curso_id, fila.anio_academico) in grupos)
+            and (fila.curso_id, fila.anio_academico) not in valores_por_grupo
+        ]
+        PercentilesCurso.objects.filter(pk__in=vacios).delete()
+        PercentilesCurso.objects.bulk_create(
+            filas, update_conflicts=True, unique_fields=['curso', 'anio_academico'],
+            update_fields=['num_alumnos', 'histogramas', *(f'percentil_{c}' for c in COLUMNAS_FEATURES), 'actualizado'],
+            batch_size=500,
+        )
+    return len(filas)
+
+
+# --- Consulta ---
+
+def percentiles_curso(curso_id, anio_academico):
+    """Percentil 25 de cada feature del curso y año (una consulta por clave
+    indexada), o None si no hay histograma."""
+    fila = PercentilesCurso.objects.filter(
+        curso_id=curso_id, anio_academico=anio_academico
+    ).values(*(f'percentil_{columna}' for columna in COLUMNAS_FEATURES)).first()
+    if fila is None or fila[f'percentil_{COLUMNAS_FEATURES[0]}'] is None:
+        return None
+    return {columna: fila[f'percentil_{columna}'] for columna in COLUMNAS_FEATURES}
@@ -0,0 +1,409 @@
+# gestion_escolar/prediccion.py
+from django.db.models import Avg, Count, F, FloatField, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+import pandas as pd
+from django.conf import settings
+
+from modelo import COLUMNAS_FEATURES, predecir_escenarios, predecir_lote, generar_recomendaciones_lote
+
+from .models import Alumno, Inscripcion, Nota, Asistencia, Participacion, PrediccionAlumno
+from .metricas import CONTADORES, features_desde_contadores
+from .percentiles import percentiles_curso
+from .versiones import clave_curso, obtener_versiones
+
+
+# ==============================================================================
+# EXTRACCIÓN DE FEATURES PARA LOS MODELOS DE ML
+# ==============================================================================
+# Cada tabla (Nota, Participacion, Asistencia) se agrega por separado en su
+# propia subconsulta correlacionada por alumno. Así se evita el producto
+# cartesiano notas × participaciones × asistencias que generaba un único
+# annotate() con los tres joins a través de Inscripcion.
+
+def _agregado_por_alumno(modelo, filtro_inscripcion, agregado, output_field):
+    subconsulta = (
+        modelo.objects
+        .filter(inscripcion__alumno=OuterRef('pk'), **filtro_inscripcion)
+        .values('inscripcion__alumno')
+        .annotate(valor=agregado)
+        .values('valor')
+    )
+    return Coalesce(Subquery(subconsulta, output_field=output_field), Value(0), output_field=output_field)
+
+
+def alumnos_para_prediccion(curso_id=None, alumnos_ids=None):
+    """Devuelve (queryset de alumnos, filtro de inscripciones) para la petición.
+
+    Con curso_id solo se consideran las inscripciones de ese curso; con
+    alumnos_ids se consideran todas las inscripciones de cada alumno.
+    """
+    if alumnos_ids:
+        return Alumno.objects.filter(id__in=alumnos_ids), {}
+    alumnos = Alumno.objects.filter(
+        id__in=Inscripcion.objects.filter(curso_id=curso_id).values('alumno_id')
+    )
+    return alumnos, {'inscripcion__curso_id': curso_id}
+
+
+def metricas_alumnos_desde_registros(alumnos_queryset, filtro_inscripcion=None):
+    """Calcula asistencia (%), participación (0-100) y promedio de evaluaciones
+    por alumno agregando directamente Nota, Participacion y Asistencia.
+    Devuelve una lista de diccionarios ordenada por id de alumno."""
+    filtro_inscripcion = filtro_inscripcion or {}
+    alumnos_data = alumnos_queryset.annotate(
+        evaluaciones_avg=_agregado_por_alumno(
+            Nota, filtro_inscripcion, Avg('calificacion'), FloatField()
+        ),
+        participacion_avg_raw=_agregado_por_alumno(
+            Participacion, filtro_inscripcion, Avg('puntuacion'), FloatField()
+        ),
+        total_asistencias=_agregado_por_alumno(
+            Asistencia, filtro_inscripcion, Count('id'), IntegerField()
+        ),
+        presentes=_agregado_por_alumno(
+            Asistencia, filtro_inscripcion, Count('id', filter=Q(estado='Presente')), IntegerField()
+        ),
+    ).values(
+        'id', 'nombre', 'apellido', 'evaluaciones_avg',
+        'participacion_avg_raw', 'total_asistencias', 'presentes'
+    ).order_by('id')
+
+    metricas_grupo = []
+    for alumno in alumnos_data:
+        asistencia_pct = int((alumno['presentes'] / alumno['total_asistencias']) * 100) if alumno['total_asistencias'] > 0 else 0
+        metricas_grupo.append({
+            'id': alumno['id'],
+            'nombre': alumno['nombre'],
+            'apellido': alumno['apellido'],
+            'asistencia': asistencia_pct,
+            'participaciones': float(alumno['participacion_avg_raw']) * 10,
+            'evaluaciones': float(alumno['evaluaciones_avg'])
+        })
+    return metricas_grupo
+
+
+# ==============================================================================
+# LECTURA DESDE LAS TABLAS DE MÉTRICAS
+# ==============================================================================
+# InscripcionMetricas/AlumnoMetricas guardan sumas y conteos ya acumulados, así
+# que obtener las features de un grupo es una sola consulta por clave indexada.
+
+def _metricas_desde_contadores(fila):
+    return {
+        'id': fila['id'],
+        'nombre': fila['nombre'],
+        'apellido': fila['apellido'],
+        **features_desde_contadores(fila),
+    }
+
+
+def metricas_alumnos(curso_id=None, alumnos_ids=None, desde_id=None, limite=None, anio_academico=None,
+                     ventana=None):
+    """Igual que metricas_alumnos_desde_registros, pero leyendo las tablas de
+    métricas: AlumnoMetricas para alumnos_ids (todas sus inscripciones) o
+    InscripcionMetricas de las inscripciones del curso para curso_id.
+
+    Con anio_academico solo se suman las inscripciones activas de ese año y
+    con ventana['periodo'] solo las de ese periodo. Si la ventana fija una
+    materia o un rango de fechas las features salen de los registros (ver
+    metricas_alumnos_ventana). desde_id y limite devuelven solo los `limite`
+    primeros alumnos con id mayor que desde_id (ver
+    metricas_alumnos_por_bloques)."""
+    ventana = ventana or {}
+    if ventana_por_registros(ventana):
+        return metricas_alumnos_ventana(curso_id, alumnos_ids, anio_academico, ventana, desde_id, limite)
+    alumnos = Alumno.objects.all()
+    if desde_id is not None:
+        alumnos = alumnos.filter(id__gt=desde_id)
+    if alumnos_ids and anio_academico is None and not ventana.get('periodo'):
+        filas = alumnos.filter(id__in=alumnos_ids).values(
+            'id', 'nombre', 'apellido',
+            **{campo: F(f'metricas__{campo}') for campo in CONTADORES}
+        )
+    else:
+        if alumnos_ids:
+            alumnos = alumnos.filter(id__in=alumnos_ids)
+        filtro_inscripcion = filtro_inscripciones_grupo(curso_id, anio_academico, ventana.get('periodo'))
+        # El filtro sobre 'inscripcion' se aplica antes del annotate (y en un
+        # solo filter(), sobre la misma inscripción), así que solo se suman
+        # las métricas de las inscripciones que cumplen el filtro
+        filas = alumnos.filter(**filtro_inscripcion).values(
+            'id', 'nombre', 'apellido'
+        ).annotate(
+            **{campo: Sum(f'inscripcion__metricas__{campo}') for campo in CONTADORES}
+        )
+    filas = filas.order_by('id')
+    if limite is not None:
+        filas = filas[:limite]
+    return [_metricas_desde_contadores(fila) for fila in filas]
+
+
+def filtro_inscripciones_grupo(curso_id=None, anio_academico=None, periodo=None):
+    filtro = {}
+    if curso_id is not None:
+        filtro['inscripcion__curso_id'] = curso_id
+    if anio_academico is not None:
+        filtro['inscripcion__anio_academico'] = anio_academico
+        filtro['inscripcion__estado_inscripcion'] = 'Activa'
+    if periodo:
+        filtro['inscripcion__periodo'] = periodo
+    return filtro
+
+
+def metricas_alumnos_por_bloques(curso_id=None, alumnos_ids=None, tamanio_bloque=500, anio_academico=None,
+                                 ventana=None):
+    """Recorre las métricas del grupo en bloques de hasta tamanio_bloque
+    alumnos, paginando por id: cada bloque es una consulta independiente y en
+    memoria solo hay un bloque a la vez."""
+    ultimo_id = None
+    while True:
+        bloque = metricas_alumnos(
+            curso_id, alumnos_ids, desde_id=ultimo_id, limite=tamanio_bloque, anio_academico=anio_academico,
+            ventana=ventana,
+        )
+        if bloque:
+            yield bloque
+        if len(bloque) < tamanio_bloque:
+            return
+        ultimo_id = bloque[-1]['id']
+
+
+# ==============================================================================
+# FEATURES POR VENTANA (materia y/o rango de fechas)
+# ==============================================================================
+# Las tablas de métricas acumulan todo el historial de cada inscripción, así
+# que no sirven para una materia o un rango de fechas. En ese caso se agregan
+# los registros, pero solo los de las inscripciones del grupo que caen en la
+# ventana: con los índices (inscripcion, fecha) e (inscripcion, materia,
+# fecha) de Nota, Asistencia y Participacion cada inscripción es un recorrido
+# por rango, y el coste depende del tamaño de la ventana y no de los años de
+# historial que acumule la base de datos.
+
+# Filtros que acepta /api/mlmodel/ además de curso_id/alumnos_ids/anio_academico
+CAMPOS_VENTANA = ('periodo', 'materia_id', 'fecha_desde', 'fecha_hasta')
+
+# Campo de fecha de cada tabla de registros
+_FECHA_REGISTRO = {Nota: 'fecha_evaluacion', Participacion: 'fecha', Asistencia: 'fecha'}
+
+
+def ventana_por_registros(ventana):
+    """True si la ventana fija una materia o fechas: las tablas de métricas no
+    bastan y las features se calculan desde los registros."""
+    return bool(ventana) and any(ventana.get(campo) is not None for campo in ('materia_id', 'fecha_desde', 'fecha_hasta'))
+
+
+def _contadores_ventana(modelo, alumnos_ids, filtro_inscripcion, ventana, agregados):
+    filtro = {'inscripcion__alumno_id__in': alumnos_ids, **filtro_inscripcion}
+    if ventana.get('materia_id') is not None:
+        filtro['materia_id'] = ventana['materia_id']
+    campo_fecha = _FECHA_REGISTRO[modelo]
+    if ventana.get('fecha_desde') is not None:
+        filtro[f'{campo_fecha}__gte'] = ventana['fecha_desde']
+    if ventana.get('fecha_hasta') is not None:
+        filtro[f'{campo_fecha}__lte'] = ventana['fecha_hasta']
+    filas = modelo.objects.filter(**filtro).values('inscripcion__alumno_id').annotate(**agregados).order_by()
+    return {fila.pop('inscripcion__alumno_id'): fila for fila in filas}
+
+
+def metricas_alumnos_ventana(curso_id=None, alumnos_ids=None, anio_academico=None, ventana=None,
+                             desde_id=None, limite=None):
+    """Métricas del grupo restringidas a la ventana (periodo, materia_id,
+    fecha_desde, fecha_hasta; fechas inclusivas). Mismo formato y mismas
+    fórmulas que metricas_alumnos; un alumno del grupo sin registros en la
+    ventana tiene todas sus features a 0."""
+    ventana = ventana or {}
+    filtro_inscripcion = filtro_inscripciones_grupo(curso_id, anio_academico, ventana.get('periodo'))
+    alumnos = Alumno.objects.filter(**filtro_inscripcion)
+    if alumnos_ids:
+        alumnos = alumnos.filter(id__in=alumnos_ids)
+    if desde_id is not None:
+        alumnos = alumnos.filter(id__gt=desde_id)
+    alumnos = alumnos.values('id', 'nombre', 'apellido').distinct().order_by('id')
+    if limite is not None:
+        alumnos = alumnos[:limite]
+    alumnos = list(alumnos)
+    if not alumnos:
+        return []
+
+    ids = [alumno['id'] for alumno in alumnos]
+    contadores = {}
+    for modelo, agregados in (
+        (Nota, {'suma_calificaciones': Sum('calificacion'), 'num_notas': Count('id')}),
+        (Participacion, {'suma_participaciones': Sum('puntuacion'), 'num_participaciones': Count('id')}),
+        (Asistencia, {'total_asistencias': Count('id'), 'presentes': Count('id', filter=Q(estado='Presente'))}),
+    ):
+        for alumno_id, valores in _contadores_ventana(modelo, ids, filtro_inscripcion, ventana, agregados).items():
+            contadores.setdefault(alumno_id, {}).update(valores)
+
+    vacios = dict.fromkeys(CONTADORES, 0)
+    return [
+        _metricas_desde_contadores({**alumno, **vacios, **contadores.get(alumno['id'], {})})
+        for alumno in alumnos
+    ]
+
+
+# ==============================================================================
+# PREDICCIÓN DE UN GRUPO
+# ==============================================================================
+
+def percentiles_grupo(df_grupo):
+    """Percentil 25 de cada feature en el grupo: por debajo de él se generan
+    las recomendaciones de generar_recomendaciones_lote."""
+    return {columna: df_grupo[columna].quantile(0.25) for columna in COLUMNAS_FEATURES}
+
+
+def resultados_prediccion(metricas_grupo, df_grupo, percentiles, modelos, margen_cascada=None, estadisticas=None):
+    """Predice y genera las recomendaciones de todo el grupo (una sola
+    llamada por modelo sobre la matriz de features) y devuelve un resultado
+    por alumno, en el orden de metricas_grupo.
+
+    Con margen_cascada el rendimiento se clasifica en cascada (ver
+    ModelosCargados.predecir_cascada) y, si se pasa, `estadisticas` acumula
+    cuántos alumnos resolvió la regla, cuántos el bosque y en cuántos de
+    estos la regla coincidía con el bosque."""
+    if margen_cascada is None:
+        notas_predichas, rendimientos_predichos = predecir_lote(df_grupo, modelos)
+    else:
+        notas_predichas, rendimientos_predichos, usa_bosque, acuerdos = modelos.predecir_cascada(
+            df_grupo, margen_cascada
+        )
+        if estadisticas is not None:
+            estadisticas['bosque'] = estadisticas.get('bosque', 0) + int(usa_bosque.sum())
+            estadisticas['regla'] = estadisticas.get('regla', 0) + int((~usa_bosque).sum())
+            estadisticas['acuerdos'] = estadisticas.get('acuerdos', 0) + acuerdos
+    recomendaciones_grupo = generar_recomendaciones_lote(df_grupo, percentiles)
+
+    resultados = []
+    for metrica_alumno, nota_predicha, rendimiento_predicho, recomendaciones in zip(
+        metricas_grupo, notas_predichas.tolist(), rendimientos_predichos.tolist(), recomendaciones_grupo
+    ):
+        resultados.append({
+            'alumno_id': metrica_alumno['id'],
+            'alumno': f"{metrica_alumno['nombre']} {metrica_alumno['apellido']}",
+            'asistencia': metrica_alumno['asistencia'],
+            'participaciones': round(metrica_alumno['participaciones'], 2),
+            'evaluaciones': round(metrica_alumno['evaluaciones'], 2),
+            'nota_final_predicha': round(float(nota_predicha), 2),
+            'rendimiento_predicho': rendimiento_predicho,
+            'recomendaciones': recomendaciones,
+            'version_modelo': modelos.version
+        })
+    if margen_cascada is not None:
+        for resultado, bosque in zip(resultados, usa_bosque.tolist()):
+            resultado['ruta_clasificacion'] = 'bosque' if bosque else 'regla'
+    return resultados
+
+
+def percentiles_guardados(curso_id=None, alumnos_ids=None, anio_academico=None, ventana=None):
+    """Percentiles de PercentilesCurso para un curso y año (una consulta), o
+    None si el grupo no es un curso y año completo, no hay histograma o están
+    desactivados con ML_PERCENTILES_HISTOGRAMA = False. Difieren de los exactos
+    en como mucho percentiles.ERROR_MAXIMO."""
+    if alumnos_ids or not curso_id or anio_academico is None or ventana:
+        return None
+    if not getattr(settings, 'ML_PERCENTILES_HISTOGRAMA', True):
+        return None
+    return percentiles_curso(curso_id, anio_academico)
+
+
+def predecir_grupo(modelos, curso_id=None, alumnos_ids=None, anio_academico=None,
+                   margen_cascada=None, estadisticas=None, ventana=None):
+    metricas_grupo = metricas_alumnos(
+        curso_id=curso_id, alumnos_ids=alumnos_ids, anio_academico=anio_academico, ventana=ventana
+    )
+    if not metricas_grupo:
+        return []
+    df_grupo = pd.DataFrame(metricas_grupo)
+    percentiles = percentiles_guardados(curso_id, alumnos_ids, anio_academico, ventana) or percentiles_grupo(df_grupo)
+    return resultados_prediccion(metricas_grupo, df_grupo, percentiles, modelos, margen_cascada, estadisticas)
+
+
+# ==============================================================================
+# SIMULACIÓN "WHAT-IF" (/api/mlmodel/simulacion/)
+# ==============================================================================
+
+def simular_grupo(modelos, escenarios, curso_id=None, alumnos_ids=None, anio_academico=None, max_celdas=None,
+                  ventana=None):
+    """Predice a cada alumno del grupo con sus features actuales y bajo cada
+    escenario (un dict {feature: delta} por escenario). Todo se puntúa en una
+    sola llamada por modelo: la primera columna de la rejilla es el escenario
+    sin cambios, que da la predicción actual con la que se compara el resto.
+
+    Lanza ValueError si alumnos × escenarios supera max_celdas."""
+    metricas_grupo = metricas_alumnos(
+        curso_id=curso_id, alumnos_ids=alumnos_ids, anio_academico=anio_academico, ventana=ventana
+    )
+    if not metricas_grupo:
+        return []
+    if max_celdas is not None and len(metricas_grupo) * len(escenarios) > max_celdas:
+        raise ValueError(f'Como mucho {max_celdas} combinaciones alumno × escenario por petición.')
+    deltas = [[0.0] * len(COLUMNAS_FEATURES)] + [
+        [float(escenario.get(columna, 0)) for columna in COLUMNAS_FEATURES] for escenario in escenarios
+    ]
+    notas, rendimientos = predecir_escenarios(pd.DataFrame(metricas_grupo), deltas, modelos)
+    notas = notas.round(2).tolist()
+    rendimientos = rendimientos.tolist()
+
+    resultados = []
+    for metrica_alumno, notas_alumno, rendimientos_alumno in zip(metricas_grupo, notas, rendimientos):
+        nota_actual = notas_alumno[0]
+        resultados.append({
+            'alumno_id': metrica_alumno['id'],
+            'alumno': f"{metrica_alumno['nombre']} {metrica_alumno['apellido']}",
+            'asistencia': metrica_alumno['asistencia'],
+            'participaciones': round(metrica_alumno['participaciones'], 2),
+            'evaluaciones': round(metrica_alumno['evaluaciones'], 2),
+            'nota_final_predicha': nota_actual,
+            'rendimiento_predicho': rendimientos_alumno[0],
+            'escenarios': [
+                {
+                    'nota_final_predicha': nota,
+                    'rendimiento_predicho': rendimiento,
+                    'diferencia': round(nota - nota_actual, 2),
+                }
+                for nota, rendimiento in zip(notas_alumno[1:], rendimientos_alumno[1:])
+            ],
+            'version_modelo': modelos.version,
+        })
+    return resultados
+
+
+# ==============================================================================
+# PREDICCIONES PRECALCULADAS (python manage.py calcular_predicciones)
+# ==============================================================================
+# Cada fila de PrediccionAlumno guarda la versión de los datos del curso y la
+# versión de los modelos con las que se calculó. Solo se sirven si ambas
+# siguen siendo las actuales; si no, se recalcula al momento.
+
+def _resultado_desde_prediccion(fila):
+    return {
+        'alumno_id': fila['alumno_id'],
+        'alumno': f"{fila['alumno__nombre']} {fila['alumno__apellido']}",
+        'asistencia': fila['asistencia'],
+        'participaciones': fila['participaciones'],
+        'evaluaciones': fila['evaluaciones'],
+        'nota_final_predicha': fila['nota_final_predicha'],
+        'rendimiento_predicho': fila['rendimiento_predicho'],
+        'recomendaciones': fila['recomendaciones'],
+        'version_modelo': fila['version_modelo'],
+    }
+
+
+def predicciones_precalculadas(curso_id, anio_academico, version_modelo):
+    """Resultados guardados del curso y año, o None si no hay o alguno quedó
+    desactualizado (cambiaron los datos del curso o la versión activa)."""
+    version_datos = obtener_versiones([clave_curso(curso_id)])[clave_curso(curso_id)]
+    filas = list(
+        PrediccionAlumno.objects.filter(curso_id=curso_id, anio_academico=anio_academico)
+        .values(
+            'alumno_id', 'alumno__nombre', 'alumno__apellido', 'asistencia', 'participaciones',
+            'evaluaciones', 'nota_final_predicha', 'rendimiento_predicho', 'recomendaciones',
+            'version_modelo', 'version_datos',
+        ).order_by('alumno_id')
+    )
+    if not filas or any(
+        fila['version_datos'] != version_datos or fila['version_modelo'] != version_modelo for fila in filas
+    ):
+        return None
+    return [_resultado_desde_prediccion(fila) for fila in filas]
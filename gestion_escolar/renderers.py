@@ -0,0 +1,72 @@
+# gestion_escolar/renderers.py
+import csv
+import io
+import json
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # Sin orjson, JSONRapidoRenderer es el JSONRenderer de DRF
+    orjson = None
+
+
+class NDJSONRenderer(BaseRenderer):
+    """JSON delimitado por líneas (un objeto por línea).
+
+    Permite que DRF acepte 'Accept: application/x-ndjson' en los endpoints que
+    lo declaran. Las respuestas normales (p. ej. errores de validación) se
+    escriben como una línea por elemento si son una lista, o una sola línea."""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        elementos = data if isinstance(data, list) else [data]
+        return ''.join(linea_ndjson(elemento) for elemento in elementos).encode(self.charset)
+
+
+def linea_ndjson(objeto):
+    return json.dumps(objeto, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+class CSVRenderer(BaseRenderer):
+    """text/csv para las exportaciones (?format=csv o 'Accept: text/csv').
+
+    Las exportaciones se escriben por bloques en exportacion.py; este renderer
+    solo da formato a las respuestas normales de esas vistas (p. ej. errores
+    de validación): una fila por elemento, con las claves como cabecera."""
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        filas = data if isinstance(data, list) else [data]
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=list(dict.fromkeys(k for fila in filas for k in fila)),
+                                lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(filas)
+        return buffer.getvalue().encode(self.charset)
+
+
+class JSONRapidoRenderer(JSONRenderer):
+    """JSONRenderer de DRF con orjson para el caso normal (salida compacta en
+    UTF-8, sin indent), varias veces más rápido en los listados grandes. Lo
+    que orjson no serializa igual que DRF (fechas con hora, Decimal, tipos de
+    NumPy...) pasa por el JSONEncoder de DRF, así que la salida es la misma."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = orjson.dumps(
+            data, default=self.encoder_class().default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+        )
+        # Igual que JSONRenderer: \u2028 y \u2029 siempre escapados
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
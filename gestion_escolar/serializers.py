@@ -1,4 +1,7 @@
 # gestion_escolar/serializers.py
+from collections import Counter
+
+from django.conf import settings
 from rest_framework import serializers
 from .models import (
     Alumno, Profesor, Curso, Materia, AsignacionCursoMateria, Inscripcion,
@@ -6,72 +9,154 @@ from .models import (
     Tutor, AlumnoTutor, Usuario
 )
 
-class AlumnoSerializer(serializers.ModelSerializer):
+
+# ==============================================================================
+# CAMPOS DINÁMICOS: ?fields= y ?expand=
+# ==============================================================================
+# En las lecturas (GET) el cliente puede pedir solo algunas columnas
+# (?fields=id,calificacion,materia) y anidar objetos relacionados en lugar de
+# su id (?expand=materia,inscripcion.alumno). Cada serializer declara en
+# `expandibles` qué relaciones se pueden anidar y con qué serializer; los
+# nombres que no estén ahí se ignoran. ConsultaOptimizadaMixin (views.py) ajusta
+# el queryset a lo pedido con only() y select_related().
+
+def parametros_lectura(request):
+    """(campos, expandir) de la query string: campos es None si no se pidió
+    ?fields= (todos) y siempre incluye las relaciones de primer nivel que se
+    expanden; expandir es la lista de rutas de ?expand=."""
+    expandir = [ruta for ruta in request.query_params.get('expand', '').split(',') if ruta]
+    campos = request.query_params.get('fields')
+    if not campos:
+        return None, expandir
+    return {campo for campo in campos.split(',') if campo} | {ruta.split('.')[0] for ruta in expandir}, expandir
+
+
+def agrupar_expansiones(expandir):
+    """['inscripcion.alumno', 'materia'] -> {'inscripcion': ['alumno'], 'materia': []}"""
+    grupos = {}
+    for ruta in expandir:
+        nombre, _, resto = ruta.partition('.')
+        grupos.setdefault(nombre, [])
+        if resto:
+            grupos[nombre].append(resto)
+    return grupos
+
+
+def rutas_select_related(serializer_class, expandir):
+    """Rutas para select_related() de las expansiones válidas de `expandir`."""
+    rutas = []
+    for nombre, anidados in agrupar_expansiones(expandir).items():
+        anidado = getattr(serializer_class, 'expandibles', {}).get(nombre)
+        if anidado is None:
+            continue
+        rutas.append(nombre)
+        rutas += [f'{nombre}__{ruta}' for ruta in rutas_select_related(anidado, anidados)]
+    return rutas
+
+
+class CamposDinamicosMixin:
+    expandibles = {}
+
+    def __init__(self, *args, expandir=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if expandir is None:
+            # Serializer principal: lo pedido en la query string, solo al leer
+            request = self.context.get('request')
+            if request is None or request.method != 'GET':
+                return
+            campos, expandir = parametros_lectura(request)
+            if campos is not None:
+                for nombre in set(self.fields) - campos:
+                    self.fields.pop(nombre)
+        for nombre, anidados in agrupar_expansiones(expandir).items():
+            if nombre in self.expandibles and nombre in self.fields:
+                self.fields[nombre] = self.expandibles[nombre](read_only=True, expandir=anidados)
+
+
+class AlumnoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = Alumno
         fields = '__all__' # Incluye todos los campos del modelo
 
-class ProfesorSerializer(serializers.ModelSerializer):
+class ProfesorSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = Profesor
         fields = '__all__'
 
-class CursoSerializer(serializers.ModelSerializer):
+class CursoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = Curso
         fields = '__all__'
 
-class MateriaSerializer(serializers.ModelSerializer):
+class MateriaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = Materia
         fields = '__all__'
 
-class AsignacionCursoMateriaSerializer(serializers.ModelSerializer):
+class AsignacionCursoMateriaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    expandibles = {'curso': CursoSerializer, 'materia': MateriaSerializer, 'profesor': ProfesorSerializer}
+
     class Meta:
         model = AsignacionCursoMateria
         fields = '__all__'
 
-class InscripcionSerializer(serializers.ModelSerializer):
+class InscripcionSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    expandibles = {'alumno': AlumnoSerializer, 'curso': CursoSerializer}
+
     class Meta:
         model = Inscripcion
         fields = '__all__'
 
-class NotaSerializer(serializers.ModelSerializer):
+class NotaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    expandibles = {'inscripcion': InscripcionSerializer, 'materia': MateriaSerializer, 'profesor': ProfesorSerializer}
+
     class Meta:
         model = Nota
         fields = '__all__'
 
-class AsistenciaSerializer(serializers.ModelSerializer):
+class AsistenciaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    expandibles = {'inscripcion': InscripcionSerializer, 'materia': MateriaSerializer, 'profesor': ProfesorSerializer}
+
     class Meta:
         model = Asistencia
         fields = '__all__'
 
-class ActividadProyectoSerializer(serializers.ModelSerializer):
+class ActividadProyectoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    expandibles = {'materia': MateriaSerializer, 'profesor': ProfesorSerializer}
+
     class Meta:
         model = ActividadProyecto
         fields = '__all__'
 
-class EntregaActividadSerializer(serializers.ModelSerializer):
+class EntregaActividadSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    expandibles = {'actividad': ActividadProyectoSerializer, 'alumno': AlumnoSerializer}
+
     class Meta:
         model = EntregaActividad
         fields = '__all__'
 
-class ParticipacionSerializer(serializers.ModelSerializer):
+class ParticipacionSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    expandibles = {'inscripcion': InscripcionSerializer, 'materia': MateriaSerializer, 'profesor': ProfesorSerializer}
+
     class Meta:
         model = Participacion
         fields = '__all__'
 
-class TutorSerializer(serializers.ModelSerializer):
+class TutorSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = Tutor
         fields = '__all__'
 
-class AlumnoTutorSerializer(serializers.ModelSerializer):
+class AlumnoTutorSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    expandibles = {'alumno': AlumnoSerializer, 'tutor': TutorSerializer}
+
     class Meta:
         model = AlumnoTutor
         fields = '__all__'
 
-class UsuarioSerializer(serializers.ModelSerializer):
+class UsuarioSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    expandibles = {'alumno': AlumnoSerializer, 'profesor': ProfesorSerializer, 'tutor': TutorSerializer}
+
     class Meta:
         model = Usuario
         # Excluye password_hash en la lectura, pero inclúyelo para la escritura
@@ -98,4 +183,26 @@ class UsuarioSerializer(serializers.ModelSerializer):
         if password is not None:
             from django.contrib.auth.hashers import make_password
             instance.password_hash = make_password(password)
-        return super().update(instance, validated_data)
\ No newline at end of file
+        return super().update(instance, validated_data)
+
+
+# ==============================================================================
+# PASE DE LISTA (/api/asignaciones/<id>/pase_lista/)
+# ==============================================================================
+
+class PaseListaAlumnoSerializer(serializers.Serializer):
+    alumno = serializers.IntegerField()
+    estado = serializers.ChoiceField(choices=Asistencia.ESTADO_ASISTENCIA_CHOICES)
+    observaciones = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+
+
+class PaseListaSerializer(serializers.Serializer):
+    fecha = serializers.DateField()
+    asistencias = PaseListaAlumnoSerializer(many=True, allow_empty=False, max_length=settings.API_MAX_LOTE)
+
+    def validate_asistencias(self, asistencias):
+        veces = Counter(fila['alumno'] for fila in asistencias)
+        repetidos = sorted(alumno for alumno, n in veces.items() if n > 1)
+        if repetidos:
+            raise serializers.ValidationError(f'Alumnos repetidos en el pase de lista: {repetidos}.')
+        return asistencias
@@ -0,0 +1,93 @@
+# gestion_escolar/signals.py
+from django.apps import apps
+from django.db.models.signals import pre_save, post_save, post_delete
+
+from .models import Alumno, Inscripcion, Nota, Asistencia, Participacion, VersionadoQuerySet
+from .metricas import aplicar_cambio, campos_metricas, recalcular_alumnos, recalcular_inscripciones, valores_registro
+from .percentiles import reconstruir_percentiles
+from .versiones import incrementar_versiones_alumnos, incrementar_versiones_inscripciones, incrementar_versiones_tablas
+
+# Mantienen InscripcionMetricas/AlumnoMetricas al día en save() y delete().
+# Las operaciones masivas (bulk_create, update, bulk_update) se cubren en
+# RegistroAcademicoQuerySet.
+#
+# Los guardados raw (loaddata) no aplican deltas: la fila puede existir aunque
+# la instancia venga como nueva y la inscripción puede cargarse después que sus
+# registros. Se recalculan desde cero las inscripciones afectadas, y al cargar
+# una inscripción, las suyas.
+
+
+def recordar_valores_previos(sender, instance, raw=False, **kwargs):
+    if raw:
+        instance._inscripcion_previa_id = sender.objects.filter(pk=instance.pk).values_list(
+            'inscripcion_id', flat=True
+        ).first()
+        return
+    if instance._state.adding:
+        return
+    campos = [c for c in campos_metricas(sender) if c != 'inscripcion']
+    instance._metricas_previas = sender.objects.filter(pk=instance.pk).values(*campos).first()
+
+
+def actualizar_metricas_al_guardar(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        recalcular_inscripciones({instance.inscripcion_id, getattr(instance, '_inscripcion_previa_id', None)})
+        return
+    anteriores = None if created else getattr(instance, '_metricas_previas', None)
+    aplicar_cambio(sender, anteriores=anteriores, nuevos=valores_registro(instance))
+    instance._metricas_previas = None
+
+
+def actualizar_metricas_al_borrar(sender, instance, **kwargs):
+    aplicar_cambio(sender, anteriores=valores_registro(instance))
+
+
+# Cambios que alteran el resultado de /api/mlmodel/ sin pasar por las métricas:
+# altas/bajas/cambios de inscripciones y el nombre de los alumnos.
+
+def recordar_inscripcion_previa(sender, instance, raw=False, **kwargs):
+    if instance._state.adding and not raw:
+        return
+    instance._inscripcion_previa = sender.objects.filter(pk=instance.pk).values_list(
+        'alumno_id', 'curso_id', 'anio_academico'
+    ).first()
+
+
+def versionar_inscripcion(sender, instance, raw=False, **kwargs):
+    afectadas = [(instance.alumno_id, instance.curso_id, instance.anio_academico)]
+    if getattr(instance, '_inscripcion_previa', None):
+        afectadas.append(instance._inscripcion_previa)
+    if raw:
+        # Sus registros pueden haberse cargado antes que ella
+        recalcular_inscripciones([instance.pk], incluir_alumnos=False, incluir_percentiles=False)
+        recalcular_alumnos({alumno_id for alumno_id, _, _ in afectadas})
+    incrementar_versiones_inscripciones((alumno_id, curso_id) for alumno_id, curso_id, _ in afectadas)
+    # Cambia quién forma parte del curso y año: se rehacen sus percentiles
+    reconstruir_percentiles({(curso_id, anio) for _, curso_id, anio in afectadas})
+
+
+def versionar_alumno(sender, instance, raw=False, **kwargs):
+    incrementar_versiones_alumnos([instance.pk])
+
+
+def versionar_tabla(sender, instance, raw=False, **kwargs):
+    # Versión de la tabla para el GET condicional y las cachés de la API; las
+    # operaciones masivas la hacen avanzar en VersionadoQuerySet. También con
+    # raw (loaddata): lo cargado cambia lo que devuelve la API
+    incrementar_versiones_tablas([sender])
+
+
+pre_save.connect(recordar_inscripcion_previa, sender=Inscripcion)
+post_save.connect(versionar_inscripcion, sender=Inscripcion)
+post_delete.connect(versionar_inscripcion, sender=Inscripcion)
+post_save.connect(versionar_alumno, sender=Alumno)
+
+for modelo in (Nota, Asistencia, Participacion):
+    pre_save.connect(recordar_valores_previos, sender=modelo)
+    post_save.connect(actualizar_metricas_al_guardar, sender=modelo)
+    post_delete.connect(actualizar_metricas_al_borrar, sender=modelo)
+
+for modelo in apps.get_app_config('gestion_escolar').get_models():
+    if isinstance(modelo._default_manager.get_queryset(), VersionadoQuerySet):
+        post_save.connect(versionar_tabla, sender=modelo)
+        post_delete.connect(versionar_tabla, sender=modelo)
@@ -1,3 +1,1358 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import tempfile
+from datetime import date
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models.signals import post_delete
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework.request import Request
+
+import modelo
+from gestion_escolar import percentiles
+from gestion_escolar.cache_consultas import CacheConsultas, cache_consultas
+from gestion_escolar.cache_predicciones import cache_predicciones
+from gestion_escolar.condicional import _modelos_ruta
+from gestion_escolar.exportacion import COLUMNAS_EXPORTACION, exportar_csv, exportar_ndjson
+from gestion_escolar.lectura import PlanLectura
+from gestion_escolar.lotes import OperacionesMasivasMixin
+from gestion_escolar.management.commands.entrenar_historial import extraer_historial
+from gestion_escolar.metricas import CONTADORES, _contadores_por_inscripcion
+from gestion_escolar.models import (
+    Alumno, AlumnoMetricas, AsignacionCursoMateria, Asistencia, Curso, Inscripcion, InscripcionMetricas, Materia, Nota, Participacion,
+    Profesor,
+)
+from gestion_escolar.paginacion import PaginacionCursor
+from gestion_escolar.prediccion import metricas_alumnos, metricas_alumnos_por_bloques, percentiles_grupo, predecir_grupo
+from gestion_escolar.renderers import JSONRapidoRenderer
+from gestion_escolar.serializers import NotaSerializer, PaseListaSerializer, rutas_select_related
+from gestion_escolar.versiones import incrementar_versiones, obtener_versiones
+from gestion_escolar.views import NotaViewSet
+
+
+class MotorCompiladoTests(SimpleTestCase):
+    """El motor NumPy de modelo.py debe predecir exactamente lo mismo que sklearn."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.linear_model import LinearRegression
+
+        rng = np.random.default_rng(7)
+        X = pd.DataFrame(rng.integers(0, 101, size=(3000, 3)), columns=modelo.COLUMNAS_FEATURES)
+        nota_final = X.mean(axis=1).round(2)
+        cls.regresion = LinearRegression().fit(X, nota_final)
+        cls.clasificacion = RandomForestClassifier(n_estimators=15, random_state=0).fit(
+            X, nota_final.apply(modelo.categorizar_nota)
+        )
+        cls.compilado = modelo.compilar_modelos(cls.regresion, cls.clasificacion)
+
+        # Puntos aleatorios continuos, enteros y exactamente sobre los umbrales
+        umbrales = np.unique(np.concatenate([e.tree_.threshold for e in cls.clasificacion.estimators_]))
+        umbrales = umbrales[umbrales >= 0]
+        cls.X = pd.DataFrame(np.vstack([
+            rng.uniform(-5, 105, size=(500, 3)),
+            rng.integers(0, 101, size=(500, 3)),
+            rng.choice(umbrales, size=(500, 3)),
+        ]), columns=modelo.COLUMNAS_FEATURES)
+
+    def test_clasificacion_identica(self):
+        esperado = self.clasificacion.predict(self.X)
+        obtenido = modelo.predecir_clasificacion_compilada(self.compilado, self.X)
+        np.testing.assert_array_equal(obtenido, esperado)
+
+    def test_probabilidades_identicas(self):
+        esperado = self.clasificacion.predict_proba(self.X)
+        obtenido = modelo.predecir_proba_compilada(self.compilado, self.X)
+        np.testing.assert_allclose(obtenido, esperado, rtol=0, atol=1e-12)
+
+    def test_regresion_identica(self):
+        esperado = self.regresion.predict(self.X)
+        obtenido = modelo.predecir_regresion_compilada(self.compilado, self.X)
+        np.testing.assert_allclose(obtenido, esperado, rtol=0, atol=1e-9)
+
+    def test_cascada(self):
+        modelos = modelo.ModelosCargados('test', compilado=self.compilado)
+        notas, completo = modelos.predecir(self.X)
+        # Con un margen que cubre todo el rango, la cascada es el bosque completo
+        _, cascada, usa_bosque, _ = modelos.predecir_cascada(self.X, margen=1000)
+        self.assertTrue(usa_bosque.all())
+        np.testing.assert_array_equal(cascada, completo)
+        # Con margen 0 no se evalúa el bosque: solo la regla sobre la nota predicha
+        _, cascada, usa_bosque, acuerdos = modelos.predecir_cascada(self.X, margen=0)
+        self.assertFalse(usa_bosque.any())
+        self.assertEqual(acuerdos, 0)
+        np.testing.assert_array_equal(cascada, modelo.categorizar_notas(notas))
+
+    def test_lotes_grandes_con_sklearn(self):
+        modelos = modelo.ModelosCargados(
+            'test', compilado=self.compilado, regresion=self.regresion, clasificacion=self.clasificacion
+        )
+        with mock.patch.object(modelo, 'MAX_FILAS_COMPILADO', 100), \
+                mock.patch.object(self.clasificacion, 'predict', wraps=self.clasificacion.predict) as predict:
+            _, pequenio = modelos.predecir(self.X.iloc[:100])
+            predict.assert_not_called()
+            notas, grande = modelos.predecir(self.X)
+            predict.assert_called_once()
+        np.testing.assert_array_equal(pequenio, self.clasificacion.predict(self.X.iloc[:100]))
+        np.testing.assert_array_equal(grande, modelo.predecir_clasificacion_compilada(self.compilado, self.X))
+        np.testing.assert_allclose(notas, self.regresion.predict(self.X), rtol=0, atol=1e-9)
+
+    def test_escenarios_igual_a_predicciones_sueltas(self):
+        modelos = modelo.ModelosCargados('test', compilado=self.compilado)
+        alumnos = self.X.iloc[:20]
+        deltas = [[0, 0, 0], [10, 0, 0], [0, -15, 5], [200, 200, 200]]
+        notas, rendimientos = modelo.predecir_escenarios(alumnos, deltas, modelos)
+        self.assertEqual(notas.shape, (20, 4))
+        for j, delta in enumerate(deltas):
+            esperado_notas, esperado_rendimientos = modelos.predecir((alumnos + delta).clip(0, 100))
+            np.testing.assert_allclose(notas[:, j], esperado_notas, rtol=0, atol=1e-9)
+            np.testing.assert_array_equal(rendimientos[:, j], esperado_rendimientos)
+
+    def test_guardar_y_cargar(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            modelo.guardar_modelos_compilados(self.compilado, directorio)
+            cargado = modelo.cargar_modelos_compilados(directorio)
+        np.testing.assert_array_equal(
+            modelo.predecir_clasificacion_compilada(cargado, self.X),
+            self.clasificacion.predict(self.X),
+        )
+
+
+class RegistroModelosTests(SimpleTestCase):
+    """Publicación, activación en caliente y rollback de versiones de modelos."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.linear_model import LinearRegression
+
+        rng = np.random.default_rng(3)
+        X = pd.DataFrame(rng.integers(0, 101, size=(600, 3)), columns=modelo.COLUMNAS_FEATURES)
+        nota_final = X.mean(axis=1).round(2)
+        y = nota_final.apply(modelo.categorizar_nota)
+        # Dos versiones distinguibles: la segunda predice la nota desplazada +10
+        cls.regresion_a = LinearRegression().fit(X, nota_final)
+        cls.clasificacion_a = RandomForestClassifier(n_estimators=3, random_state=0).fit(X, y)
+        cls.compilado_a = modelo.compilar_modelos(cls.regresion_a, cls.clasificacion_a)
+        cls.compilado_b = modelo.compilar_modelos(
+            LinearRegression().fit(X, nota_final + 10), RandomForestClassifier(n_estimators=3, random_state=1).fit(X, y)
+        )
+        cls.X = pd.DataFrame([[50, 50, 50]], columns=modelo.COLUMNAS_FEATURES)
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.registro = modelo.RegistroModelos(directorio.name, intervalo_revision=0)
+        self.registro.publicar(self.compilado_a, version='v1')
+        self.registro.publicar(self.compilado_b, version='v2')
+
+    def test_cambio_en_caliente(self):
+        self.registro.activar('v1')
+        en_curso = self.registro.actuales()
+        self.assertEqual(en_curso.version, 'v1')
+
+        self.registro.activar('v2')
+        nuevos = self.registro.actuales()
+        self.assertEqual(nuevos.version, 'v2')
+        self.assertAlmostEqual(float(nuevos.predecir(self.X)[0][0]), 60.0, places=2)
+        # Quien ya tenía la versión anterior la sigue usando sin cambios
+        self.assertAlmostEqual(float(en_curso.predecir(self.X)[0][0]), 50.0, places=2)
+
+    def test_rollback(self):
+        self.registro.activar('v1')
+        self.registro.activar('v2')
+        self.assertEqual(self.registro.rollback(), 'v1')
+        self.assertEqual(self.registro.actuales().version, 'v1')
+        self.assertEqual(self.registro.versiones(), ['v1', 'v2'])
+
+    def test_version_inexistente_no_cambia_activa(self):
+        self.registro.activar('v1')
+        with self.assertRaises(FileNotFoundError):
+            self.registro.activar('v9')
+        self.assertEqual(self.registro.version_activa(), 'v1')
+
+    def test_version_con_sklearn(self):
+        self.registro.publicar(self.compilado_a, version='v3', regresion=self.regresion_a,
+                               clasificacion=self.clasificacion_a)
+        # Sin MODELO_SKLEARN_LOTES_GRANDES los .pkl no se cargan (ni sklearn se importa)
+        self.assertIsNone(self.registro.cargar('v3').clasificacion)
+        with mock.patch.object(modelo, 'SKLEARN_LOTES_GRANDES', True):
+            self.registro.activar('v3')
+            modelos = self.registro.actuales()
+            self.assertIsNone(self.registro.cargar('v1').clasificacion)
+        self.assertIsNotNone(modelos.clasificacion)
+        X = pd.DataFrame(np.random.default_rng(0).uniform(0, 100, size=(50, 3)), columns=modelo.COLUMNAS_FEATURES)
+        with mock.patch.object(modelo, 'MAX_FILAS_COMPILADO', 10):
+            _, rendimientos = modelos.predecir(X)
+        np.testing.assert_array_equal(rendimientos, self.clasificacion_a.predict(X))
+
+    def test_publicar_no_sobrescribe(self):
+        with self.assertRaises(FileExistsError):
+            self.registro.publicar(self.compilado_b, version='v1')
+
+
+class PercentilesHistogramaTests(SimpleTestCase):
+    """Los percentiles del histograma de PercentilesCurso frente a los exactos."""
+
+    def histograma(self, valores):
+        return np.bincount(percentiles.cubetas(valores), minlength=percentiles.NUM_CUBETAS)
+
+    def test_error_acotado(self):
+        rng = np.random.default_rng(11)
+        for n in (1, 2, 3, 7, 30, 31, 500, 5000):
+            for valores in (rng.uniform(0, 100, n), rng.normal(60, 15, n).clip(0, 100), rng.integers(0, 101, n) / 3):
+                exacto = pd.Series(valores).quantile(percentiles.CUANTIL)
+                estimado = percentiles.cuantil_histograma(self.histograma(valores))
+                self.assertLessEqual(abs(estimado - exacto), percentiles.ERROR_MAXIMO + 1e-9, (n, exacto, estimado))
+
+    def test_enteros_exactos(self):
+        valores = np.random.default_rng(5).integers(0, 101, 333)
+        self.assertEqual(percentiles.cuantil_histograma(self.histograma(valores)),
+                         pd.Series(valores).quantile(percentiles.CUANTIL))
+
+    def test_quitar_valores(self):
+        valores = np.random.default_rng(2).uniform(0, 100, 200)
+        conteos = self.histograma(valores)
+        np.subtract.at(conteos, percentiles.cubetas(valores[:50]), 1)
+        np.testing.assert_array_equal(conteos, self.histograma(valores[50:]))
+
+    def test_vacio(self):
+        self.assertIsNone(percentiles.cuantil_histograma(np.zeros(percentiles.NUM_CUBETAS, dtype=np.int64)))
+
+
+class CamposDinamicosTests(SimpleTestCase):
+    """?fields= y ?expand= en los serializers, sin tocar la BD."""
+
+    def campos(self, url, metodo='get'):
+        request = Request(getattr(APIRequestFactory(), metodo)(url))
+        return NotaSerializer(context={'request': request}).fields
+
+    def test_sin_parametros(self):
+        self.assertIn('comentarios_profesor', self.campos('/api/notas/'))
+
+    def test_fields(self):
+        self.assertEqual(list(self.campos('/api/notas/?fields=id,calificacion,noexiste')), ['id', 'calificacion'])
+
+    def test_expand_anidado(self):
+        campos = self.campos('/api/notas/?fields=id&expand=inscripcion.alumno,noexiste')
+        self.assertEqual(list(campos), ['id', 'inscripcion'])
+        self.assertIsInstance(campos['inscripcion'].fields['alumno'], serializers.ModelSerializer)
+        self.assertEqual(
+            rutas_select_related(NotaSerializer, ['inscripcion.alumno', 'materia', 'noexiste']),
+            ['inscripcion', 'inscripcion__alumno', 'materia'],
+        )
+
+    def test_escrituras_con_todos_los_campos(self):
+        self.assertIn('comentarios_profesor', self.campos('/api/notas/?fields=id', metodo='post'))
+
+
+class PaseListaTests(SimpleTestCase):
+
+    def test_alumnos_repetidos(self):
+        entrada = PaseListaSerializer(data={'fecha': '2024-05-02', 'asistencias': [
+            {'alumno': 1, 'estado': 'Presente'}, {'alumno': 2, 'estado': 'Tarde'}, {'alumno': 1, 'estado': 'Ausente'},
+        ]})
+        self.assertFalse(entrada.is_valid())
+        self.assertIn('asistencias', entrada.errors)
+
+    def test_valido(self):
+        entrada = PaseListaSerializer(data={'fecha': '2024-05-02', 'asistencias': [
+            {'alumno': 1, 'estado': 'Presente'}, {'alumno': 2, 'estado': 'Justificado', 'observaciones': 'Médico'},
+        ]})
+        self.assertTrue(entrada.is_valid(), entrada.errors)
+
+
+class LecturaRapidaTests(SimpleTestCase):
+    """values_list() + PlanLectura + JSONRapidoRenderer frente al serializer."""
+
+    def test_mismo_json_que_el_serializer(self):
+        nota = Nota(
+            id=5, inscripcion_id=2, materia_id=3, profesor_id=4, tipo_evaluacion='Examen Final',
+            calificacion=Decimal('87.50'), fecha_evaluacion=date(2024, 5, 2), comentarios_profesor='Muy bien \u2028 ñ',
+        )
+        serializer = NotaSerializer()
+        plan = PlanLectura.desde_serializer(serializer)
+        valores = tuple(getattr(nota, columna) for columna in plan.columnas)
+        self.assertEqual(
+            JSONRapidoRenderer().render([plan.fila(valores)]),
+            JSONRenderer().render([serializer.to_representation(nota)]),
+        )
+
+    def test_expand_usa_el_serializer(self):
+        request = Request(APIRequestFactory().get('/api/notas/?expand=materia'))
+        self.assertIsNone(PlanLectura.desde_serializer(NotaSerializer(context={'request': request})))
+
+
+class GetCondicionalTests(SimpleTestCase):
+
+    def test_tablas_de_los_filtros(self):
+        self.assertEqual(_modelos_ruta(Nota, 'inscripcion__anio_academico'), [Inscripcion])
+        self.assertEqual(_modelos_ruta(Nota, 'inscripcion__alumno_id'), [Inscripcion])
+        self.assertEqual(_modelos_ruta(Nota, 'inscripcion__alumno__nombre__icontains'), [Inscripcion, Alumno])
+        self.assertEqual(_modelos_ruta(Nota, 'materia_id'), [])
+        self.assertEqual(_modelos_ruta(Nota, 'fecha_evaluacion__gte'), [])
+
+
+class CacheConsultasTests(SimpleTestCase):
+
+    def test_aciertos_por_endpoint(self):
+        cache = CacheConsultas(alias='default', timeout=60)
+        llamadas = []
+
+        def vista(request):
+            llamadas.append(request)
+            return Response({'results': [len(llamadas)]})
+
+        primera = cache.responder('nota', 'huella-test-1', vista, 'req')
+        segunda = cache.responder('nota', 'huella-test-1', vista, 'req')
+        cache.responder('nota', 'huella-test-2', vista, 'req')
+        self.assertEqual(primera.data, segunda.data)
+        self.assertEqual(len(llamadas), 2)
+        estadisticas = cache.estadisticas()
+        self.assertEqual(estadisticas['endpoints']['nota'], {'aciertos': 1, 'fallos': 2, 'tasa_aciertos': 0.3333})
+
+
+
+class _FilasFalsas:
+    """Lo que usa exportacion.py de un QuerySet: order_by().values_list().iterator()."""
+
+    def __init__(self, model, filas):
+        self.model = model
+        self.filas = filas
+        self.lookups = None
+
+    def order_by(self, *campos):
+        return self
+
+    def values_list(self, *lookups):
+        self.lookups = lookups
+        return self
+
+    def iterator(self, chunk_size):
+        return iter(self.filas)
+
+
+class ExportacionTests(SimpleTestCase):
+
+    def _filas(self, n):
+        return [
+            (i, 7, 'Ana, María', 'Pérez "la"', 1, 'Pre-Kinder', 2024, 'Año Completo', 3, 'Lenguaje',
+             'Examen Final', Decimal('87.50'), date(2024, 5, 2), 4, 'línea 1\nlínea 2' if i == 1 else None)
+            for i in range(1, n + 1)
+        ]
+
+    def test_csv_por_bloques(self):
+        queryset = _FilasFalsas(Nota, self._filas(5))
+        trozos = list(exportar_csv(queryset, 2))
+        # Cabecera antes de leer filas y un trozo por bloque
+        self.assertEqual(len(trozos), 4)
+        self.assertEqual(trozos[0].rstrip('\n').split(','), [c for c, _ in COLUMNAS_EXPORTACION[Nota]])
+        filas = list(csv.reader(io.StringIO(''.join(trozos))))
+        self.assertEqual(len(filas), 6)
+        self.assertEqual(filas[1][2:4], ['Ana, María', 'Pérez "la"'])
+        self.assertEqual(filas[1][11:15], ['87.50', '2024-05-02', '4', 'línea 1\nlínea 2'])
+        self.assertEqual(filas[2][14], '')
+
+    def test_ndjson(self):
+        queryset = _FilasFalsas(Nota, self._filas(3))
+        lineas = ''.join(exportar_ndjson(queryset, 2)).splitlines()
+        self.assertEqual(len(lineas), 3)
+        fila = json.loads(lineas[1])
+        self.assertEqual(fila['calificacion'], '87.50')
+        self.assertEqual(fila['fecha_evaluacion'], '2024-05-02')
+        self.assertIsNone(fila['comentarios_profesor'])
+        self.assertEqual(queryset.lookups[1:4], ('inscripcion__alumno_id', 'inscripcion__alumno__nombre', 'inscripcion__alumno__apellido'))
+
+
+class DatosEscolaresMixin:
+    """Un curso con dos materias y un profesor; tres alumnos inscritos en 2024
+    y el primero también en 2023 (dos inscripciones del mismo alumno)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        # Como si se hubieran confirmado: versiones.incrementar_versiones() no
+        # deja un callback pendiente al que se sumen las claves de cada test
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.curso = Curso.objects.create(nombre_curso='Primero A')
+            cls.materia = Materia.objects.create(nombre_materia='Matemáticas')
+            cls.otra_materia = Materia.objects.create(nombre_materia='Lenguaje')
+            cls.profesor = Profesor.objects.create(
+                nombre='Ana', apellido='Rojas', email='ana@colegio.test', fecha_contratacion=date(2020, 1, 1)
+            )
+            cls.alumnos = [Alumno.objects.create(nombre=f'Alumno{i}', apellido='Test') for i in range(3)]
+            cls.inscripciones = [
+                Inscripcion.objects.create(alumno=alumno, curso=cls.curso, anio_academico=2024, periodo='Año Completo')
+                for alumno in cls.alumnos
+            ]
+            cls.inscripcion_anterior = Inscripcion.objects.create(
+                alumno=cls.alumnos[0], curso=cls.curso, anio_academico=2023, periodo='Año Completo'
+            )
+
+    def nota(self, inscripcion, calificacion, **kwargs):
+        kwargs.setdefault('materia', self.materia)
+        kwargs.setdefault('fecha_evaluacion', date(2024, 5, 2))
+        kwargs.setdefault('tipo_evaluacion', 'Tarea')
+        return Nota(inscripcion=inscripcion, profesor=self.profesor, calificacion=Decimal(calificacion), **kwargs)
+
+    def asistencia(self, inscripcion, dia, estado='Presente', **kwargs):
+        kwargs.setdefault('materia', self.materia)
+        return Asistencia(inscripcion=inscripcion, fecha=date(2024, 5, dia), estado=estado, **kwargs)
+
+    def participacion(self, inscripcion, dia, puntuacion, **kwargs):
+        kwargs.setdefault('materia', self.materia)
+        return Participacion(inscripcion=inscripcion, profesor=self.profesor, fecha=date(2024, 5, dia),
+                             puntuacion=Decimal(puntuacion), **kwargs)
+
+
+class ModelosPruebaMixin:
+    """Sustituye los modelos cargados por unos pequeños entrenados aquí: los
+    tests de /api/mlmodel/ no dependen de los .pkl del directorio. La caché
+    de predicciones se vacía en cada test (las versiones de datos se repiten
+    porque cada test revierte su transacción)."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.linear_model import LinearRegression
+
+        rng = np.random.default_rng(11)
+        X = pd.DataFrame(rng.integers(0, 101, size=(500, 3)), columns=modelo.COLUMNAS_FEATURES)
+        nota_final = X.mean(axis=1).round(2)
+        cls.modelos = modelo.ModelosCargados('prueba', compilado=modelo.compilar_modelos(
+            LinearRegression().fit(X, nota_final),
+            RandomForestClassifier(n_estimators=5, random_state=0).fit(X, nota_final.apply(modelo.categorizar_nota)),
+        ))
+        parche = mock.patch.object(modelo.registro_modelos, 'actuales', return_value=cls.modelos)
+        parche.start()
+        cls.addClassCleanup(parche.stop)
+
+    def setUp(self):
+        super().setUp()
+        cache_predicciones.limpiar()
+
+    def predecir(self, datos, **extra):
+        response = self.client.post('/api/mlmodel/', datos, format='json', **extra)
+        self.assertEqual(response.status_code, 200, getattr(response, 'data', None))
+        return response.json()
+
+
+class MetricasIncrementalesTests(DatosEscolaresMixin, TestCase):
+    """InscripcionMetricas y AlumnoMetricas deben coincidir con un recuento
+    completo de los registros tras cualquier forma de escribirlos."""
+
+    def assertMetricasCuadran(self):
+        ceros = dict.fromkeys(CONTADORES, 0)
+        inscripciones = dict(Inscripcion.objects.values_list('id', 'alumno_id'))
+        esperadas = _contadores_por_inscripcion(list(inscripciones))
+        guardadas = {fila.pop('inscripcion_id'): fila for fila in InscripcionMetricas.objects.values('inscripcion_id', *CONTADORES)}
+        self.assertLessEqual(set(guardadas), set(inscripciones))
+        por_alumno = {alumno_id: dict(ceros) for alumno_id in Alumno.objects.values_list('id', flat=True)}
+        for inscripcion_id, alumno_id in inscripciones.items():
+            self.assertEqual(guardadas.get(inscripcion_id, ceros), esperadas.get(inscripcion_id, ceros),
+                             f'inscripción {inscripcion_id}')
+            for campo, valor in esperadas.get(inscripcion_id, ceros).items():
+                por_alumno[alumno_id][campo] += valor
+        guardadas = {fila.pop('alumno_id'): fila for fila in AlumnoMetricas.objects.values('alumno_id', *CONTADORES)}
+        for alumno_id, contadores in por_alumno.items():
+            self.assertEqual(guardadas.get(alumno_id, ceros), contadores, f'alumno {alumno_id}')
+
+    def test_save_y_delete(self):
+        a, b = self.inscripciones[:2]
+        nota = self.nota(a, '70.25')
+        nota.save()
+        self.asistencia(a, 2, 'Ausente').save()
+        self.participacion(self.inscripcion_anterior, 3, '7.50').save()
+        self.assertMetricasCuadran()
+        nota.calificacion = Decimal('91.00')
+        nota.save()
+        self.assertMetricasCuadran()
+        # Cambio de inscripción (y de alumno): se resta de una y se suma a la otra
+        nota.inscripcion = b
+        nota.save()
+        self.assertMetricasCuadran()
+        nota.delete()
+        self.assertMetricasCuadran()
+
+    def test_bulk_create(self):
+        Nota.objects.bulk_create([self.nota(i, f'{50 + n}.10') for n, i in enumerate(self.inscripciones)])
+        Asistencia.objects.bulk_create([self.asistencia(i, 6, 'Tarde') for i in self.inscripciones])
+        self.assertMetricasCuadran()
+
+    def test_bulk_create_ignore_conflicts_con_duplicados(self):
+        a, b = self.inscripciones[:2]
+        Asistencia.objects.bulk_create([self.asistencia(a, 6)])
+        # La asistencia de `a` ya existe: solo se inserta la de `b`
+        Asistencia.objects.bulk_create([self.asistencia(a, 6, 'Ausente'), self.asistencia(b, 6)], ignore_conflicts=True)
+        self.assertEqual(Asistencia.objects.count(), 2)
+        self.assertMetricasCuadran()
+        Asistencia.objects.bulk_create(
+            [self.asistencia(a, 6, 'Ausente'), self.asistencia(b, 7, 'Ausente')], update_conflicts=True,
+            unique_fields=['inscripcion', 'materia', 'fecha'], update_fields=['estado'],
+        )
+        self.assertEqual(Asistencia.objects.count(), 3)
+        self.assertMetricasCuadran()
+
+    def test_update_y_bulk_update(self):
+        Nota.objects.bulk_create([self.nota(i, '60.00') for i in self.inscripciones])
+        Participacion.objects.bulk_create([self.participacion(i, 4 + n, '5.00') for n, i in enumerate(self.inscripciones)])
+        Nota.objects.filter(inscripcion=self.inscripciones[0]).update(calificacion=Decimal('99.99'))
+        Participacion.objects.update(inscripcion=self.inscripcion_anterior.pk)
+        self.assertMetricasCuadran()
+        notas = list(Nota.objects.all())
+        for nota, inscripcion in zip(notas, reversed(self.inscripciones)):
+            nota.calificacion += 1
+            nota.inscripcion = inscripcion
+        Nota.objects.bulk_update(notas, ['calificacion', 'inscripcion'])
+        self.assertMetricasCuadran()
+
+    def test_delete_masivo(self):
+        Nota.objects.bulk_create([self.nota(i, '80.00') for i in self.inscripciones])
+        Asistencia.objects.bulk_create([self.asistencia(i, d) for i in self.inscripciones for d in (6, 7)])
+        Nota.objects.filter(inscripcion__in=self.inscripciones[:2]).delete()
+        Asistencia.objects.filter(fecha=date(2024, 5, 6)).delete()
+        self.assertMetricasCuadran()
+
+    def test_loaddata(self):
+        existente = self.nota(self.inscripciones[0], '55.00')
+        existente.save()
+        comunes = {'profesor': self.profesor.pk, 'tipo_evaluacion': 'Tarea', 'fecha_evaluacion': '2024-05-02'}
+        # Registros antes que su inscripción, y una nota ya existente que cambia de inscripción
+        datos = [
+            {'model': 'gestion_escolar.nota', 'pk': 900,
+             'fields': {'inscripcion': 900, 'materia': self.materia.pk, 'calificacion': '88.00', **comunes}},
+            {'model': 'gestion_escolar.asistencia', 'pk': 900,
+             'fields': {'inscripcion': 900, 'materia': self.materia.pk, 'fecha': '2024-05-03', 'estado': 'Presente'}},
+            {'model': 'gestion_escolar.nota', 'pk': existente.pk,
+             'fields': {'inscripcion': self.inscripciones[1].pk, 'materia': self.materia.pk,
+                        'calificacion': '61.00', **comunes}},
+            {'model': 'gestion_escolar.alumno', 'pk': 900,
+             'fields': {'nombre': 'Nuevo', 'apellido': 'Fixture', 'fecha_registro': '2024-01-01T00:00:00Z'}},
+            {'model': 'gestion_escolar.inscripcion', 'pk': 900,
+             'fields': {'alumno': 900, 'curso': self.curso.pk, 'anio_academico': 2024, 'periodo': 'Año Completo',
+                        'fecha_inscripcion': '2024-01-01', 'estado_inscripcion': 'Activa'}},
+        ]
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as fixture:
+            json.dump(datos, fixture)
+            fixture.flush()
+            call_command('loaddata', fixture.name, verbosity=0)
+        self.assertEqual(InscripcionMetricas.objects.get(inscripcion_id=900).num_notas, 1)
+        self.assertMetricasCuadran()
+
+    def test_borrado_en_cascada(self):
+        Nota.objects.bulk_create([self.nota(i, '75.50') for i in [*self.inscripciones, self.inscripcion_anterior]])
+        Nota.objects.bulk_create([self.nota(i, '40.00', materia=self.otra_materia) for i in self.inscripciones])
+        Asistencia.objects.bulk_create([self.asistencia(i, 8) for i in self.inscripciones])
+        # El alumno 0 conserva su otra inscripción
+        self.inscripciones[0].delete()
+        self.assertMetricasCuadran()
+        self.otra_materia.delete()
+        self.assertMetricasCuadran()
+        self.alumnos[1].delete()
+        self.assertMetricasCuadran()
+
+
+class PercentilesCursoTests(DatosEscolaresMixin, TestCase):
+    """PercentilesCurso debe seguir a las inscripciones activas del curso y
+    año también con las operaciones masivas sobre Inscripcion."""
+
+    def setUp(self):
+        for inscripcion, calificacion, puntuacion in zip(self.inscripciones, ['40.00', '65.50', '90.00'], ['3', '6', '9']):
+            self.nota(inscripcion, calificacion).save()
+            self.participacion(inscripcion, 2, puntuacion).save()
+
+    def assertPercentilesExactos(self):
+        exactos = percentiles_grupo(pd.DataFrame(metricas_alumnos(curso_id=self.curso.pk, anio_academico=2024)))
+        guardados = percentiles.percentiles_curso(self.curso.pk, 2024)
+        for columna in modelo.COLUMNAS_FEATURES:
+            self.assertAlmostEqual(guardados[columna], exactos[columna], delta=percentiles.ERROR_MAXIMO + 1e-9)
+
+    def test_update_de_estado(self):
+        self.assertPercentilesExactos()
+        Inscripcion.objects.filter(pk=self.inscripciones[0].pk).update(estado_inscripcion='Retirada')
+        self.assertPercentilesExactos()
+        Inscripcion.objects.filter(pk=self.inscripciones[0].pk).update(estado_inscripcion='Activa')
+        self.assertPercentilesExactos()
+
+    def test_bulk_update_de_estado(self):
+        self.inscripciones[2].estado_inscripcion = 'Suspendida'
+        Inscripcion.objects.bulk_update([self.inscripciones[2]], ['estado_inscripcion'])
+        self.assertPercentilesExactos()
+
+
+class OperacionesMasivasTests(DatosEscolaresMixin, APITestCase):
+    """POST, PATCH y DELETE de /api/<recurso>/lote/."""
+
+    def datos_nota(self, inscripcion, calificacion='70.00', **kwargs):
+        return {'inscripcion': inscripcion.pk, 'materia': self.materia.pk, 'profesor': self.profesor.pk,
+                'tipo_evaluacion': 'Tarea', 'calificacion': calificacion, 'fecha_evaluacion': '2024-05-02', **kwargs}
+
+    def datos_participacion(self, inscripcion, dia=2):
+        return {'inscripcion': inscripcion.pk, 'materia': self.materia.pk, 'profesor': self.profesor.pk,
+                'fecha': f'2024-05-{dia:02d}', 'puntuacion': '8.00'}
+
+    def test_crear(self):
+        response = self.client.post('/api/notas/lote/', [self.datos_nota(i) for i in self.inscripciones], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()), 3)
+        self.assertEqual(Nota.objects.count(), 3)
+        self.assertEqual(AlumnoMetricas.objects.get(alumno=self.alumnos[2]).num_notas, 1)
+
+    def test_consultas_no_crecen_con_el_lote(self):
+        consultas = []
+        for n in (2, 20):
+            datos = [self.datos_nota(self.inscripciones[k % 3], fecha_evaluacion=f'2024-06-{n % 28 + 1:02d}')
+                     for k in range(n)]
+            with CaptureQueriesContext(connection) as capturadas:
+                self.assertEqual(self.client.post('/api/notas/lote/', datos, format='json').status_code, 201)
+            consultas.append(len(capturadas))
+        self.assertEqual(consultas[0], consultas[1])
+
+    def test_clave_foranea_inexistente(self):
+        datos = [self.datos_nota(self.inscripciones[0]), self.datos_nota(self.inscripciones[1], materia=99999)]
+        response = self.client.post('/api/notas/lote/', datos, format='json')
+        self.assertEqual(response.status_code, 400)
+        errores = response.json()
+        self.assertEqual(errores[0], {})
+        self.assertIn('materia', errores[1])
+        self.assertEqual(Nota.objects.count(), 0)
+
+    def test_unique_together(self):
+        self.participacion(self.inscripciones[0], 2, '5.00').save()
+        datos = [
+            self.datos_participacion(self.inscripciones[0]),  # ya existe en la BD
+            self.datos_participacion(self.inscripciones[1]),
+            self.datos_participacion(self.inscripciones[1]),  # repetida en el lote
+        ]
+        response = self.client.post('/api/participaciones/lote/', datos, format='json')
+        self.assertEqual(response.status_code, 400)
+        errores = response.json()
+        self.assertIn('non_field_errors', errores[0])
+        self.assertEqual(errores[1], {})
+        self.assertIn('non_field_errors', errores[2])
+        self.assertEqual(Participacion.objects.count(), 1)
+
+    def test_conflicto_concurrente(self):
+        # Otra petición inserta la misma clave entre la validación y el INSERT
+        comprobar = OperacionesMasivasMixin._comprobar_unicidad
+        llamadas = []
+
+        def despues_de_validar(vista, objs, errores):
+            llamadas.append(objs)
+            if len(llamadas) == 1:
+                self.participacion(self.inscripciones[1], 2, '5.00').save()
+            else:
+                comprobar(vista, objs, errores)
+
+        datos = [self.datos_participacion(self.inscripciones[0]), self.datos_participacion(self.inscripciones[1])]
+        with mock.patch.object(OperacionesMasivasMixin, '_comprobar_unicidad', despues_de_validar):
+            response = self.client.post('/api/participaciones/lote/', datos, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()[0], {})
+        self.assertIn('non_field_errors', response.json()[1])
+        self.assertEqual(Participacion.objects.count(), 1)
+
+    def test_actualizar(self):
+        notas = Nota.objects.bulk_create([self.nota(i, '50.00') for i in self.inscripciones])
+        datos = [{'id': notas[0].pk, 'calificacion': '90.00'}, {'id': notas[1].pk, 'calificacion': '10.00'}]
+        response = self.client.patch('/api/notas/lote/', datos, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(Nota.objects.values_list('calificacion', flat=True)),
+            [Decimal('10.00'), Decimal('50.00'), Decimal('90.00')],
+        )
+        response = self.client.patch('/api/notas/lote/', [{'id': 99999, 'calificacion': '1.00'}], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('id', response.json()[0])
+
+    def test_borrar(self):
+        notas = Nota.objects.bulk_create([self.nota(i, '50.00') for i in self.inscripciones])
+        response = self.client.delete('/api/notas/lote/', [notas[0].pk, 99999], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Nota.objects.count(), 3)
+        response = self.client.delete('/api/notas/lote/', [notas[0].pk, notas[1].pk], format='json')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(list(Nota.objects.values_list('pk', flat=True)), [notas[2].pk])
+        self.assertEqual(InscripcionMetricas.objects.get(inscripcion=self.inscripciones[0]).num_notas, 0)
+
+
+class PaseListaEndpointTests(DatosEscolaresMixin, APITestCase):
+    """POST /api/asignaciones/<id>/pase_lista/"""
+    # Asignación, inscripciones, el INSERT ... ON CONFLICT, el recálculo de
+    # las métricas y percentiles de las inscripciones afectadas y un solo
+    # incremento de versiones al confirmar (savepoints incluidos): no depende
+    # del número de alumnos
+    consultas = 24
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.asignacion = AsignacionCursoMateria.objects.create(
+                curso=self.curso, materia=self.materia, profesor=self.profesor, anio_academico=2024,
+                periodo='Año Completo',
+            )
+        self.url = f'/api/asignaciones/{self.asignacion.pk}/pase_lista/'
+
+    def pase(self, estados, fecha='2024-05-02'):
+        # Con los incrementos de versión que se aplican al confirmar
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.url, {
+                'fecha': fecha,
+                'asistencias': [{'alumno': alumno.pk, 'estado': estado} for alumno, estado in estados],
+            }, format='json')
+
+    def filas(self):
+        return sorted(Asistencia.objects.values_list('inscripcion_id', 'materia_id', 'fecha', 'estado', 'profesor_id'))
+
+    def test_insertar_repetir_y_corregir(self):
+        estados = list(zip(self.alumnos, ['Presente', 'Ausente', 'Tarde']))
+        self.assertEqual(self.pase(estados).status_code, 200)
+        # Solo la inscripción de 2024 (la del año de la asignación) del alumno 0
+        esperadas = [
+            (inscripcion.pk, self.materia.pk, date(2024, 5, 2), estado, self.profesor.pk)
+            for inscripcion, (_, estado) in zip(self.inscripciones, estados)
+        ]
+        self.assertEqual(self.filas(), esperadas)
+
+        # El mismo pase de lista no cambia nada
+        self.assertEqual(self.pase(estados).status_code, 200)
+        self.assertEqual(self.filas(), esperadas)
+
+        # Uno corregido sobrescribe el estado sin duplicar filas
+        estados[1] = (self.alumnos[1], 'Justificado')
+        self.assertEqual(self.pase(estados).status_code, 200)
+        esperadas[1] = esperadas[1][:3] + ('Justificado',) + esperadas[1][4:]
+        self.assertEqual(self.filas(), esperadas)
+        self.assertEqual(InscripcionMetricas.objects.get(inscripcion=self.inscripciones[0]).presentes, 1)
+        self.assertEqual(InscripcionMetricas.objects.get(inscripcion=self.inscripciones[1]).total_asistencias, 1)
+
+    def test_alumno_no_inscrito(self):
+        ajeno = Alumno.objects.create(nombre='Sin', apellido='Inscripcion')
+        response = self.pase([(self.alumnos[0], 'Presente'), (ajeno, 'Presente')])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(str(ajeno.pk), response.json()['error'])
+        self.assertEqual(Asistencia.objects.count(), 0)
+
+    def test_consultas_acotadas(self):
+        # Las mismas consultas para 3 alumnos que para 13, y al repetir el pase
+        with self.assertNumQueries(self.consultas):
+            self.pase([(alumno, 'Presente') for alumno in self.alumnos])
+        with self.assertNumQueries(self.consultas):
+            self.pase([(alumno, 'Ausente') for alumno in self.alumnos])
+        with self.captureOnCommitCallbacks(execute=True):
+            nuevos = Alumno.objects.bulk_create([Alumno(nombre=f'Extra{i}', apellido='Test') for i in range(10)])
+            Inscripcion.objects.bulk_create([
+                Inscripcion(alumno=alumno, curso=self.curso, anio_academico=2024, periodo='Año Completo')
+                for alumno in nuevos
+            ])
+        with self.assertNumQueries(self.consultas):
+            self.pase([(alumno, 'Presente') for alumno in [*self.alumnos, *nuevos]], fecha='2024-05-03')
+
+
+class VersionesTests(TestCase):
+    """Los incrementos de VersionCambios se aplican una vez al confirmar."""
+
+    def test_un_incremento_por_transaccion(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                incrementar_versiones(['tabla:a'])
+                with transaction.atomic():
+                    incrementar_versiones(['tabla:a', 'tabla:b'])
+                # Sin confirmar todavía
+                self.assertEqual(obtener_versiones(['tabla:a']), {'tabla:a': 0})
+                incrementar_versiones(['tabla:b'])
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(obtener_versiones(['tabla:a', 'tabla:b']), {'tabla:a': 1, 'tabla:b': 1})
+
+    def test_rollback_no_incrementa(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(ValueError), transaction.atomic():
+                incrementar_versiones(['tabla:a'])
+                raise ValueError
+        self.assertEqual(callbacks, [])
+        self.assertEqual(obtener_versiones(['tabla:a']), {'tabla:a': 0})
+        # La transacción siguiente no suma sus claves al callback descartado
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                incrementar_versiones(['tabla:b'])
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(obtener_versiones(['tabla:a', 'tabla:b']), {'tabla:a': 0, 'tabla:b': 1})
+
+    def test_rollback_de_savepoint(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                with self.assertRaises(ValueError), transaction.atomic():
+                    incrementar_versiones(['tabla:a'])
+                    raise ValueError
+                incrementar_versiones(['tabla:b'])
+                incrementar_versiones(['tabla:c'])
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(obtener_versiones(['tabla:a', 'tabla:b', 'tabla:c']),
+                         {'tabla:a': 0, 'tabla:b': 1, 'tabla:c': 1})
+
+
+class GetCondicionalEndpointTests(DatosEscolaresMixin, APITestCase):
+    """ETag de los listados frente a escrituras reales."""
+    url = '/api/notas/?anio_academico=2024'
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.nota(self.inscripciones[0], '70.00').save()
+
+    def etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def test_304_con_if_none_match(self):
+        etag = self.etag()
+        # Solo las versiones: la tabla no se consulta
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_escritura_cambia_etag(self):
+        etag = self.etag()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f'/api/notas/{Nota.objects.get().pk}/', {'calificacion': '71.00'})
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        # ?anio_academico= cruza Inscripcion; Profesor no interviene
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Profesor.objects.filter(pk=self.profesor.pk).update(nombre='Ana María')
+        self.assertEqual(self.etag(), etag)
+        with self.captureOnCommitCallbacks(execute=True):
+            Inscripcion.objects.filter(pk=self.inscripciones[2].pk).update(estado_inscripcion='Retirada')
+        self.assertNotEqual(self.etag(), etag)
+
+    def test_loaddata_cambia_etag(self):
+        etag = self.etag()
+        datos = [{'model': 'gestion_escolar.nota', 'pk': 900, 'fields': {
+            'inscripcion': self.inscripciones[1].pk, 'materia': self.materia.pk, 'profesor': self.profesor.pk,
+            'tipo_evaluacion': 'Tarea', 'calificacion': '88.00', 'fecha_evaluacion': '2024-05-03',
+        }}]
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as fixture:
+            json.dump(datos, fixture)
+            fixture.flush()
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command('loaddata', fixture.name, verbosity=0)
+        self.assertNotEqual(self.etag(), etag)
+
+
+class CacheConsultasEndpointTests(DatosEscolaresMixin, APITestCase):
+    """Caché de consultas de NotaViewSet: una escritura en sus tablas (Nota y,
+    con ?anio_academico=, Inscripcion) hace fallar la siguiente lectura."""
+    url = '/api/notas/?anio_academico=2024'
+
+    def setUp(self):
+        caches[cache_consultas.alias].clear()
+        cache_consultas.limpiar_estadisticas()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.nota(self.inscripciones[0], '70.00').save()
+
+    def get(self, resultado):
+        anterior = cache_consultas.estadisticas()['endpoints'].get('nota', {resultado: 0})[resultado]
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(cache_consultas.estadisticas()['endpoints']['nota'][resultado], anterior + 1)
+        return response.json()
+
+    def test_acierto_y_fallo_tras_escribir(self):
+        datos = self.get('fallos')
+        # Desde la caché: solo la consulta de versiones
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get('aciertos'), datos)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f'/api/notas/{Nota.objects.get().pk}/', {'calificacion': '71.00'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(self.get('fallos'), datos)
+        self.get('aciertos')
+
+        # Profesor no interviene en la consulta; Inscripcion sí, por el filtro
+        with self.captureOnCommitCallbacks(execute=True):
+            Profesor.objects.filter(pk=self.profesor.pk).update(nombre='Ana María')
+        self.get('aciertos')
+        with self.captureOnCommitCallbacks(execute=True):
+            Inscripcion.objects.filter(pk=self.inscripciones[2].pk).update(estado_inscripcion='Retirada')
+        self.get('fallos')
+
+
+class PrediccionesPrecalculadasTests(ModelosPruebaMixin, DatosEscolaresMixin, APITestCase):
+    """/api/mlmodel/ solo sirve PrediccionAlumno mientras siga al día."""
+
+    def setUp(self):
+        super().setUp()
+        self.datos = {'curso_id': self.curso.pk, 'anio_academico': 2024}
+        call_command('calcular_predicciones', anio_academico=2024, procesos=1, stdout=io.StringIO())
+
+    def assertAlumnos(self, esperados, precalculadas):
+        with mock.patch('gestion_escolar.views.predecir_grupo', wraps=predecir_grupo) as recalculo:
+            resultados = self.predecir(self.datos)
+        self.assertEqual([r['alumno_id'] for r in resultados], [alumno.pk for alumno in esperados])
+        self.assertEqual(recalculo.called, not precalculadas)
+
+    def test_update_de_inscripciones(self):
+        self.assertAlumnos(self.alumnos, precalculadas=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            Inscripcion.objects.filter(pk=self.inscripciones[1].pk).update(estado_inscripcion='Retirada')
+        self.assertAlumnos([self.alumnos[0], self.alumnos[2]], precalculadas=False)
+
+    def test_bulk_update_de_inscripciones(self):
+        self.inscripciones[2].estado_inscripcion = 'Suspendida'
+        with self.captureOnCommitCallbacks(execute=True):
+            Inscripcion.objects.bulk_update([self.inscripciones[2]], ['estado_inscripcion'])
+        self.assertAlumnos(self.alumnos[:2], precalculadas=False)
+
+
+class PrediccionesCacheTests(ModelosPruebaMixin, DatosEscolaresMixin, APITestCase):
+    """Caché de /api/mlmodel/: acierta mientras no cambien los datos del grupo
+    y falla tras escribir en sus notas, alumnos o inscripciones, sea con
+    save() o con operaciones masivas."""
+
+    def prediccion(self, datos, acierto):
+        aciertos = cache_predicciones.estadisticas()['aciertos']
+        resultados = self.predecir(datos)
+        self.assertEqual(cache_predicciones.estadisticas()['aciertos'] - aciertos, int(acierto))
+        return resultados
+
+    def assertInvalida(self, escribir, datos):
+        self.prediccion(datos, acierto=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            escribir()
+        resultados = self.prediccion(datos, acierto=False)
+        self.prediccion(datos, acierto=True)
+        return resultados
+
+    def test_curso(self):
+        datos = {'curso_id': self.curso.pk}
+        self.prediccion(datos, acierto=False)
+        self.assertInvalida(lambda: self.nota(self.inscripciones[0], '95.00').save(), datos)
+        self.assertInvalida(lambda: Nota.objects.update(calificacion=Decimal('20.00')), datos)
+        resultados = self.assertInvalida(
+            lambda: Alumno.objects.filter(pk=self.alumnos[1].pk).update(nombre='Renombrado'), datos
+        )
+        self.assertEqual(resultados[1]['alumno'], 'Renombrado Test')
+        alumno = self.alumnos[2]
+        alumno.nombre = 'Otro'
+        self.assertInvalida(lambda: Alumno.objects.bulk_update([alumno], ['nombre']), datos)
+        self.assertInvalida(lambda: self.inscripciones[0].delete(), datos)
+        self.assertInvalida(
+            lambda: Inscripcion.objects.filter(pk=self.inscripciones[1].pk).update(curso=Curso.objects.create(
+                nombre_curso='Primero B'
+            )),
+            datos,
+        )
+
+    def test_alumnos(self):
+        datos = {'alumnos_ids': [self.alumnos[0].pk, self.alumnos[1].pk]}
+        self.prediccion(datos, acierto=False)
+        # Otro alumno no cambia el grupo
+        with self.captureOnCommitCallbacks(execute=True):
+            Alumno.objects.filter(pk=self.alumnos[2].pk).update(nombre='Ajeno')
+        self.prediccion(datos, acierto=True)
+        resultados = self.assertInvalida(
+            lambda: Alumno.objects.filter(pk=self.alumnos[0].pk).update(apellido='Nuevo'), datos
+        )
+        self.assertEqual(resultados[0]['alumno'], 'Alumno0 Nuevo')
+        self.assertInvalida(
+            lambda: Inscripcion.objects.filter(pk=self.inscripciones[1].pk).update(estado_inscripcion='Retirada'),
+            datos,
+        )
+
+
+class PrediccionesStreamingTests(ModelosPruebaMixin, DatosEscolaresMixin, APITestCase):
+    """Modo streaming de /api/mlmodel/ (?stream=1 o 'Accept: application/x-ndjson'):
+    una línea por alumno con el mismo resultado que el modo normal."""
+
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            Nota.objects.bulk_create([
+                self.nota(inscripcion, calificacion)
+                for inscripcion, calificacion in zip(self.inscripciones, ('35.00', '68.50', '97.00'))
+            ])
+            Asistencia.objects.bulk_create([
+                self.asistencia(self.inscripciones[0], 2, 'Ausente'), self.asistencia(self.inscripciones[2], 2),
+            ])
+            Participacion.objects.bulk_create([self.participacion(self.inscripciones[1], 3, '7.50')])
+
+    def lineas(self, datos, ruta='/api/mlmodel/?stream=1', **extra):
+        response = self.client.post(ruta, datos, format='json', **extra)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        contenido = b''.join(response.streaming_content).decode()
+        self.assertTrue(contenido.endswith('\n'))
+        return [json.loads(linea) for linea in contenido.splitlines()]
+
+    def test_mismo_resultado_que_json(self):
+        for datos in ({'curso_id': self.curso.pk}, {'curso_id': self.curso.pk, 'anio_academico': 2024},
+                      {'alumnos_ids': [self.alumnos[2].pk, self.alumnos[0].pk]}):
+            esperados = self.predecir(datos)
+            self.assertTrue(esperados)
+            self.assertEqual(self.lineas(datos), esperados)
+            self.assertEqual(self.lineas(datos, '/api/mlmodel/', HTTP_ACCEPT='application/x-ndjson'), esperados)
+
+    @override_settings(ML_STREAM_TAMANIO_BLOQUE_MAXIMO=2)
+    def test_tamanio_bloque_acotado(self):
+        datos = {'curso_id': self.curso.pk, 'anio_academico': 2024}
+        esperados = self.predecir(datos)
+        for pedido, usado in (('0', 1), ('-5', 1), ('1', 1), ('2', 2), ('1000', 2)):
+            with self.subTest(tamanio_bloque=pedido), \
+                    mock.patch('gestion_escolar.views.metricas_alumnos_por_bloques',
+                               wraps=metricas_alumnos_por_bloques) as por_bloques:
+                self.assertEqual(self.lineas(datos, f'/api/mlmodel/?stream=1&tamanio_bloque={pedido}'), esperados)
+                self.assertTrue(por_bloques.called)
+                self.assertEqual({llamada.args[2] for llamada in por_bloques.call_args_list}, {usado})
+
+    def test_tamanio_bloque_invalido(self):
+        for pedido in ('abc', '1.5', ''):
+            with self.subTest(tamanio_bloque=pedido):
+                response = self.client.post(f'/api/mlmodel/?stream=1&tamanio_bloque={pedido}',
+                                            {'curso_id': self.curso.pk}, format='json')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('tamanio_bloque', response.data['error'])
+
+
+class PrediccionesVentanaTests(ModelosPruebaMixin, DatosEscolaresMixin, APITestCase):
+    """Filtros periodo, materia_id, fecha_desde y fecha_hasta de /api/mlmodel/."""
+
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            Nota.objects.bulk_create([
+                self.nota(self.inscripciones[0], '40.00'),
+                self.nota(self.inscripciones[0], '90.00', materia=self.otra_materia, fecha_evaluacion=date(2024, 6, 10)),
+                self.nota(self.inscripciones[1], '80.00'),
+                self.nota(self.inscripciones[2], '70.00', fecha_evaluacion=date(2024, 6, 1)),
+            ])
+            Inscripcion.objects.filter(pk=self.inscripciones[2].pk).update(periodo='Semestre 1')
+        self.grupo = {'curso_id': self.curso.pk, 'anio_academico': 2024}
+
+    def evaluaciones(self, **ventana):
+        return {r['alumno_id']: r['evaluaciones'] for r in self.predecir({**self.grupo, **ventana})}
+
+    def test_materia(self):
+        a, b, c = (alumno.pk for alumno in self.alumnos)
+        self.assertEqual(self.evaluaciones(), {a: 65.0, b: 80.0, c: 70.0})
+        self.assertEqual(self.evaluaciones(materia_id=self.materia.pk), {a: 40.0, b: 80.0, c: 70.0})
+        self.assertEqual(self.evaluaciones(materia_id=self.otra_materia.pk), {a: 90.0, b: 0, c: 0})
+
+    def test_fechas(self):
+        a, b, c = (alumno.pk for alumno in self.alumnos)
+        self.assertEqual(self.evaluaciones(fecha_desde='2024-06-01'), {a: 90.0, b: 0, c: 70.0})
+        self.assertEqual(self.evaluaciones(fecha_hasta='2024-05-31'), {a: 40.0, b: 80.0, c: 0})
+        # Ambas fechas son inclusivas
+        self.assertEqual(self.evaluaciones(fecha_desde='2024-05-02', fecha_hasta='2024-05-02'), {a: 40.0, b: 80.0, c: 0})
+        self.assertEqual(
+            self.evaluaciones(materia_id=self.materia.pk, fecha_desde='2024-06-01', fecha_hasta='2024-06-30'),
+            {a: 0, b: 0, c: 70.0},
+        )
+
+    def test_periodo(self):
+        a, b, c = (alumno.pk for alumno in self.alumnos)
+        self.assertEqual(self.evaluaciones(periodo='Año Completo'), {a: 65.0, b: 80.0})
+        self.assertEqual(self.evaluaciones(periodo='Semestre 1'), {c: 70.0})
+        self.assertEqual(self.evaluaciones(periodo='Semestre 2'), {})
+
+    def test_cache(self):
+        # El periodo forma parte de la clave de la caché
+        aciertos = cache_predicciones.estadisticas()['aciertos']
+        self.predecir(self.grupo)
+        self.predecir({**self.grupo, 'periodo': 'Semestre 1'})
+        self.predecir({**self.grupo, 'periodo': 'Semestre 1'})
+        self.assertEqual(cache_predicciones.estadisticas()['aciertos'] - aciertos, 1)
+        # Con materia o fechas no se cachea: las versiones no cambian si una
+        # nota pasa a otra materia o fecha sin cambiar de calificación
+        for ventana in ({'materia_id': self.materia.pk}, {'fecha_desde': '2024-06-01'}, {'fecha_hasta': '2024-06-01'}):
+            with self.subTest(**ventana), \
+                    mock.patch.object(cache_predicciones, 'obtener') as obtener, \
+                    mock.patch.object(cache_predicciones, 'guardar') as guardar:
+                self.predecir({**self.grupo, **ventana})
+                self.predecir({**self.grupo, **ventana}, QUERY_STRING='cascada=1')
+                obtener.assert_not_called()
+                guardar.assert_not_called()
+
+    def test_ventana_invalida(self):
+        for ventana in ({'materia_id': 'x'}, {'fecha_desde': '2024-13-01'}, {'fecha_hasta': '02/05/2024'},
+                        {'fecha_desde': '2024-06-02', 'fecha_hasta': '2024-06-01'}):
+            for ruta in ('/api/mlmodel/', '/api/mlmodel/?stream=1'):
+                with self.subTest(ruta=ruta, **ventana):
+                    response = self.client.post(ruta, {**self.grupo, **ventana}, format='json')
+                    self.assertEqual(response.status_code, 400)
+                    self.assertIn('fecha', response.data['error'])
+
+
+class PaginacionCursorTests(DatosEscolaresMixin, APITestCase):
+    """PaginacionCursor en los listados del router: recorrido por cursor,
+    tamaño de página acotado y páginas estables aunque se inserten o borren
+    filas durante el recorrido."""
+
+    def setUp(self):
+        caches[cache_consultas.alias].clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.notas = Nota.objects.bulk_create([
+                self.nota(self.inscripciones[i % 3], f'{50 + i}.00') for i in range(7)
+            ])
+
+    def pagina(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        datos = response.json()
+        return [fila['id'] for fila in datos['results']], datos['next'], datos['previous']
+
+    def recorrer(self, url):
+        paginas = []
+        while url:
+            ids, url, _ = self.pagina(url)
+            paginas.append(ids)
+        return paginas
+
+    def test_recorrido(self):
+        ids = [nota.pk for nota in self.notas]
+        for lectura_rapida in (True, False):
+            with self.subTest(lectura_rapida=lectura_rapida), \
+                    mock.patch.object(NotaViewSet, 'lectura_rapida', lectura_rapida):
+                caches[cache_consultas.alias].clear()
+                self.assertEqual(self.recorrer('/api/notas/?tamanio_pagina=3'), [ids[:3], ids[3:6], ids[6:]])
+                # 'previous' vuelve a la página anterior
+                _, siguiente, anterior = self.pagina('/api/notas/?tamanio_pagina=3')
+                self.assertIsNone(anterior)
+                _, _, anterior = self.pagina(siguiente)
+                self.assertEqual(self.pagina(anterior)[0], ids[:3])
+                # Los filtros se conservan en los enlaces
+                self.assertEqual(
+                    self.recorrer(f'/api/notas/?tamanio_pagina=2&inscripcion={self.inscripciones[0].pk}'),
+                    [[ids[0], ids[3]], [ids[6]]],
+                )
+
+    def test_tamanio_pagina(self):
+        maximo = settings.API_TAMANIO_PAGINA_MAXIMO
+        self.assertEqual(PaginacionCursor.max_page_size, maximo)
+        with self.captureOnCommitCallbacks(execute=True):
+            Materia.objects.bulk_create([Materia(nombre_materia=f'Materia {i}') for i in range(maximo + 1)])
+        self.assertEqual(len(self.pagina('/api/materias/')[0]), settings.API_TAMANIO_PAGINA)
+        ids, siguiente, _ = self.pagina(f'/api/materias/?tamanio_pagina={maximo + 50}')
+        self.assertEqual(len(ids), maximo)
+        self.assertEqual(len(self.pagina(siguiente)[0]), 3)
+        # Un tamaño no válido usa el de por defecto
+        self.assertEqual(len(self.pagina('/api/materias/?tamanio_pagina=abc')[0]), settings.API_TAMANIO_PAGINA)
+
+    def test_inserciones_concurrentes(self):
+        ids = [nota.pk for nota in self.notas]
+        leidos, siguiente, _ = self.pagina('/api/notas/?tamanio_pagina=3')
+        # Entre página y página: se borra una fila ya leída y otra pendiente,
+        # y se insertan filas nuevas
+        with self.captureOnCommitCallbacks(execute=True):
+            Nota.objects.filter(pk__in=[ids[0], ids[4]]).delete()
+            nuevas = Nota.objects.bulk_create([self.nota(self.inscripciones[0], '99.00') for _ in range(2)])
+        paginas = self.recorrer(siguiente)
+        # Sin saltos ni repeticiones (con OFFSET, borrar ids[0] saltaría ids[3])
+        self.assertEqual(paginas[0], [ids[3], ids[5], ids[6]])
+        recorrido = leidos + [pk for pagina in paginas for pk in pagina]
+        self.assertEqual(recorrido, ids[:4] + ids[5:] + [nota.pk for nota in nuevas])
+
+
+class FiltrosDeclaradosTests(DatosEscolaresMixin, APITestCase):
+    """Filtros de los listados (filtros.py): cada conversor filtra, un valor
+    no válido responde 400 y los parámetros no declarados se ignoran."""
+
+    def setUp(self):
+        caches[cache_consultas.alias].clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.notas = Nota.objects.bulk_create([
+                self.nota(self.inscripciones[0], '60.00', fecha_evaluacion=date(2024, 3, 1)),
+                self.nota(self.inscripciones[1], '70.00', materia=self.otra_materia, fecha_evaluacion=date(2024, 4, 15)),
+                self.nota(self.inscripciones[2], '80.00', fecha_evaluacion=date(2024, 4, 30)),
+                self.nota(self.inscripcion_anterior, '90.00', fecha_evaluacion=date(2023, 4, 15)),
+            ])
+            self.curso_inactivo = Curso.objects.create(nombre_curso='Primero B', activo=False)
+
+    def ids(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [fila['id'] for fila in response.json()['results']]
+
+    def notas_filtradas(self, consulta):
+        return self.ids(f'/api/notas/?{consulta}')
+
+    def test_entero(self):
+        n = [nota.pk for nota in self.notas]
+        self.assertEqual(self.notas_filtradas(f'materia={self.otra_materia.pk}'), [n[1]])
+        self.assertEqual(self.notas_filtradas('anio_academico=2023'), [n[3]])
+        # alumno y anio_academico se aplican a la misma inscripción
+        self.assertEqual(self.notas_filtradas(f'alumno={self.alumnos[0].pk}&anio_academico=2024'), [n[0]])
+
+    def test_rango_fechas(self):
+        n = [nota.pk for nota in self.notas]
+        self.assertEqual(self.notas_filtradas('fecha__gte=2024-04-15'), [n[1], n[2]])
+        self.assertEqual(self.notas_filtradas('fecha__lte=2024-04-15'), [n[0], n[1], n[3]])
+        self.assertEqual(self.notas_filtradas('fecha__gte=2024-04-15&fecha__lte=2024-04-15'), [n[1]])
+
+    def test_booleano(self):
+        for valor, esperados in (('1', [self.curso.pk]), ('true', [self.curso.pk]), ('False', [self.curso_inactivo.pk]),
+                                 ('0', [self.curso_inactivo.pk])):
+            with self.subTest(activo=valor):
+                self.assertEqual(self.ids(f'/api/cursos/?activo={valor}'), esperados)
+
+    def test_valor_no_valido(self):
+        for url, parametro in (('/api/notas/?materia=abc', 'materia'), ('/api/notas/?anio_academico=2024.5', 'anio_academico'),
+                               ('/api/notas/?fecha__gte=2024-02-30', 'fecha__gte'),
+                               ('/api/notas/?fecha__lte=15/04/2024', 'fecha__lte'), ('/api/cursos/?activo=si', 'activo'),
+                               ('/api/export/notas/?materia=abc', 'materia')):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(list(response.data), [parametro])
+        # Se informan todos los parámetros no válidos a la vez
+        response = self.client.get('/api/notas/?materia=abc&fecha__gte=ayer&alumno=1')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data), {'materia', 'fecha__gte'})
+
+    def test_parametros_ignorados(self):
+        todas = [nota.pk for nota in self.notas]
+        # No declarados (calificacion no es un filtro de NotaViewSet) o vacíos
+        self.assertEqual(self.notas_filtradas('calificacion=60&desconocido=x&materia=&fecha__gte='), todas)
+        # Los de otro ViewSet tampoco filtran
+        self.assertEqual(self.ids('/api/materias/?materia=abc&activo=si'), [self.materia.pk, self.otra_materia.pk])
+
+
+class HistorialEntrenamientoTests(DatosEscolaresMixin, TestCase):
+    """extraer_historial y 'manage.py entrenar_historial' frente a valores
+    calculados a mano."""
+
+    def setUp(self):
+        primera, sin_final, tercera = self.inscripciones
+        final = {'tipo_evaluacion': 'Examen Final'}
+        with self.captureOnCommitCallbacks(execute=True):
+            Nota.objects.bulk_create([
+                # Evaluaciones (60 + 80) / 2 = 70; nota final (75 + 85.5) / 2 = 80.25
+                self.nota(primera, '60.00'), self.nota(primera, '80.00'),
+                self.nota(primera, '75.00', **final), self.nota(primera, '85.50', **final),
+                # Sin examen final: no es una muestra
+                self.nota(sin_final, '50.00'),
+                # Solo el examen final cuenta para la nota, no para las evaluaciones
+                self.nota(tercera, '90.00'), self.nota(tercera, '65.50', **final),
+                self.nota(self.inscripcion_anterior, '40.00'), self.nota(self.inscripcion_anterior, '30.00', **final),
+            ])
+            # Asistencia 3 de 4 = 75; participación (7.5 + 8.5) / 2 * 10 = 80
+            Asistencia.objects.bulk_create([
+                self.asistencia(primera, dia, estado) for dia, estado in
+                ((2, 'Presente'), (3, 'Presente'), (6, 'Ausente'), (7, 'Presente'))
+            ] + [self.asistencia(sin_final, 2)])
+            Participacion.objects.bulk_create([
+                self.participacion(primera, 2, '7.50'), self.participacion(primera, 3, '8.50'),
+                self.participacion(sin_final, 2, '10.00'),
+            ])
+        self.primera = {'asistencia': 75.0, 'participaciones': 80.0, 'evaluaciones': 70.0, 'nota_final': 80.25,
+                        'rendimiento': 'Alto rendimiento'}
+        # Sin asistencias ni participaciones: 0
+        self.tercera = {'asistencia': 0.0, 'participaciones': 0.0, 'evaluaciones': 90.0, 'nota_final': 65.5,
+                        'rendimiento': 'Promedio'}
+        self.anterior = {'asistencia': 0.0, 'participaciones': 0.0, 'evaluaciones': 40.0, 'nota_final': 30.0,
+                         'rendimiento': 'Bajo rendimiento'}
+
+    def assertHistorial(self, df, esperadas):
+        self.assertEqual(list(df.columns), [*modelo.COLUMNAS_FEATURES, 'nota_final', 'rendimiento'])
+        self.assertEqual(df.to_dict('records'), esperadas)
+
+    def test_extraer_historial(self):
+        self.assertHistorial(extraer_historial([2024]), [self.primera, self.tercera])
+        self.assertHistorial(extraer_historial([2023, 2024]), [self.primera, self.tercera, self.anterior])
+        self.assertHistorial(extraer_historial([2022]), [])
+        # Bloques de una fila: mismo resultado
+        self.assertHistorial(extraer_historial([2023, 2024], chunk_size=1), [self.primera, self.tercera, self.anterior])
+
+    def test_limite(self):
+        # Las N primeras inscripciones por id, tengan o no examen final
+        self.assertHistorial(extraer_historial([2024], limite=1), [self.primera])
+        self.assertHistorial(extraer_historial([2024], limite=2), [self.primera])
+        self.assertHistorial(extraer_historial([2024], limite=3, chunk_size=2), [self.primera, self.tercera])
+        self.assertHistorial(extraer_historial([2023, 2024], limite=10), [self.primera, self.tercera, self.anterior])
+
+    def test_escalas(self):
+        entrenar = mock.Mock(return_value=(None, None, {'r2': 1.0}))
+        salida = io.StringIO()
+        with mock.patch('gestion_escolar.management.commands.entrenar_historial.entrenar_modelos', entrenar), \
+                mock.patch.object(modelo.registro_modelos, 'publicar') as publicar:
+            call_command('entrenar_historial', anios=[2023, 2024], escalas=[4, 3], stdout=salida)
+        # De menor a mayor y sin publicar
+        self.assertEqual([len(llamada.args[0]) for llamada in entrenar.call_args_list], [2, 3])
+        publicar.assert_not_called()
+        self.assertIn('3 inscripciones', salida.getvalue())
+        self.assertIn('Extracción: 2 muestras', salida.getvalue())
+
+
+class CosteEscrituraTests(DatosEscolaresMixin, TestCase):
+    """Consultas que cuesta escribir un registro académico con las métricas,
+    los percentiles y las versiones al día (ver RegistroAcademicoQuerySet):
+    si cambian, que sea a propósito."""
+
+    def consultas(self, escribir):
+        with CaptureQueriesContext(connection) as capturadas, self.captureOnCommitCallbacks(execute=True):
+            escribir()
+        return capturadas.captured_queries
+
+    def test_save(self):
+        nota = self.nota(self.inscripciones[0], '70.00')
+        # INSERT + 17: grupo de la inscripción, deltas de InscripcionMetricas y
+        # AlumnoMetricas, PercentilesCurso (SELECT ... FOR UPDATE y UPDATE),
+        # versiones al confirmar y los savepoints
+        self.assertEqual(len(self.consultas(nota.save)), 18)
+        # + el SELECT de los valores previos (pre_save)
+        nota.calificacion = Decimal('75.00')
+        self.assertEqual(len(self.consultas(nota.save)), 19)
+        self.assertEqual(len(self.consultas(nota.delete)), 16)
+
+    def test_borrado_en_cascada(self):
+        # Inscripcion.delete() borra sus registros con el Collector de Django,
+        # que envía post_delete fila a fila: 11 consultas más por registro
+        def borrar_inscripcion(n):
+            with self.captureOnCommitCallbacks(execute=True):
+                inscripcion = Inscripcion.objects.create(
+                    alumno=self.alumnos[1], curso=self.curso, anio_academico=2030 + n, periodo='Año Completo'
+                )
+                Nota.objects.bulk_create([self.nota(inscripcion, '50.00') for _ in range(n)])
+                Asistencia.objects.bulk_create([self.asistencia(inscripcion, dia) for dia in range(1, n + 1)])
+            return len(self.consultas(inscripcion.delete))
+
+        self.assertEqual([borrar_inscripcion(n) for n in (1, 2, 4)], [38, 60, 104])
+
+    def test_delete_masivo(self):
+        # Un solo DELETE (QuerySet._raw_delete) y un recálculo por QuerySet,
+        # sin post_delete, sea cual sea el número de filas
+        receptor = mock.Mock()
+        post_delete.connect(receptor, sender=Nota)
+        self.addCleanup(post_delete.disconnect, receptor, sender=Nota)
+        inscripcion = self.inscripciones[2]
+        for n in (1, 5):
+            with self.subTest(filas=n):
+                with self.captureOnCommitCallbacks(execute=True):
+                    Nota.objects.bulk_create([self.nota(inscripcion, '50.00') for _ in range(n)])
+                consultas = self.consultas(lambda: self.assertEqual(
+                    Nota.objects.filter(inscripcion=inscripcion).delete(), (n, {'gestion_escolar.Nota': n})
+                ))
+                self.assertEqual(len(consultas), 23)
+                self.assertEqual(sum(consulta['sql'].startswith('DELETE') for consulta in consultas), 1)
+                self.assertEqual(InscripcionMetricas.objects.get(inscripcion=inscripcion).num_notas, 0)
+        receptor.assert_not_called()
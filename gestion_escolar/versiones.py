@@ -0,0 +1,132 @@
+# gestion_escolar/versiones.py
+import threading
+import weakref
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Inscripcion, VersionCambios
+
+
+def clave_curso(curso_id):
+    return f'curso:{curso_id}'
+
+
+def clave_alumno(alumno_id):
+    return f'alumno:{alumno_id}'
+
+
+def clave_tabla(modelo):
+    return f'tabla:{modelo._meta.label_lower}'
+
+
+# Los incrementos se aplican al confirmar la transacción y una sola vez por
+# transacción: un lote de N filas en un atomic() (lotes.py, pase_lista,
+# bulk_create) no actualiza N veces las mismas filas de VersionCambios ni
+# mantiene su bloqueo (tabla:<modelo> la escriben todas las peticiones) hasta
+# el final del lote. Fuera de un atomic() se aplican en el acto. Si la
+# transacción se revierte no se incrementa nada, y si se revierte un savepoint
+# las claves registradas dentro pueden incrementarse igual: una versión de más
+# solo cuesta un fallo de caché.
+#
+# Las claves de la transacción en curso se acumulan en un solo callback de
+# on_commit() por hilo (cada hilo tiene su conexión). Se guarda una weakref:
+# si Django lo descarta (rollback de la transacción o del savepoint en el que
+# se registró) deja de tener referencias y la siguiente clave registra otro.
+_pendiente = threading.local()
+
+
+class _IncrementoPendiente:
+    """Callback de on_commit() que acumula las claves de toda la transacción."""
+
+    def __init__(self):
+        self.claves = set()
+
+    def __call__(self):
+        # Las claves que lleguen después van a un callback nuevo, también si
+        # captureOnCommitCallbacks(execute=True) lo ejecuta sin cerrar la
+        # transacción
+        if _incremento_pendiente() is self:
+            _pendiente.ref = None
+        _aplicar_incremento(self.claves)
+
+
+def _incremento_pendiente():
+    ref = getattr(_pendiente, 'ref', None)
+    return ref() if ref is not None else None
+
+
+def _aplicar_incremento(claves):
+    with transaction.atomic():
+        VersionCambios.objects.bulk_create(
+            [VersionCambios(clave=clave) for clave in claves], ignore_conflicts=True
+        )
+        VersionCambios.objects.filter(clave__in=claves).update(
+            version=F('version') + 1, actualizado=timezone.now()
+        )
+
+
+def incrementar_versiones(claves):
+    """Hace avanzar la versión de cada clave (creándola si no existía) al
+    confirmar la transacción en curso."""
+    claves = {clave for clave in claves if clave}
+    if not claves:
+        return
+    if not connection.in_atomic_block:
+        _aplicar_incremento(claves)
+        return
+    pendiente = _incremento_pendiente()
+    if pendiente is None:
+        pendiente = _IncrementoPendiente()
+        transaction.on_commit(pendiente)
+        _pendiente.ref = weakref.ref(pendiente)
+    pendiente.claves |= claves
+
+
+def obtener_versiones(claves):
+    """Devuelve {clave: version} en una sola consulta; 0 si la clave nunca cambió."""
+    claves = list(claves)
+    versiones = dict(VersionCambios.objects.filter(clave__in=claves).values_list('clave', 'version'))
+    return {clave: versiones.get(clave, 0) for clave in claves}
+
+
+def incrementar_versiones_inscripciones(inscripciones):
+    """Recibe pares (alumno_id, curso_id) y hace avanzar la versión de cada
+    alumno y de cada curso afectados."""
+    claves = set()
+    for alumno_id, curso_id in inscripciones:
+        claves.add(clave_alumno(alumno_id))
+        claves.add(clave_curso(curso_id))
+    incrementar_versiones(claves)
+
+
+def incrementar_versiones_alumnos(alumnos_ids):
+    """Hace avanzar la versión de cada alumno y de los cursos en los que está
+    inscrito (su nombre sale en los resultados de /api/mlmodel/)."""
+    alumnos_ids = set(alumnos_ids)
+    if not alumnos_ids:
+        return
+    cursos = Inscripcion.objects.filter(alumno_id__in=alumnos_ids).values_list('curso_id', flat=True).distinct()
+    incrementar_versiones(
+        [clave_alumno(alumno_id) for alumno_id in alumnos_ids] + [clave_curso(curso_id) for curso_id in cursos]
+    )
+
+
+def incrementar_versiones_tablas(modelos):
+    """Hace avanzar la versión de la tabla de cada modelo (cualquier alta,
+    cambio o baja en ella)."""
+    incrementar_versiones(clave_tabla(modelo) for modelo in modelos)
+
+
+def versiones_tablas(modelos):
+    """{modelo: (version, actualizado)} en una sola consulta; (0, None) si la
+    tabla nunca cambió desde que existe el contador."""
+    claves = {clave_tabla(modelo): modelo for modelo in modelos}
+    filas = {
+        clave: (version, actualizado)
+        for clave, version, actualizado in VersionCambios.objects.filter(clave__in=claves).values_list(
+            'clave', 'version', 'actualizado'
+        )
+    }
+    return {modelo: filas.get(clave, (0, None)) for clave, modelo in claves.items()}
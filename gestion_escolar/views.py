@@ -1,17 +1,23 @@
 # gestion_escolar/views.py
 from rest_framework import viewsets
+from rest_framework.decorators import action
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.settings import api_settings
 from django.contrib.auth import authenticate
-from django.db.models import Avg, Count, Q, F
-from django.http import HttpResponse
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
 from django.core.management import call_command
+from django.db import transaction
 import io
+import itertools
+import math
+from datetime import date
 
 # --- CORRECCIÓN 1: Imports del modelo y librerías ---
 # Importa los MODELOS YA CARGADOS y las funciones desde modelo.py
-from modelo import modelo_regresion, modelo_clasificacion, generar_recomendaciones
+from modelo import COLUMNAS_FEATURES, obtener_modelos
 # Importa pandas directamente en este archivo
 import pandas as pd
 # El resto de tus imports
@@ -21,11 +27,24 @@ from .models import (
     Nota, Asistencia, ActividadProyecto, EntregaActividad, Participacion,
     Tutor, AlumnoTutor, Usuario
 )
+from .cache_consultas import cache_consultas
+from .cache_predicciones import cache_predicciones, clave_prediccion
+from .condicional import GetCondicionalMixin
+from .filtros import booleano, entero, rango_fechas, texto
+from .lectura import LecturaRapidaMixin
+from .lotes import OperacionesMasivasMixin
+from .prediccion import (
+    metricas_alumnos_por_bloques, percentiles_grupo, percentiles_guardados, predecir_grupo,
+    predicciones_precalculadas, resultados_prediccion, simular_grupo, ventana_por_registros
+)
+from .exportacion import EXPORTADORES
+from .renderers import CSVRenderer, NDJSONRenderer, linea_ndjson
 from .serializers import (
     AlumnoSerializer, ProfesorSerializer, CursoSerializer, MateriaSerializer,
     AsignacionCursoMateriaSerializer, InscripcionSerializer, NotaSerializer,
     AsistenciaSerializer, ActividadProyectoSerializer, EntregaActividadSerializer,
-    ParticipacionSerializer, TutorSerializer, AlumnoTutorSerializer, UsuarioSerializer
+    ParticipacionSerializer, TutorSerializer, AlumnoTutorSerializer, UsuarioSerializer,
+    PaseListaSerializer, parametros_lectura, rutas_select_related,
 )
 
 
@@ -33,63 +52,184 @@ from .serializers import (
 # TUS VIEWSETS (No necesitan cambios)
 # ==============================================================================
 
-class AlumnoViewSet(viewsets.ModelViewSet):
+class ConsultaOptimizadaMixin:
+    """Ajusta el queryset de las lecturas a ?fields= y ?expand= (ver
+    CamposDinamicosMixin en serializers.py): select_related() de las
+    relaciones expandidas, para que anidarlas no lance una consulta por fila,
+    y only() de las columnas pedidas, para no leer las que no se devuelven
+    (p. ej. comentarios_profesor). Una página cuesta siempre las mismas
+    consultas, sea cual sea su tamaño."""
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method != 'GET':
+            return queryset
+        campos, expandir = parametros_lectura(self.request)
+        relaciones = rutas_select_related(self.get_serializer_class(), expandir)
+        if relaciones:
+            queryset = queryset.select_related(*relaciones)
+        if campos is not None:
+            columnas = [
+                campo.name for campo in queryset.model._meta.concrete_fields if campo.name in campos
+            ]
+            queryset = queryset.only(*columnas)
+        return queryset
+
+
+class AlumnoViewSet(GetCondicionalMixin, ConsultaOptimizadaMixin, LecturaRapidaMixin, viewsets.ModelViewSet):
     queryset = Alumno.objects.all()
     serializer_class = AlumnoSerializer
+    filtros = {'email': ('email', texto)}
 
-class ProfesorViewSet(viewsets.ModelViewSet):
+class ProfesorViewSet(GetCondicionalMixin, ConsultaOptimizadaMixin, LecturaRapidaMixin, viewsets.ModelViewSet):
     queryset = Profesor.objects.all()
     serializer_class = ProfesorSerializer
 
 # ... (el resto de tus ViewSets que ya estaban bien) ...
 
-class CursoViewSet(viewsets.ModelViewSet):
+class CursoViewSet(GetCondicionalMixin, ConsultaOptimizadaMixin, LecturaRapidaMixin, viewsets.ModelViewSet):
     queryset = Curso.objects.all()
     serializer_class = CursoSerializer
+    usar_cache_consultas = True
+    filtros = {'activo': ('activo', booleano), 'nivel_educativo': ('nivel_educativo', texto)}
 
-class MateriaViewSet(viewsets.ModelViewSet):
+class MateriaViewSet(GetCondicionalMixin, ConsultaOptimizadaMixin, LecturaRapidaMixin, viewsets.ModelViewSet):
     queryset = Materia.objects.all()
     serializer_class = MateriaSerializer
+    usar_cache_consultas = True
 
-class AsignacionCursoMateriaViewSet(viewsets.ModelViewSet):
+class AsignacionCursoMateriaViewSet(GetCondicionalMixin, ConsultaOptimizadaMixin, LecturaRapidaMixin, viewsets.ModelViewSet):
     queryset = AsignacionCursoMateria.objects.all()
     serializer_class = AsignacionCursoMateriaSerializer
+    usar_cache_consultas = True
+    filtros = {
+        'curso': ('curso_id', entero),
+        'materia': ('materia_id', entero),
+        'profesor': ('profesor_id', entero),
+        'anio_academico': ('anio_academico', entero),
+        'periodo': ('periodo', texto),
+    }
+
+    @action(detail=True, methods=['post'])
+    def pase_lista(self, request, pk=None):
+        """Registra la asistencia de toda la clase en una fecha:
+        {"fecha": "2024-05-02", "asistencias": [{"alumno": 7, "estado": "Presente"}, ...]}.
+        Cada alumno se resuelve a su inscripción en el curso y año de la
+        asignación y se escribe todo con un único INSERT ... ON CONFLICT sobre
+        (inscripcion, materia, fecha): repetir el mismo pase de lista deja las
+        filas igual, y uno corregido sobrescribe estado, observaciones y
+        profesor."""
+        asignacion = self.get_object()
+        entrada = PaseListaSerializer(data=request.data)
+        entrada.is_valid(raise_exception=True)
+        fecha, filas = entrada.validated_data['fecha'], entrada.validated_data['asistencias']
+
+        # Si el alumno tiene varias inscripciones en el curso y año, la del
+        # periodo de la asignación
+        inscripciones = {}
+        for alumno_id, inscripcion_id, periodo in Inscripcion.objects.filter(
+            curso_id=asignacion.curso_id, anio_academico=asignacion.anio_academico,
+            alumno_id__in=[fila['alumno'] for fila in filas],
+        ).values_list('alumno_id', 'id', 'periodo'):
+            if alumno_id not in inscripciones or periodo == asignacion.periodo:
+                inscripciones[alumno_id] = inscripcion_id
+        no_inscritos = [fila['alumno'] for fila in filas if fila['alumno'] not in inscripciones]
+        if no_inscritos:
+            return Response(
+                {'error': f'Alumnos sin inscripción en el curso y año de la asignación: {no_inscritos}.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        asistencias = [
+            Asistencia(
+                inscripcion_id=inscripciones[fila['alumno']], materia_id=asignacion.materia_id, fecha=fecha,
+                estado=fila['estado'], observaciones=fila.get('observaciones'), profesor_id=asignacion.profesor_id,
+            )
+            for fila in filas
+        ]
+        with transaction.atomic():
+            Asistencia.objects.bulk_create(
+                asistencias, update_conflicts=True, unique_fields=['inscripcion', 'materia', 'fecha'],
+                update_fields=['estado', 'observaciones', 'profesor'],
+            )
+        return Response(
+            AsistenciaSerializer(asistencias, many=True, context=self.get_serializer_context()).data,
+            status=status.HTTP_200_OK,
+        )
 
-class InscripcionViewSet(viewsets.ModelViewSet):
+class InscripcionViewSet(GetCondicionalMixin, ConsultaOptimizadaMixin, LecturaRapidaMixin, viewsets.ModelViewSet):
     queryset = Inscripcion.objects.all()
     serializer_class = InscripcionSerializer
+    usar_cache_consultas = True
+    filtros = {
+        'alumno': ('alumno_id', entero),
+        'curso': ('curso_id', entero),
+        'anio_academico': ('anio_academico', entero),
+        'periodo': ('periodo', texto),
+        'estado': ('estado_inscripcion', texto),
+    }
+
+# Filtros de los registros académicos (Nota, Asistencia, Participacion): por
+# su inscripción o materia, o por el alumno, curso y año de la inscripción
+FILTROS_REGISTRO = {
+    'inscripcion': ('inscripcion_id', entero),
+    'materia': ('materia_id', entero),
+    'alumno': ('inscripcion__alumno_id', entero),
+    'curso': ('inscripcion__curso_id', entero),
+    'anio_academico': ('inscripcion__anio_academico', entero),
+}
 
-class NotaViewSet(viewsets.ModelViewSet):
+class NotaViewSet(GetCondicionalMixin, ConsultaOptimizadaMixin, LecturaRapidaMixin, OperacionesMasivasMixin, viewsets.ModelViewSet):
     queryset = Nota.objects.all()
     serializer_class = NotaSerializer
+    usar_cache_consultas = True
+    filtros = {
+        **FILTROS_REGISTRO,
+        'tipo_evaluacion': ('tipo_evaluacion', texto),
+        **rango_fechas('fecha_evaluacion'),
+    }
 
-class AsistenciaViewSet(viewsets.ModelViewSet):
+class AsistenciaViewSet(GetCondicionalMixin, ConsultaOptimizadaMixin, LecturaRapidaMixin, viewsets.ModelViewSet):
     queryset = Asistencia.objects.all()
     serializer_class = AsistenciaSerializer
+    filtros = {**FILTROS_REGISTRO, 'estado': ('estado', texto), **rango_fechas('fecha')}
 
-class ActividadProyectoViewSet(viewsets.ModelViewSet):
+class ActividadProyectoViewSet(GetCondicionalMixin, ConsultaOptimizadaMixin, LecturaRapidaMixin, viewsets.ModelViewSet):
     queryset = ActividadProyecto.objects.all()
     serializer_class = ActividadProyectoSerializer
+    filtros = {
+        'materia': ('materia_id', entero),
+        'profesor': ('profesor_id', entero),
+        **rango_fechas('fecha_entrega_limite'),
+    }
 
-class EntregaActividadViewSet(viewsets.ModelViewSet):
+class EntregaActividadViewSet(GetCondicionalMixin, ConsultaOptimizadaMixin, LecturaRapidaMixin, OperacionesMasivasMixin, viewsets.ModelViewSet):
     queryset = EntregaActividad.objects.all()
     serializer_class = EntregaActividadSerializer
+    filtros = {
+        'actividad': ('actividad_id', entero),
+        'alumno': ('alumno_id', entero),
+        'estado': ('estado_entrega', texto),
+    }
 
-class ParticipacionViewSet(viewsets.ModelViewSet):
+class ParticipacionViewSet(GetCondicionalMixin, ConsultaOptimizadaMixin, LecturaRapidaMixin, OperacionesMasivasMixin, viewsets.ModelViewSet):
     queryset = Participacion.objects.all()
     serializer_class = ParticipacionSerializer
+    filtros = {**FILTROS_REGISTRO, **rango_fechas('fecha')}
 
-class TutorViewSet(viewsets.ModelViewSet):
+class TutorViewSet(GetCondicionalMixin, ConsultaOptimizadaMixin, LecturaRapidaMixin, viewsets.ModelViewSet):
     queryset = Tutor.objects.all()
     serializer_class = TutorSerializer
 
-class AlumnoTutorViewSet(viewsets.ModelViewSet):
+class AlumnoTutorViewSet(GetCondicionalMixin, ConsultaOptimizadaMixin, LecturaRapidaMixin, viewsets.ModelViewSet):
     queryset = AlumnoTutor.objects.all()
     serializer_class = AlumnoTutorSerializer
+    filtros = {'alumno': ('alumno_id', entero), 'tutor': ('tutor_id', entero)}
 
-class UsuarioViewSet(viewsets.ModelViewSet):
+class UsuarioViewSet(GetCondicionalMixin, ConsultaOptimizadaMixin, LecturaRapidaMixin, viewsets.ModelViewSet):
     queryset = Usuario.objects.all()
     serializer_class = UsuarioSerializer
+    filtros = {'rol': ('rol', texto), 'activo': ('activo', booleano)}
 
 
 # ==============================================================================
@@ -110,85 +250,323 @@ class CustomAuthToken(APIView):
 # ==============================================================================
 # TU VISTA DEL MODELO DE ML (CORREGIDA Y OPTIMIZADA)
 # ==============================================================================
+def _ventana_peticion(data):
+    """Filtros periodo, materia_id, fecha_desde y fecha_hasta (AAAA-MM-DD,
+    inclusivas) de una petición de predicción; solo los que vengan. Lanza
+    ValueError si alguno no es válido."""
+    ventana = {}
+    try:
+        if data.get('periodo'):
+            ventana['periodo'] = str(data['periodo'])
+        if data.get('materia_id'):
+            ventana['materia_id'] = int(data['materia_id'])
+        for campo in ('fecha_desde', 'fecha_hasta'):
+            if data.get(campo):
+                ventana[campo] = date.fromisoformat(str(data[campo]))
+    except (TypeError, ValueError):
+        raise ValueError('materia_id debe ser un entero y fecha_desde/fecha_hasta fechas AAAA-MM-DD.')
+    if ventana.get('fecha_desde') and ventana.get('fecha_hasta') and ventana['fecha_desde'] > ventana['fecha_hasta']:
+        raise ValueError('fecha_desde no puede ser posterior a fecha_hasta.')
+    return ventana
+
+
 class MLModelEndpoint(APIView):
+    # Además de JSON, acepta 'Accept: application/x-ndjson' (modo streaming)
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, NDJSONRenderer]
+
     def post(self, request, *args, **kwargs):
         curso_id = request.data.get('curso_id')
         alumnos_ids = request.data.get('alumnos_ids')
+        anio_academico = request.data.get('anio_academico')
 
         if not curso_id and not alumnos_ids:
             return Response({'error': 'Debes enviar curso_id o alumnos_ids.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            curso_id = int(curso_id) if curso_id else None
+            alumnos_ids = [int(alumno_id) for alumno_id in alumnos_ids] if alumnos_ids else None
+            anio_academico = int(anio_academico) if anio_academico else None
+        except (TypeError, ValueError):
+            return Response({'error': 'curso_id, alumnos_ids y anio_academico deben ser enteros.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Opcional: solo un periodo, una materia o un rango de fechas
+        try:
+            ventana = _ventana_peticion(request.data)
+        except ValueError as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            margen_cascada = self._margen_cascada(request)
+        except ValueError:
+            return Response({'error': 'margen debe ser un número no negativo.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        alumnos_queryset = Alumno.objects.all()
-        if alumnos_ids:
-            alumnos_queryset = alumnos_queryset.filter(id__in=alumnos_ids)
-        else:
-            alumnos_queryset = alumnos_queryset.filter(inscripcion__curso_id=curso_id).distinct()
-
-        alumnos_data = alumnos_queryset.annotate(
-            evaluaciones_avg=Avg('inscripcion__nota__calificacion', default=0.0),
-            participacion_avg_raw=Avg('inscripcion__participacion__puntuacion', default=0.0),
-            total_asistencias=Count('inscripcion__asistencia', distinct=True),
-            presentes=Count('inscripcion__asistencia', filter=Q(inscripcion__asistencia__estado='Presente'), distinct=True)
-        ).values(
-            'id', 'nombre', 'apellido', 'evaluaciones_avg', 
-            'participacion_avg_raw', 'total_asistencias', 'presentes'
+        # Toda la petición usa la misma versión de los modelos, aunque el
+        # registro cambie de versión mientras tanto
+        modelos = obtener_modelos()
+
+        if request.query_params.get('stream') in ('1', 'true') or isinstance(request.accepted_renderer, NDJSONRenderer):
+            try:
+                tamanio_bloque = int(request.query_params.get('tamanio_bloque', settings.ML_STREAM_TAMANIO_BLOQUE))
+            except ValueError:
+                return Response({'error': 'tamanio_bloque debe ser un entero.'}, status=status.HTTP_400_BAD_REQUEST)
+            tamanio_bloque = min(max(tamanio_bloque, 1), settings.ML_STREAM_TAMANIO_BLOQUE_MAXIMO)
+            return self._respuesta_streaming(
+                curso_id, alumnos_ids, anio_academico, modelos, tamanio_bloque, margen_cascada, ventana
+            )
+
+        if margen_cascada is not None:
+            return self._respuesta_cascada(curso_id, alumnos_ids, anio_academico, modelos, margen_cascada, ventana)
+
+        # Un curso y año ya calculados por 'calcular_predicciones' se sirven
+        # directamente de PrediccionAlumno mientras sigan al día
+        resultados_finales = None
+        if curso_id and anio_academico and not alumnos_ids and not ventana:
+            resultados_finales = predicciones_precalculadas(curso_id, anio_academico, modelos.version)
+
+        if resultados_finales is None:
+            # Si el grupo no cambió desde la última predicción, se reutiliza
+            clave = self._clave_cache(modelos.version, curso_id, alumnos_ids, anio_academico, ventana)
+            resultados_finales = cache_predicciones.obtener(clave) if clave else None
+            if resultados_finales is None:
+                resultados_finales = predecir_grupo(
+                    modelos, curso_id, alumnos_ids, anio_academico, ventana=ventana
+                )
+                if clave:
+                    cache_predicciones.guardar(clave, resultados_finales)
+        response = Response(resultados_finales, status=status.HTTP_200_OK)
+        response['X-Modelo-Version'] = modelos.version or ''
+        return response
+
+    @staticmethod
+    def _clave_cache(version, curso_id, alumnos_ids, anio_academico, ventana):
+        """Clave de la caché de predicciones, o None si la petición no se
+        cachea: las versiones de datos solo cambian con las métricas, así que
+        no detectan que un registro cambie de materia o de fecha."""
+        if ventana_por_registros(ventana):
+            return None
+        return clave_prediccion(
+            version, curso_id=curso_id, alumnos_ids=alumnos_ids, anio_academico=anio_academico,
+            periodo=ventana.get('periodo'),
         )
 
-        if not alumnos_data:
-            return Response([], status=status.HTTP_200_OK) # Devuelve lista vacía si no hay alumnos
-
-        # --- NUEVA LÓGICA ---
-        # 1. Recolectar todos los datos en una lista de diccionarios
-        metricas_grupo = []
-        for alumno in alumnos_data:
-            asistencia_pct = int((alumno['presentes'] / alumno['total_asistencias']) * 100) if alumno['total_asistencias'] > 0 else 0
-            participacion_avg = float(alumno['participacion_avg_raw']) * 10
-            evaluaciones_avg = float(alumno['evaluaciones_avg'])
-            metricas_grupo.append({
-                'id': alumno['id'],
-                'nombre': alumno['nombre'],
-                'apellido': alumno['apellido'],
-                'asistencia': asistencia_pct,
-                'participaciones': participacion_avg,
-                'evaluaciones': evaluaciones_avg
-            })
-        
-        # 2. Crear un DataFrame con los datos de todo el grupo
-        df_grupo = pd.DataFrame(metricas_grupo)
-        
-        # 3. Calcular los percentiles del 25% para este grupo específico
-        percentiles = {
-            "asistencia": df_grupo["asistencia"].quantile(0.25),
-            "participaciones": df_grupo["participaciones"].quantile(0.25),
-            "evaluaciones": df_grupo["evaluaciones"].quantile(0.25)
-        }
-        
-        # 4. Generar predicciones y recomendaciones para cada alumno
-        resultados_finales = []
-        for metrica_alumno in metricas_grupo:
-            # Preparar datos para el modelo (un solo alumno a la vez)
-            df_alumno_actual = pd.DataFrame([{
-                'asistencia': metrica_alumno['asistencia'],
-                'participaciones': metrica_alumno['participaciones'],
-                'evaluaciones': metrica_alumno['evaluaciones']
-            }])
-            
-            # Predecir con los modelos
-            nota_predicha = modelo_regresion.predict(df_alumno_actual)[0]
-            rendimiento_predicho = modelo_clasificacion.predict(df_alumno_actual)[0]
-            
-            # Generar recomendaciones pasando los percentiles del grupo
-            recomendaciones = generar_recomendaciones(df_alumno_actual, percentiles)
-            
-            resultados_finales.append({
-                'alumno_id': metrica_alumno['id'],
-                'alumno': f"{metrica_alumno['nombre']} {metrica_alumno['apellido']}",
-                'asistencia': metrica_alumno['asistencia'],
-                'participaciones': round(metrica_alumno['participaciones'], 2),
-                'evaluaciones': round(metrica_alumno['evaluaciones'], 2),
-                'nota_final_predicha': round(float(nota_predicha), 2),
-                'rendimiento_predicho': rendimiento_predicho,
-                'recomendaciones': recomendaciones
-            })
-        
-        return Response(resultados_finales, status=status.HTTP_200_OK)
\ No newline at end of file
+    @staticmethod
+    def _margen_cascada(request):
+        """Margen de la clasificación en cascada, o None para usar siempre el
+        RandomForest. Se activa con ?cascada=1 (o por defecto con
+        ML_CASCADA_ACTIVA) y el margen se puede cambiar con ?margen=."""
+        cascada = request.query_params.get('cascada')
+        activa = settings.ML_CASCADA_ACTIVA if cascada is None else cascada in ('1', 'true')
+        if not activa:
+            return None
+        margen = float(request.query_params.get('margen', settings.ML_CASCADA_MARGEN))
+        if not margen >= 0:
+            raise ValueError(margen)
+        return margen
+
+    def _respuesta_cascada(self, curso_id, alumnos_ids, anio_academico, modelos, margen_cascada, ventana):
+        """Como el modo normal, pero clasificando en cascada. Cada resultado
+        indica su 'ruta_clasificacion' y las cabeceras X-Cascada-* resumen
+        cuántos alumnos resolvió cada ruta y, entre los que pasaron por el
+        bosque, qué fracción habría clasificado igual la regla
+        (X-Cascada-Acuerdo-Bosque)."""
+        clave = self._clave_cache(
+            f'{modelos.version}|cascada:{margen_cascada:g}', curso_id, alumnos_ids, anio_academico, ventana
+        )
+        guardado = cache_predicciones.obtener(clave) if clave else None
+        if guardado is None:
+            estadisticas = {'regla': 0, 'bosque': 0, 'acuerdos': 0}
+            resultados = predecir_grupo(
+                modelos, curso_id, alumnos_ids, anio_academico, margen_cascada, estadisticas, ventana
+            )
+            guardado = {'resultados': resultados, 'estadisticas': estadisticas}
+            if clave:
+                cache_predicciones.guardar(clave, guardado)
+        estadisticas = guardado['estadisticas']
+        response = Response(guardado['resultados'], status=status.HTTP_200_OK)
+        response['X-Modelo-Version'] = modelos.version or ''
+        response['X-Cascada-Margen'] = f'{margen_cascada:g}'
+        response['X-Cascada-Regla'] = str(estadisticas['regla'])
+        response['X-Cascada-Bosque'] = str(estadisticas['bosque'])
+        if estadisticas['bosque']:
+            # Acuerdo regla/bosque solo entre los alumnos de la banda de
+            # incertidumbre (los X-Cascada-Bosque), no sobre todo el grupo: fuera
+            # de la banda no se evalúa el bosque
+            response['X-Cascada-Acuerdo-Bosque'] = f"{estadisticas['acuerdos'] / estadisticas['bosque']:.4f}"
+        return response
+
+    def _respuesta_streaming(self, curso_id, alumnos_ids, anio_academico, modelos, tamanio_bloque,
+                             margen_cascada=None, ventana=None):
+        """Una línea JSON por alumno (application/x-ndjson), enviada bloque a
+        bloque. Los resultados son los mismos que en el modo normal, pero en
+        memoria solo está el bloque en curso y las tres features del grupo
+        (necesarias para sus percentiles, salvo que un curso y año ya los
+        tenga en PercentilesCurso). No pasa por la caché de predicciones:
+        está pensado para grupos grandes. Puede tardar más que el timeout de
+        gunicorn: necesita workers gthread (gunicorn.conf.py), no sync."""
+        def bloques():
+            return metricas_alumnos_por_bloques(curso_id, alumnos_ids, tamanio_bloque, anio_academico, ventana)
+
+        def lineas():
+            percentiles = percentiles_guardados(curso_id, alumnos_ids, anio_academico, ventana)
+            if percentiles is None:
+                # Primera pasada: solo las features, para los percentiles del grupo
+                columnas = {columna: [] for columna in COLUMNAS_FEATURES}
+                for bloque in bloques():
+                    for columna in COLUMNAS_FEATURES:
+                        columnas[columna].append(pd.Series([m[columna] for m in bloque], dtype=float))
+                if not columnas[COLUMNAS_FEATURES[0]]:
+                    return
+                percentiles = percentiles_grupo(
+                    pd.DataFrame({columna: pd.concat(series, ignore_index=True) for columna, series in columnas.items()})
+                )
+                del columnas
+
+            # Segunda pasada: predicción y una línea por alumno en cada bloque
+            for bloque in bloques():
+                resultados = resultados_prediccion(
+                    bloque, pd.DataFrame(bloque), percentiles, modelos, margen_cascada
+                )
+                yield ''.join(linea_ndjson(resultado) for resultado in resultados)
+
+        response = StreamingHttpResponse(lineas(), content_type=NDJSONRenderer.media_type)
+        response['X-Modelo-Version'] = modelos.version or ''
+        return response
+
+
+class MLSimulacionEndpoint(APIView):
+    """Simulación "what-if": cómo cambiaría la nota y el rendimiento predichos
+    de cada alumno si mejorara (o empeorara) su asistencia, participación o
+    evaluaciones. Recibe el grupo igual que /api/mlmodel/ y los escenarios
+    como una lista de deltas:
+
+        {"curso_id": 3, "escenarios": [{"asistencia": 10}, {"asistencia": 10, "participaciones": 5}]}
+
+    o como una rejilla, de la que se toman todas las combinaciones:
+
+        {"alumnos_ids": [1, 2], "rejilla": {"asistencia": [0, 5, 10], "participaciones": [0, 10, 20]}}
+
+    Cada resultado trae la predicción actual y, en 'escenarios', una
+    predicción por escenario en el mismo orden que el 'escenarios' de la
+    respuesta. Las features simuladas se acotan a [0, 100]. Admite los mismos
+    filtros de ventana que /api/mlmodel/."""
+
+    def post(self, request, *args, **kwargs):
+        curso_id = request.data.get('curso_id')
+        alumnos_ids = request.data.get('alumnos_ids')
+        anio_academico = request.data.get('anio_academico')
+
+        if not curso_id and not alumnos_ids:
+            return Response({'error': 'Debes enviar curso_id o alumnos_ids.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            curso_id = int(curso_id) if curso_id else None
+            alumnos_ids = [int(alumno_id) for alumno_id in alumnos_ids] if alumnos_ids else None
+            anio_academico = int(anio_academico) if anio_academico else None
+        except (TypeError, ValueError):
+            return Response({'error': 'curso_id, alumnos_ids y anio_academico deben ser enteros.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            ventana = _ventana_peticion(request.data)
+            escenarios = self._escenarios(request.data)
+        except ValueError as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+        modelos = obtener_modelos()
+        try:
+            resultados = simular_grupo(
+                modelos, escenarios, curso_id, alumnos_ids, anio_academico,
+                max_celdas=settings.ML_SIMULACION_MAX_CELDAS, ventana=ventana,
+            )
+        except ValueError as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = Response({'escenarios': escenarios, 'resultados': resultados}, status=status.HTTP_200_OK)
+        response['X-Modelo-Version'] = modelos.version or ''
+        return response
+
+    @staticmethod
+    def _escenarios(data):
+        """Lista de escenarios {feature: delta} a partir de 'escenarios' o de
+        'rejilla'. Lanza ValueError con el mensaje para el cliente."""
+        escenarios = data.get('escenarios')
+        rejilla = data.get('rejilla')
+        if bool(escenarios) == bool(rejilla):
+            raise ValueError('Debes enviar escenarios o rejilla (solo uno de los dos).')
+        if rejilla:
+            if not isinstance(rejilla, dict) or not all(isinstance(v, list) and v for v in rejilla.values()):
+                raise ValueError('rejilla debe ser un objeto {feature: [deltas]}.')
+            num_escenarios = math.prod(len(valores) for valores in rejilla.values())
+            if num_escenarios > settings.ML_SIMULACION_MAX_ESCENARIOS:
+                raise ValueError(f'Como mucho {settings.ML_SIMULACION_MAX_ESCENARIOS} escenarios por petición.')
+            escenarios = [dict(zip(rejilla, combinacion)) for combinacion in itertools.product(*rejilla.values())]
+        if not isinstance(escenarios, list) or not all(isinstance(e, dict) for e in escenarios):
+            raise ValueError('escenarios debe ser una lista de objetos {feature: delta}.')
+        if len(escenarios) > settings.ML_SIMULACION_MAX_ESCENARIOS:
+            raise ValueError(f'Como mucho {settings.ML_SIMULACION_MAX_ESCENARIOS} escenarios por petición.')
+
+        normalizados = []
+        for escenario in escenarios:
+            desconocidas = set(escenario) - set(COLUMNAS_FEATURES)
+            if desconocidas:
+                raise ValueError(
+                    f"Features desconocidas: {', '.join(sorted(desconocidas))}. Válidas: {', '.join(COLUMNAS_FEATURES)}."
+                )
+            try:
+                deltas = {columna: float(escenario.get(columna, 0)) for columna in COLUMNAS_FEATURES}
+            except (TypeError, ValueError):
+                raise ValueError('Los deltas de cada escenario deben ser números.')
+            if not all(math.isfinite(delta) for delta in deltas.values()):
+                raise ValueError('Los deltas de cada escenario deben ser números.')
+            normalizados.append(deltas)
+        return normalizados
+
+
+class MLCacheEstadisticasEndpoint(APIView):
+    # Contadores de la caché de predicciones de este proceso, para monitoreo
+    def get(self, request, *args, **kwargs):
+        return Response(cache_predicciones.estadisticas(), status=status.HTTP_200_OK)
+
+
+class CacheConsultasEstadisticasEndpoint(APIView):
+    # Aciertos y fallos por endpoint de la caché de consultas de este proceso
+    def get(self, request, *args, **kwargs):
+        return Response(cache_consultas.estadisticas(), status=status.HTTP_200_OK)
+
+
+class ExportacionEndpoint(APIView):
+    """GET /api/export/<recurso>/?anio_academico=2024&format=csv
+
+    Descarga completa de notas, asistencias o participaciones con los nombres
+    de alumno, curso y materia, en CSV (por defecto) o NDJSON (?format=ndjson
+    o 'Accept: application/x-ndjson'). Admite los mismos filtros que el
+    listado del recurso (?curso=, ?materia=, ?fecha__gte=...). La respuesta se
+    escribe por bloques de API_EXPORT_TAMANIO_BLOQUE filas (exportacion.py).
+
+    Una exportación grande dura más que GUNICORN_TIMEOUT. Con los workers
+    gthread de gunicorn.conf.py ocupa un hilo y no se corta; con workers sync
+    el maestro mataría el worker a mitad de la descarga. Detrás de un proxy,
+    su timeout de lectura (p. ej. proxy_read_timeout de nginx) también limita
+    el tiempo entre bloques."""
+    renderer_classes = [CSVRenderer, NDJSONRenderer]
+    recursos = {
+        'notas': NotaViewSet,
+        'asistencias': AsistenciaViewSet,
+        'participaciones': ParticipacionViewSet,
+    }
+
+    def get(self, request, recurso, *args, **kwargs):
+        viewset = self.recursos.get(recurso)
+        if viewset is None:
+            return Response({'error': f"Recurso no exportable: {recurso!r}. Opciones: {', '.join(self.recursos)}."},
+                            status=status.HTTP_404_NOT_FOUND)
+        self.filtros = viewset.filtros
+        queryset = viewset.queryset.model.objects.all()
+        for backend in api_settings.DEFAULT_FILTER_BACKENDS:
+            queryset = backend().filter_queryset(request, queryset, self)
+
+        renderer = request.accepted_renderer
+        filas = EXPORTADORES[renderer.format](queryset, settings.API_EXPORT_TAMANIO_BLOQUE)
+        response = StreamingHttpResponse(filas, content_type=f'{renderer.media_type}; charset={renderer.charset}')
+        # anio_academico ya pasó por el filtro: es un entero válido
+        anio = request.query_params.get('anio_academico')
+        nombre = f'{recurso}_{int(anio)}' if anio else recurso
+        response['Content-Disposition'] = f'attachment; filename="{nombre}.{renderer.format}"'
+        return response
@@ -0,0 +1,29 @@
+# gunicorn.conf.py
+# Configuración de gunicorn para producción (ver el CMD del Dockerfile).
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', '3'))
+
+# Hilos por worker. /api/export/ y /api/mlmodel/?stream=1 responden con
+# StreamingHttpResponse y pueden tardar minutos: con workers sync cada descarga
+# ocupa un worker entero y, pasado `timeout` sin terminarla, el maestro lo mata
+# (WORKER TIMEOUT) y corta la descarga. Con gthread la descarga ocupa un hilo y
+# el worker sigue avisando al maestro, así que `timeout` solo detecta workers
+# colgados, no peticiones largas. Cada hilo abre su propia conexión a la base
+# de datos: hasta workers × threads conexiones. Las cachés en memoria y el
+# registro de modelos de modelo.py están protegidos con locks.
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '60'))
+
+# Importa la app (y con ella modelo.py y los modelos de ML) una sola vez en el
+# proceso maestro antes de hacer fork: los workers comparten esas páginas
+# copy-on-write en lugar de cargar cada uno su propia copia. Si existe
+# modelo_compilado/ (python modelo.py compilar), los arrays además se mapean
+# en memoria de solo lectura desde el disco. Medición: python modelo.py memoria
+preload_app = True
+
+# Los workers no necesitan reiniciarse al reentrenar: cada uno revisa
+# modelos/ACTIVO cada MODELOS_REVISION_SEGUNDOS y carga la nueva versión por su
+# cuenta (ver RegistroModelos en modelo.py).
@@ -1,31 +1,441 @@
 import pandas as pd
+import numpy as np
 import joblib
+import json
 import os
-import random
+import threading
+import time
+from datetime import datetime
 
 # ==============================================================================
 # === CÓDIGO DE PRODUCCIÓN (Lo que se ejecuta al ser importado por Django) ===
 # ==============================================================================
 
-# --- 1. Cargar los modelos pre-entrenados ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Directorio con los modelos exportados a arrays de NumPy (ver compilar_modelos)
+RUTA_COMPILADO = os.environ.get('MODELO_COMPILADO_DIR', os.path.join(BASE_DIR, 'modelo_compilado'))
+# Columnas de entrada de ambos modelos, en el orden con el que fueron entrenados
+COLUMNAS_FEATURES = ["asistencia", "participaciones", "evaluaciones"]
+# El coste del motor compilado crece con filas × árboles: a partir de unas 200
+# filas el bosque de sklearn es más rápido ('python modelo.py comparar'). Con
+# MODELO_SKLEARN_LOTES_GRANDES=1 se cargan también los .pkl y los lotes de más
+# de MAX_FILAS_COMPILADO filas se clasifican con sklearn. Desactivado por
+# defecto: los .pkl importan sklearn en cada worker y ocupan unos 150 MiB por
+# proceso que, a diferencia de los arrays mapeados en memoria, no se comparten.
+SKLEARN_LOTES_GRANDES = os.environ.get('MODELO_SKLEARN_LOTES_GRANDES', '0') == '1'
+MAX_FILAS_COMPILADO = int(os.environ.get('MODELO_COMPILADO_MAX_FILAS', '200'))
+
+
+# --- 1. Motor de inferencia compilado (NumPy puro, sin sklearn) ---
+# Los 100 árboles del RandomForest se aplanan en arrays contiguos: todos los
+# nodos de todos los árboles van uno detrás de otro y 'raices' indica dónde
+# empieza cada árbol. La regresión lineal queda en sus coeficientes.
+ARRAYS_COMPILADOS = [
+    'reg_coef', 'reg_intercepto',
+    'arbol_raices', 'nodo_feature', 'nodo_umbral', 'nodo_hijos', 'nodo_es_hoja', 'nodo_valor',
+    'clases',
+]
+
+def compilar_modelos(regresion, clasificacion):
+    """Exporta un LinearRegression y un RandomForestClassifier de sklearn a un
+    diccionario de arrays de NumPy evaluable con predecir_*_compilada."""
+    raices, features, umbrales, hijos, hojas, valores = [], [], [], [], [], []
+    desplazamiento = 0
+    for estimador in clasificacion.estimators_:
+        arbol = estimador.tree_
+        es_hoja = arbol.children_left == -1
+        raices.append(desplazamiento)
+        features.append(np.where(es_hoja, 0, arbol.feature))
+        umbrales.append(arbol.threshold)
+        # Hijos con índices globales, intercalados: [izq0, der0, izq1, der1, ...]
+        # (en las hojas apuntan al propio nodo)
+        propios = np.arange(arbol.node_count) + desplazamiento
+        pares = np.empty(2 * arbol.node_count, dtype=np.int64)
+        pares[0::2] = np.where(es_hoja, propios, arbol.children_left + desplazamiento)
+        pares[1::2] = np.where(es_hoja, propios, arbol.children_right + desplazamiento)
+        hijos.append(pares)
+        hojas.append(es_hoja)
+        # Igual que DecisionTreeClassifier.predict_proba: valores normalizados por nodo
+        valor = arbol.value[:, 0, :].astype(np.float64)
+        normalizador = valor.sum(axis=1, keepdims=True)
+        normalizador[normalizador == 0.0] = 1.0
+        valores.append(valor / normalizador)
+        desplazamiento += arbol.node_count
+
+    # sklearn compara features float32 contra umbrales float64. Para un x float32,
+    # x <= umbral equivale a x <= (mayor float32 que no supera el umbral), así
+    # que los umbrales se guardan en float32 redondeados hacia abajo.
+    umbral = np.concatenate(umbrales)
+    umbral_32 = umbral.astype(np.float32)
+    excede = umbral_32.astype(np.float64) > umbral
+    umbral_32[excede] = np.nextafter(umbral_32[excede], np.float32(-np.inf))
+
+    return {
+        'reg_coef': np.asarray(regresion.coef_, dtype=np.float64),
+        'reg_intercepto': np.asarray(regresion.intercept_, dtype=np.float64),
+        'arbol_raices': np.asarray(raices, dtype=np.int32),
+        'nodo_feature': np.concatenate(features).astype(np.int32),
+        'nodo_umbral': umbral_32,
+        'nodo_hijos': np.concatenate(hijos).astype(np.int32),
+        'nodo_es_hoja': np.concatenate(hojas),
+        'nodo_valor': np.ascontiguousarray(np.concatenate(valores)),
+        'clases': np.asarray(clasificacion.classes_).astype(str),
+    }
+
+def guardar_modelos_compilados(compilado, directorio=RUTA_COMPILADO):
+    os.makedirs(directorio, exist_ok=True)
+    for nombre in ARRAYS_COMPILADOS:
+        np.save(os.path.join(directorio, f'{nombre}.npy'), compilado[nombre])
+
+def cargar_modelos_compilados(directorio=RUTA_COMPILADO, mmap=True):
+    """Carga los arrays compilados. Con mmap=True se mapean en memoria de solo
+    lectura: todos los procesos que los cargan comparten las mismas páginas
+    (la caché de páginas del SO), así que añadir workers no multiplica la
+    memoria residente del modelo."""
+    modo = 'r' if mmap else None
+    # np.asarray quita la subclase memmap (evita su sobrecoste en cada
+    # operación) sin copiar: el buffer sigue siendo el archivo mapeado
+    return {
+        nombre: np.asarray(np.load(os.path.join(directorio, f'{nombre}.npy'), mmap_mode=modo))
+        for nombre in ARRAYS_COMPILADOS
+    }
+
+def _matriz_features(X):
+    if isinstance(X, pd.DataFrame):
+        X = X[COLUMNAS_FEATURES].to_numpy()
+    return np.asarray(X, dtype=np.float64)
+
+def predecir_regresion_compilada(compilado, X):
+    return _matriz_features(X) @ compilado['reg_coef'] + compilado['reg_intercepto']
+
+def predecir_proba_compilada(compilado, X):
+    # sklearn evalúa los árboles en float32: se replica para obtener los mismos cortes
+    X = _matriz_features(X).astype(np.float32)
+    n, num_features = X.shape
+    raices = compilado['arbol_raices']
+    feature, umbral = compilado['nodo_feature'], compilado['nodo_umbral']
+    hijos, es_hoja = compilado['nodo_hijos'], compilado['nodo_es_hoja']
+
+    # Un recorrido por cada par (estudiante, árbol), todos a la vez y un nivel
+    # por iteración. Los que llegan a una hoja salen del conjunto activo.
+    hojas = np.empty(n * raices.shape[0], dtype=np.int32)
+    actuales = np.tile(raices, n)
+    activos = np.arange(hojas.shape[0], dtype=np.int32)
+    desplazamiento_fila = np.repeat(np.arange(n, dtype=np.int32) * num_features, raices.shape[0])
+    X_plano = X.ravel()
+    while activos.size:
+        # Mismo criterio que sklearn: a la derecha si no se cumple x <= umbral
+        a_la_derecha = ~(X_plano[desplazamiento_fila + feature[actuales]] <= umbral[actuales])
+        actuales = hijos[2 * actuales + a_la_derecha]
+        llegaron = es_hoja[actuales]
+        if llegaron.any():
+            hojas[activos[llegaron]] = actuales[llegaron]
+            siguen = ~llegaron
+            activos, actuales, desplazamiento_fila = activos[siguen], actuales[siguen], desplazamiento_fila[siguen]
+
+    # Misma acumulación que RandomForestClassifier.predict_proba (árbol a árbol)
+    hojas = hojas.reshape(n, raices.shape[0])
+    valores = compilado['nodo_valor']
+    proba = np.zeros((n, valores.shape[1]), dtype=np.float64)
+    for t in range(raices.shape[0]):
+        proba += valores[hojas[:, t]]
+    proba /= raices.shape[0]
+    return proba
+
+def predecir_clasificacion_compilada(compilado, X):
+    return compilado['clases'][np.argmax(predecir_proba_compilada(compilado, X), axis=1)]
+
+
+# --- 2. Registro de versiones y carga de los modelos ---
+# Cada entrenamiento publica sus artefactos compilados (y los .pkl de sklearn,
+# que con SKLEARN_LOTES_GRANDES atienden los lotes grandes) en un directorio
+# propio dentro de RUTA_REGISTRO (modelos/<version>/) y el archivo
+# modelos/ACTIVO indica cuál se sirve. Cambiar ACTIVO ('python modelo.py activar <version>') basta para
+# que los workers en marcha pasen a la nueva versión sin reiniciarse; las
+# versiones anteriores se conservan para poder volver atrás
+# ('python modelo.py rollback').
+#
+# Si no hay ninguna versión activa se mantiene el comportamiento anterior: se
+# usa modelo_compilado/ si existe y, si no, los .pkl originales.
+RUTA_REGISTRO = os.environ.get('MODELOS_REGISTRO_DIR', os.path.join(BASE_DIR, 'modelos'))
+# Cada cuántos segundos revisa cada proceso si cambió la versión activa
+INTERVALO_REVISION = float(os.environ.get('MODELOS_REVISION_SEGUNDOS', '5'))
+
+
+class ModelosCargados:
+    """Un par regresión/clasificación listo para predecir, con su versión.
+
+    Cada petición toma una referencia al conjunto activo y la usa de principio
+    a fin: si la versión cambia a mitad de camino, esa petición termina con la
+    que empezó."""
+
+    def __init__(self, version, compilado=None, regresion=None, clasificacion=None):
+        self.version = version
+        self.compilado = compilado
+        self.regresion = regresion
+        self.clasificacion = clasificacion
+
+    @property
+    def disponible(self):
+        return self.compilado is not None or self.regresion is not None
+
+    def _entrada(self, df_features):
+        if self.compilado is not None:
+            return _matriz_features(df_features)
+        return df_features[COLUMNAS_FEATURES]
+
+    def _notas(self, X):
+        if self.compilado is not None:
+            return predecir_regresion_compilada(self.compilado, X)
+        return self.regresion.predict(X)
+
+    def _rendimientos(self, X):
+        if self.compilado is None:
+            return self.clasificacion.predict(X)
+        if self.clasificacion is None or len(X) <= MAX_FILAS_COMPILADO:
+            return predecir_clasificacion_compilada(self.compilado, X)
+        # Lote grande: el bosque de sklearn (X es la matriz del motor compilado)
+        return self.clasificacion.predict(pd.DataFrame(X, columns=COLUMNAS_FEATURES))
+
+    def predecir(self, df_features):
+        X = self._entrada(df_features)
+        return self._notas(X), self._rendimientos(X)
+
+    def predecir_cascada(self, df_features, margen):
+        """Clasificación en cascada. Las etiquetas de entrenamiento salen de
+        aplicar categorizar_nota a la nota final, así que para casi todos los
+        estudiantes basta con aplicar esa regla a la nota predicha por la
+        regresión. El RandomForest solo se evalúa para los que quedan a menos
+        de `margen` puntos de un umbral (UMBRALES_RENDIMIENTO).
+
+        Devuelve (notas, rendimientos, usa_bosque, acuerdos): usa_bosque marca
+        a los estudiantes clasificados por el bosque y acuerdos cuenta en
+        cuántos de ellos la regla habría dado la misma clase."""
+        X = self._entrada(df_features)
+        notas = self._notas(X)
+        rendimientos = categorizar_notas(notas)
+        usa_bosque = np.zeros(len(notas), dtype=bool)
+        for umbral in UMBRALES_RENDIMIENTO:
+            usa_bosque |= np.abs(notas - umbral) < margen
+        acuerdos = 0
+        if usa_bosque.any():
+            subconjunto = X[usa_bosque] if self.compilado is not None else X.loc[usa_bosque]
+            bosque = self._rendimientos(subconjunto)
+            acuerdos = int(np.sum(bosque == rendimientos[usa_bosque]))
+            rendimientos[usa_bosque] = bosque
+        return notas, rendimientos, usa_bosque, acuerdos
+
+    def precalentar(self):
+        # Una predicción de prueba: recorre los arrays (trae sus páginas a
+        # memoria) y falla aquí, no en una petición, si el artefacto está roto
+        X = pd.DataFrame(np.linspace(0, 100, 11).repeat(3).reshape(11, 3), columns=COLUMNAS_FEATURES)
+        notas, rendimientos = self.predecir(X)
+        if not np.all(np.isfinite(notas)) or len(rendimientos) != len(X):
+            raise ValueError(f"La versión {self.version} devuelve predicciones inválidas")
+        if self.compilado is not None and self.clasificacion is not None:
+            # El bosque de sklearn de los lotes grandes debe coincidir con el compilado
+            if not np.array_equal(self.clasificacion.predict(X), rendimientos):
+                raise ValueError(f"Los .pkl de la versión {self.version} no coinciden con sus arrays compilados")
+        return self
+
+
+class RegistroModelos:
+    ARCHIVO_ACTIVO = 'ACTIVO'
+    ARCHIVO_HISTORIAL = 'HISTORIAL'
+    ARCHIVO_METADATOS = 'metadatos.json'
+    ARCHIVO_REGRESION = 'modelo_regresion.pkl'
+    ARCHIVO_CLASIFICACION = 'modelo_clasificacion.pkl'
+
+    def __init__(self, ruta, intervalo_revision=INTERVALO_REVISION):
+        self.ruta = ruta
+        self.intervalo_revision = intervalo_revision
+        self._activos = ModelosCargados(None)
+        self._proxima_revision = 0.0
+        self._version_fallida = None
+        self._lock = threading.Lock()
+
+    # --- Artefactos en disco ---
+    def _ruta(self, *partes):
+        return os.path.join(self.ruta, *partes)
+
+    def versiones(self):
+        """Versiones publicadas, de la más antigua a la más reciente."""
+        if not os.path.isdir(self.ruta):
+            return []
+        return sorted(
+            nombre for nombre in os.listdir(self.ruta)
+            if os.path.isfile(self._ruta(nombre, self.ARCHIVO_METADATOS))
+        )
+
+    def metadatos(self, version):
+        with open(self._ruta(version, self.ARCHIVO_METADATOS), encoding='utf-8') as f:
+            return json.load(f)
+
+    def version_activa(self):
+        try:
+            with open(self._ruta(self.ARCHIVO_ACTIVO), encoding='utf-8') as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def historial(self):
+        try:
+            with open(self._ruta(self.ARCHIVO_HISTORIAL), encoding='utf-8') as f:
+                return [linea.split()[1] for linea in f if linea.strip()]
+        except FileNotFoundError:
+            return []
+
+    def publicar(self, compilado, version=None, regresion=None, clasificacion=None, **metadatos):
+        """Guarda unos modelos compilados como una versión nueva (sin activarla)
+        y devuelve su nombre. Con `regresion` y `clasificacion` guarda también
+        los modelos de sklearn de los que salen, para los lotes de más de
+        MAX_FILAS_COMPILADO filas si se activa SKLEARN_LOTES_GRANDES. El
+        directorio se escribe aparte y se renombra al final, así que nunca se
+        ve una versión a medio escribir."""
+        version = version or datetime.now().strftime('%Y%m%d-%H%M%S')
+        destino = self._ruta(version)
+        if os.path.exists(destino):
+            raise FileExistsError(f"La versión {version} ya existe en {self.ruta}")
+        temporal = self._ruta(f'.{version}.tmp')
+        guardar_modelos_compilados(compilado, temporal)
+        if regresion is not None and clasificacion is not None:
+            joblib.dump(regresion, os.path.join(temporal, self.ARCHIVO_REGRESION))
+            joblib.dump(clasificacion, os.path.join(temporal, self.ARCHIVO_CLASIFICACION))
+        metadatos = {'version': version, 'creado': datetime.now().isoformat(timespec='seconds'), **metadatos}
+        with open(os.path.join(temporal, self.ARCHIVO_METADATOS), 'w', encoding='utf-8') as f:
+            json.dump(metadatos, f, ensure_ascii=False, indent=2)
+        os.rename(temporal, destino)
+        return version
+
+    def cargar(self, version):
+        """Carga (mapeada en memoria) y precalienta una versión publicada, con
+        sus modelos de sklearn si se publicaron y SKLEARN_LOTES_GRANDES."""
+        if version not in self.versiones():
+            raise FileNotFoundError(f"La versión {version} no existe en {self.ruta}")
+        regresion, clasificacion = _cargar_sklearn(
+            self._ruta(version, self.ARCHIVO_REGRESION), self._ruta(version, self.ARCHIVO_CLASIFICACION)
+        )
+        return ModelosCargados(
+            version, compilado=cargar_modelos_compilados(self._ruta(version)),
+            regresion=regresion, clasificacion=clasificacion,
+        ).precalentar()
+
+    def activar(self, version):
+        """Apunta ACTIVO a `version`. Antes la carga y precalienta en este
+        proceso: si el artefacto está roto falla aquí y ACTIVO no cambia, y sus
+        páginas quedan en la caché del SO para cuando la carguen los workers."""
+        self.cargar(version)
+        temporal = self._ruta(f'.{self.ARCHIVO_ACTIVO}.tmp')
+        with open(temporal, 'w', encoding='utf-8') as f:
+            f.write(version + '\n')
+        # os.replace es atómico: cada worker lee la versión anterior o la nueva
+        os.replace(temporal, self._ruta(self.ARCHIVO_ACTIVO))
+        with open(self._ruta(self.ARCHIVO_HISTORIAL), 'a', encoding='utf-8') as f:
+            f.write(f"{datetime.now().isoformat(timespec='seconds')} {version}\n")
+
+    def rollback(self):
+        """Reactiva la versión que estaba activa antes de la actual."""
+        actual = self.version_activa()
+        disponibles = set(self.versiones())
+        for version in reversed(self.historial()):
+            if version != actual and version in disponibles:
+                self.activar(version)
+                return version
+        raise ValueError("No hay una versión anterior a la que volver.")
+
+    # --- Modelos en uso por este proceso ---
+    def establecer(self, modelos):
+        self._activos = modelos
+        self._proxima_revision = time.monotonic() + self.intervalo_revision
+
+    def actuales(self):
+        """Modelos a usar en esta petición. Como mucho cada intervalo_revision
+        segundos relee ACTIVO y, si apunta a otra versión, la carga y la
+        sustituye. Solo un hilo hace la revisión; los demás siguen con la
+        versión actual en lugar de esperar."""
+        if time.monotonic() >= self._proxima_revision and self._lock.acquire(blocking=False):
+            try:
+                self._proxima_revision = time.monotonic() + self.intervalo_revision
+                self._revisar()
+            finally:
+                self._lock.release()
+        return self._activos
+
+    def _revisar(self):
+        version = self.version_activa()
+        if version is None or version in (self._activos.version, self._version_fallida):
+            return
+        try:
+            nuevos = self.cargar(version)
+        except (OSError, ValueError) as error:
+            # Se sigue sirviendo la versión actual; no se reintenta la misma
+            # versión rota en cada revisión
+            self._version_fallida = version
+            print(f"ADVERTENCIA: no se pudo cargar la versión {version} de los modelos: {error}")
+            return
+        # Una sola asignación: las peticiones en curso conservan su referencia
+        self._activos = nuevos
+        print(f"Modelos actualizados a la versión {version}")
+
+
 # Usamos os.path.join para crear rutas de archivo seguras que funcionan en cualquier SO
-try:
-    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-    ruta_regresion = os.path.join(BASE_DIR, 'modelo_regresion.pkl')
-    ruta_clasificacion = os.path.join(BASE_DIR, 'modelo_clasificacion.pkl')
+def _version_artefactos(rutas):
+    # Identifica los artefactos cargados (p. ej. para invalidar cachés al reentrenar)
+    return "-".join(f"{os.stat(ruta).st_size:x}{os.stat(ruta).st_mtime_ns:x}" for ruta in rutas)
+
+ruta_regresion = os.path.join(BASE_DIR, 'modelo_regresion.pkl')
+ruta_clasificacion = os.path.join(BASE_DIR, 'modelo_clasificacion.pkl')
+registro_modelos = RegistroModelos(RUTA_REGISTRO)
 
-    modelo_regresion = joblib.load(ruta_regresion)
-    modelo_clasificacion = joblib.load(ruta_clasificacion)
-    print("Modelos cargados exitosamente desde archivos .pkl")
+def _cargar_sklearn(ruta_reg, ruta_clf):
+    """(regresion, clasificacion) de sklearn para los lotes grandes, o (None,
+    None) si falta algún .pkl o no está activado SKLEARN_LOTES_GRANDES."""
+    if not SKLEARN_LOTES_GRANDES or not (os.path.exists(ruta_reg) and os.path.exists(ruta_clf)):
+        return None, None
+    return joblib.load(ruta_reg), joblib.load(ruta_clf)
 
-except FileNotFoundError:
-    print("ADVERTENCIA: Archivos .pkl no encontrados. La app no podrá predecir.")
-    print("Si estás en desarrollo, ejecuta 'python modelo.py' para entrenar y crear los modelos.")
-    modelo_regresion = None
-    modelo_clasificacion = None
+def _cargar_modelos_iniciales():
+    version = registro_modelos.version_activa()
+    if version is not None:
+        try:
+            modelos = registro_modelos.cargar(version)
+            print(f"Modelos cargados exitosamente: versión {version} de {RUTA_REGISTRO}")
+            return modelos
+        except (OSError, ValueError) as error:
+            print(f"ADVERTENCIA: no se pudo cargar la versión activa {version}: {error}")
+    if os.path.isdir(RUTA_COMPILADO):
+        version = _version_artefactos(
+            [os.path.join(RUTA_COMPILADO, f'{nombre}.npy') for nombre in ARRAYS_COMPILADOS]
+        )
+        print("Modelos compilados cargados exitosamente desde", RUTA_COMPILADO)
+        # Con SKLEARN_LOTES_GRANDES, los .pkl atienden los lotes de más de
+        # MAX_FILAS_COMPILADO filas
+        regresion, clasificacion = _cargar_sklearn(ruta_regresion, ruta_clasificacion)
+        return ModelosCargados(version, compilado=cargar_modelos_compilados(),
+                               regresion=regresion, clasificacion=clasificacion)
+    try:
+        modelos = ModelosCargados(
+            _version_artefactos([ruta_regresion, ruta_clasificacion]),
+            regresion=joblib.load(ruta_regresion),
+            clasificacion=joblib.load(ruta_clasificacion),
+        )
+        print("Modelos cargados exitosamente desde archivos .pkl")
+        return modelos
+    except FileNotFoundError:
+        print("ADVERTENCIA: Archivos .pkl no encontrados. La app no podrá predecir.")
+        print("Si estás en desarrollo, ejecuta 'python modelo.py' para entrenar y crear los modelos.")
+        return ModelosCargados(None)
 
+registro_modelos.establecer(_cargar_modelos_iniciales())
+# Modelos sklearn cargados al importar (None si no hay .pkl)
+modelo_regresion = registro_modelos.actuales().regresion
+modelo_clasificacion = registro_modelos.actuales().clasificacion
 
-# --- 2. Definir las funciones de negocio ---
+def obtener_modelos():
+    return registro_modelos.actuales()
+
+
+# --- 3. Definir las funciones de negocio ---
 # Estas funciones son ligeras y solo se definen, no se ejecutan hasta que son llamadas
 def categorizar_nota(nota):
     if nota > 80:
@@ -35,6 +445,21 @@ def categorizar_nota(nota):
     else:
         return "Bajo rendimiento"
 
+# Umbrales de categorizar_nota (la regla con la que se etiquetan los datos)
+UMBRALES_RENDIMIENTO = (50, 80)
+
+def categorizar_notas(notas):
+    """Versión vectorizada de categorizar_nota para un array de notas."""
+    notas = np.asarray(notas)
+    return np.select(
+        [notas > 80, notas >= 50], ["Alto rendimiento", "Promedio"], default="Bajo rendimiento"
+    ).astype(object)
+
+RECOMENDACION_ASISTENCIA = "Tu asistencia es más baja que la de tus compañeros. Intenta asistir con más frecuencia para mejorar tu aprendizaje."
+RECOMENDACION_PARTICIPACION = "Tu nivel de participación es bajo en comparación con tu clase. Considera hablar más, hacer preguntas o involucrarte en debates."
+RECOMENDACION_EVALUACIONES = "Tus evaluaciones muestran oportunidades de mejora en comparación con el resto del curso. Puedes probar nuevas técnicas de estudio."
+RECOMENDACION_EXCELENTE = "¡Excelente trabajo! Tu rendimiento es sólido. Sigue así para mantener tu éxito académico."
+
 def generar_recomendaciones(estudiante_df, percentiles):
     recomendaciones = []
     # Obtener los valores del estudiante actual
@@ -43,99 +468,396 @@ def generar_recomendaciones(estudiante_df, percentiles):
     evaluaciones_actual = estudiante_df["evaluaciones"].iloc[0]
     # Comparar con los percentiles del grupo
     if asistencia_actual < percentiles["asistencia"]:
-        recomendaciones.append("Tu asistencia es más baja que la de tus compañeros. Intenta asistir con más frecuencia para mejorar tu aprendizaje.")
+        recomendaciones.append(RECOMENDACION_ASISTENCIA)
     if participacion_actual < percentiles["participaciones"]:
-        recomendaciones.append("Tu nivel de participación es bajo en comparación con tu clase. Considera hablar más, hacer preguntas o involucrarte en debates.")
+        recomendaciones.append(RECOMENDACION_PARTICIPACION)
     if evaluaciones_actual < percentiles["evaluaciones"]:
-        recomendaciones.append("Tus evaluaciones muestran oportunidades de mejora en comparación con el resto del curso. Puedes probar nuevas técnicas de estudio.")
+        recomendaciones.append(RECOMENDACION_EVALUACIONES)
     if not recomendaciones:
-        recomendaciones.append("¡Excelente trabajo! Tu rendimiento es sólido. Sigue así para mantener tu éxito académico.")
+        recomendaciones.append(RECOMENDACION_EXCELENTE)
     return recomendaciones
 
+def generar_recomendaciones_lote(df_grupo, percentiles):
+    """Versión vectorizada de generar_recomendaciones: compara a todo el grupo
+    contra los percentiles de una sola vez y devuelve una lista por estudiante,
+    en el mismo orden que las filas de df_grupo."""
+    bajo_asistencia = (df_grupo["asistencia"] < percentiles["asistencia"]).to_numpy()
+    bajo_participacion = (df_grupo["participaciones"] < percentiles["participaciones"]).to_numpy()
+    bajo_evaluaciones = (df_grupo["evaluaciones"] < percentiles["evaluaciones"]).to_numpy()
+
+    # Solo hay 8 combinaciones posibles de banderas: se construye cada lista una
+    # vez y cada estudiante recibe una copia de la que le corresponde.
+    codigos = bajo_asistencia * 4 + bajo_participacion * 2 + bajo_evaluaciones
+    combinaciones = []
+    for codigo in range(8):
+        recomendaciones = []
+        if codigo & 4:
+            recomendaciones.append(RECOMENDACION_ASISTENCIA)
+        if codigo & 2:
+            recomendaciones.append(RECOMENDACION_PARTICIPACION)
+        if codigo & 1:
+            recomendaciones.append(RECOMENDACION_EVALUACIONES)
+        if not recomendaciones:
+            recomendaciones.append(RECOMENDACION_EXCELENTE)
+        combinaciones.append(recomendaciones)
+    return [list(combinaciones[codigo]) for codigo in codigos.tolist()]
+
+def predecir_lote(df_features, modelos=None):
+    """Ejecuta cada modelo una sola vez sobre la matriz de features de todo el
+    grupo. Devuelve (notas_predichas, rendimientos_predichos) como arrays.
+    Sin `modelos` se usa la versión activa del registro."""
+    return (modelos or obtener_modelos()).predecir(df_features)
+
+def predecir_escenarios(df_features, deltas, modelos=None):
+    """Simulación "what-if": predice a cada estudiante de df_features bajo
+    cada fila de `deltas` (escenarios × COLUMNAS_FEATURES), que se suma a sus
+    features acotando el resultado a [0, 100]. Se arma la matriz completa
+    (estudiantes × escenarios) y cada modelo se ejecuta una sola vez sobre
+    ella. Devuelve (notas, rendimientos) con forma (estudiantes, escenarios)."""
+    base = _matriz_features(df_features)
+    deltas = np.asarray(deltas, dtype=np.float64).reshape(-1, len(COLUMNAS_FEATURES))
+    rejilla = np.clip(base[:, np.newaxis, :] + deltas[np.newaxis, :, :], 0, 100)
+    notas, rendimientos = (modelos or obtener_modelos()).predecir(
+        pd.DataFrame(rejilla.reshape(-1, len(COLUMNAS_FEATURES)), columns=COLUMNAS_FEATURES)
+    )
+    forma = (len(base), len(deltas))
+    return np.asarray(notas).reshape(forma), np.asarray(rendimientos).reshape(forma)
+
 
 # ==============================================================================
 # === SCRIPT DE ENTRENAMIENTO (Solo se ejecuta con 'python modelo.py') ===
 # ==============================================================================
 
-if __name__ == "__main__":
-    print("--- Ejecutando script en modo de entrenamiento ---")
+def _compilar_desde_pkl():
+    """'python modelo.py compilar': exporta los .pkl actuales a RUTA_COMPILADO."""
+    if not (os.path.exists(ruta_regresion) and os.path.exists(ruta_clasificacion)):
+        print("ADVERTENCIA: Archivos .pkl no encontrados, no hay nada que compilar.")
+        return
+    regresion = joblib.load(ruta_regresion)
+    clasificacion = joblib.load(ruta_clasificacion)
+    guardar_modelos_compilados(compilar_modelos(regresion, clasificacion))
+    print(f"Modelos compilados guardados en {RUTA_COMPILADO}")
+
+def _registro_en(salida):
+    # --salida DIR publica en DIR/modelos/; sin él, en el registro de producción
+    return RegistroModelos(os.path.join(salida, 'modelos')) if salida else registro_modelos
+
+def _publicar_desde_pkl(argumentos):
+    """'python modelo.py publicar [--activar] [--salida DIR]': registra los .pkl
+    actuales como una versión nueva del registro."""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python modelo.py publicar",
+                                     description="Publica los .pkl actuales como una versión del registro.")
+    parser.add_argument("--activar", action="store_true", help="Activa la versión publicada.")
+    parser.add_argument("--salida", default=None,
+                        help=f"Publica en DIR/modelos/ en lugar de {RUTA_REGISTRO}.")
+    opciones = parser.parse_args(argumentos)
+
+    if not (os.path.exists(ruta_regresion) and os.path.exists(ruta_clasificacion)):
+        print("ADVERTENCIA: Archivos .pkl no encontrados, no hay nada que publicar.")
+        return
+    registro = _registro_en(opciones.salida)
+    regresion, clasificacion = joblib.load(ruta_regresion), joblib.load(ruta_clasificacion)
+    version = registro.publicar(
+        compilar_modelos(regresion, clasificacion), regresion=regresion, clasificacion=clasificacion,
+        origen='modelo_regresion.pkl, modelo_clasificacion.pkl',
+    )
+    print(f"Versión {version} publicada en {registro.ruta}")
+    if opciones.activar:
+        registro.activar(version)
+        print(f"Versión {version} activada")
+
+def _listar_versiones():
+    activa = registro_modelos.version_activa()
+    versiones = registro_modelos.versiones()
+    if not versiones:
+        print(f"No hay versiones publicadas en {RUTA_REGISTRO}")
+    for version in versiones:
+        metadatos = registro_modelos.metadatos(version)
+        marca = "*" if version == activa else " "
+        detalles = ", ".join(f"{clave}={valor}" for clave, valor in metadatos.items() if clave != 'version')
+        print(f"{marca} {version}  {detalles}")
+
+_MEDIR_RSS = """
+import resource, sys
+def rss():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * resource.getpagesize() / 2**20
+antes = rss()
+{codigo}
+print(antes, rss())
+"""
+
+_WORKER_SIMULADO = """
+import os, sys
+sys.path.insert(0, {base!r})
+import modelo, numpy as np, pandas as pd
+X = pd.DataFrame(np.random.default_rng(0).uniform(0, 100, size=(200, 3)), columns=modelo.COLUMNAS_FEATURES)
+sys.stdout.flush()
+if {preload}:
+    # Como gunicorn con preload_app: la app se importa en el maestro y luego fork
+    for _ in range({num_workers}):
+        if os.fork() == 0:
+            modelo.predecir_lote(X)
+            os.write(1, f"{{os.getpid()}}\\n".encode())
+            sys.stdin.read()
+            os._exit(0)
+    sys.stdin.read()
+else:
+    modelo.predecir_lote(X)
+    os.write(1, f"{{os.getpid()}}\\n".encode())
+    sys.stdin.read()
+"""
+
+def _memoria_proceso(pid):
+    # Rss cuenta las páginas compartidas completas en cada proceso; Pss las
+    # reparte entre quienes las comparten; Private son las exclusivas del proceso
+    memoria = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for linea in f:
+            partes = linea.split()
+            if partes[0] in ('Rss:', 'Pss:', 'Private_Clean:', 'Private_Dirty:'):
+                memoria[partes[0].rstrip(':')] = int(partes[1]) / 1024
+    return memoria['Rss'], memoria['Pss'], memoria['Private_Clean'] + memoria['Private_Dirty']
+
+def _medir_memoria_workers(num_workers=4):
+    """'python modelo.py memoria': arranca num_workers procesos que importan
+    modelo.py como lo haría cada worker de gunicorn y mide su memoria, con y
+    sin artefactos mapeados en memoria y con y sin preload_app."""
+    import subprocess
+    import sys
+    import tempfile
+
+    regresion = joblib.load(ruta_regresion)
+    clasificacion = joblib.load(ruta_clasificacion)
+    with tempfile.TemporaryDirectory() as directorio:
+        guardar_modelos_compilados(compilar_modelos(regresion, clasificacion), directorio)
+        sin_compilado = os.path.join(directorio, 'no-existe')
+        escenarios = [
+            ("pkl, un proceso por worker", sin_compilado, False),
+            ("pkl, preload + fork", sin_compilado, True),
+            ("npy mmap, un proceso por worker", directorio, False),
+            ("npy mmap, preload + fork", directorio, True),
+        ]
+        for nombre, ruta_compilado, preload in escenarios:
+            codigo = _WORKER_SIMULADO.format(base=BASE_DIR, preload=preload, num_workers=num_workers)
+            entorno = dict(os.environ, MODELO_COMPILADO_DIR=ruta_compilado,
+                           MODELOS_REGISTRO_DIR=os.path.join(directorio, 'sin-registro'))
+            procesos = [
+                subprocess.Popen([sys.executable, "-c", codigo], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                 stderr=subprocess.DEVNULL, text=True, env=entorno)
+                for _ in range(1 if preload else num_workers)
+            ]
+            try:
+                pids = []
+                for proceso in procesos:
+                    for _ in range(num_workers if preload else 1):
+                        linea = proceso.stdout.readline()
+                        while linea and not linea.strip().isdigit():
+                            linea = proceso.stdout.readline()
+                        if not linea:
+                            raise RuntimeError(f"El worker simulado terminó antes de tiempo ({nombre})")
+                        pids.append(int(linea))
+                medidas = [_memoria_proceso(pid) for pid in pids]
+            finally:
+                for proceso in procesos:
+                    proceso.stdin.close()
+                    proceso.wait()
+            rss, pss, privada = (sum(m[i] for m in medidas) / num_workers for i in range(3))
+            print(f"{nombre:<34} por worker: RSS {rss:6.1f} MiB | PSS {pss:6.1f} MiB | privada {privada:6.1f} MiB")
+
+def _comparar_motores():
+    """'python modelo.py comparar': memoria y latencia de sklearn frente al
+    motor compilado, verificando que ambos predicen lo mismo."""
+    import subprocess
+    import sys
+    import tempfile
+
+    regresion = joblib.load(ruta_regresion)
+    clasificacion = joblib.load(ruta_clasificacion)
+    compilado = compilar_modelos(regresion, clasificacion)
 
+    # Memoria residente de un proceso limpio antes y después de cargar cada forma
+    # (incluye los módulos que arrastra: sklearn en un caso, solo NumPy en el otro)
+    with tempfile.TemporaryDirectory() as directorio:
+        guardar_modelos_compilados(compilado, directorio)
+        carga_sklearn = (f"import joblib; joblib.load({ruta_regresion!r}); "
+                         f"joblib.load({ruta_clasificacion!r})")
+        carga_compilado = (f"import numpy as np, os; [np.load(os.path.join({directorio!r}, f)) "
+                           f"for f in os.listdir({directorio!r})]")
+        for nombre, codigo in (("sklearn (.pkl)", carga_sklearn), ("compilado (.npy)", carga_compilado)):
+            salida = subprocess.run(
+                [sys.executable, "-c", _MEDIR_RSS.format(codigo=codigo)],
+                capture_output=True, text=True, check=True,
+            ).stdout.split()
+            print(f"RSS {nombre:<17}: +{float(salida[1]) - float(salida[0]):6.1f} MiB "
+                  f"(total {float(salida[1]):.1f} MiB)")
+    print(f"Tamaño de los arrays compilados: {sum(a.nbytes for a in compilado.values()) / 2**20:.1f} MiB")
+
+    def mejor_tiempo(funcion, repeticiones=5):
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            funcion()
+            tiempos.append(time.perf_counter() - inicio)
+        return min(tiempos) * 1000
+
+    if SKLEARN_LOTES_GRANDES:
+        print(f"En producción, los lotes de más de {MAX_FILAS_COMPILADO} filas se clasifican con sklearn "
+              f"(MODELO_COMPILADO_MAX_FILAS)")
+    else:
+        print("En producción todo se clasifica con el motor compilado (MODELO_SKLEARN_LOTES_GRANDES=0)")
+    rng = np.random.default_rng(0)
+    for n in (1, 30, 200, 500, 5000):
+        df = pd.DataFrame(rng.uniform(0, 100, size=(n, 3)), columns=COLUMNAS_FEATURES)
+        iguales = (
+            np.array_equal(clasificacion.predict(df), predecir_clasificacion_compilada(compilado, df))
+            and np.allclose(regresion.predict(df), predecir_regresion_compilada(compilado, df), rtol=0, atol=1e-9)
+        )
+        t_sklearn = mejor_tiempo(lambda: (regresion.predict(df), clasificacion.predict(df)))
+        t_compilado = mejor_tiempo(lambda: (predecir_regresion_compilada(compilado, df),
+                                            predecir_clasificacion_compilada(compilado, df)))
+        print(f"n={n:>5}: sklearn {t_sklearn:8.2f} ms | compilado {t_compilado:8.2f} ms | "
+              f"iguales={iguales}")
+
+
+# --- Entrenamiento ---
+# Rangos (inclusive) de asistencia, participaciones y evaluaciones de cada
+# grupo de estudiantes sintéticos: bajo, promedio y alto rendimiento
+RANGOS_SINTETICOS = [
+    {"asistencia": (20, 70), "participaciones": (10, 60), "evaluaciones": (0, 65)},
+    {"asistencia": (60, 95), "participaciones": (45, 85), "evaluaciones": (50, 85)},
+    {"asistencia": (85, 100), "participaciones": (75, 100), "evaluaciones": (80, 100)},
+]
+
+def generar_datos_sinteticos(num_muestras, semilla=None):
+    """Genera num_muestras estudiantes repartidos por igual entre los grupos de
+    RANGOS_SINTETICOS, con una extracción de NumPy por columna y grupo."""
+    rng = np.random.default_rng(semilla)
+    por_grupo = np.diff(np.linspace(0, num_muestras, len(RANGOS_SINTETICOS) + 1).astype(int))
+    columnas = {
+        columna: np.concatenate([
+            rng.integers(rangos[columna][0], rangos[columna][1] + 1, size=n)
+            for rangos, n in zip(RANGOS_SINTETICOS, por_grupo)
+        ])
+        for columna in COLUMNAS_FEATURES
+    }
+    df = pd.DataFrame(columnas)
+    df["nota_final"] = np.round(df[COLUMNAS_FEATURES].to_numpy().sum(axis=1) / 3, 2)
+    df["rendimiento"] = categorizar_notas(df["nota_final"].to_numpy())
+    return df
+
+def entrenar_modelos(df, n_jobs=-1, n_estimadores=100):
+    """Entrena la regresión (nota_final) y el RandomForest (rendimiento) sobre
+    df. Devuelve (regresion, clasificacion, metricas de evaluación)."""
     from sklearn.model_selection import train_test_split
     from sklearn.linear_model import LinearRegression
     from sklearn.ensemble import RandomForestClassifier
     from sklearn.metrics import mean_squared_error, r2_score, accuracy_score
 
-    # --- NUEVA LÓGICA DE GENERACIÓN DE DATOS BALANCEADOS ---
+    X = df[COLUMNAS_FEATURES]
+    x_train_reg, x_test_reg, y_train_reg, y_test_reg = train_test_split(
+        X, df["nota_final"], test_size=0.2, random_state=123
+    )
+    regresion = LinearRegression().fit(x_train_reg, y_train_reg)
+
+    X_train_clf, X_test_clf, y_train_clf, y_test_clf = train_test_split(
+        X, df["rendimiento"], test_size=0.2, random_state=42
+    )
+    # n_jobs=-1: un árbol por núcleo disponible en paralelo
+    clasificacion = RandomForestClassifier(n_estimators=n_estimadores, random_state=42, n_jobs=n_jobs)
+    clasificacion.fit(X_train_clf, y_train_clf)
+    # Para predecir en producción se usa un solo hilo (grupos pequeños)
+    clasificacion.set_params(n_jobs=None)
+
+    prediccion_reg = regresion.predict(x_test_reg)
+    metricas = {
+        "r2": round(float(r2_score(y_test_reg, prediccion_reg)), 4),
+        "mse": round(float(mean_squared_error(y_test_reg, prediccion_reg)), 4),
+        "accuracy": round(float(accuracy_score(y_test_clf, clasificacion.predict(X_test_clf))), 4),
+    }
+    return regresion, clasificacion, metricas
+
+def _entrenar(argumentos):
+    """'python modelo.py [--muestras N] [--semilla S] [--salida DIR] ...'"""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python modelo.py", description="Entrena los modelos con datos sintéticos.")
+    parser.add_argument("--muestras", type=int, default=105000, help="Estudiantes sintéticos a generar (total).")
+    parser.add_argument("--semilla", type=int, default=None, help="Semilla de la generación de datos.")
+    parser.add_argument("--salida", default=None,
+                        help="Directorio donde guardar los .pkl, modelo_compilado/ y la versión publicada "
+                             f"(en DIR/modelos/). Por defecto, los .pkl en el directorio actual y la versión en {RUTA_REGISTRO}.")
+    parser.add_argument("--arboles", type=int, default=100, help="Árboles del RandomForest.")
+    parser.add_argument("--n_jobs", type=int, default=-1, help="Procesos para entrenar el RandomForest (-1: todos).")
+    parser.add_argument("--sin_publicar", action="store_true", help="No publica la versión en el registro.")
+    opciones = parser.parse_args(argumentos)
+
+    print("--- Ejecutando script en modo de entrenamiento ---")
+    inicio = time.perf_counter()
     print("Generando datos de entrenamiento balanceados...")
-    
-    num_ejemplos_por_categoria = 35000 # ~100k en total
-    data = []
-
-    # 1. Generar estudiantes de BAJO rendimiento
-    for _ in range(num_ejemplos_por_categoria):
-        asistencia = random.randint(20, 70)
-        participaciones = random.randint(10, 60)
-        evaluaciones = random.randint(0, 65)
-        nota_final = round((asistencia + participaciones + evaluaciones) / 3, 2)
-        data.append({
-            "asistencia": asistencia,
-            "participaciones": participaciones,
-            "evaluaciones": evaluaciones,
-            "nota_final": nota_final
-        })
-
-    # 2. Generar estudiantes de rendimiento PROMEDIO
-    for _ in range(num_ejemplos_por_categoria):
-        asistencia = random.randint(60, 95)
-        participaciones = random.randint(45, 85)
-        evaluaciones = random.randint(50, 85)
-        nota_final = round((asistencia + participaciones + evaluaciones) / 3, 2)
-        data.append({
-            "asistencia": asistencia,
-            "participaciones": participaciones,
-            "evaluaciones": evaluaciones,
-            "nota_final": nota_final
-        })
-        
-    # 3. Generar estudiantes de ALTO rendimiento
-    for _ in range(num_ejemplos_por_categoria):
-        asistencia = random.randint(85, 100)
-        participaciones = random.randint(75, 100)
-        evaluaciones = random.randint(80, 100)
-        nota_final = round((asistencia + participaciones + evaluaciones) / 3, 2)
-        data.append({
-            "asistencia": asistencia,
-            "participaciones": participaciones,
-            "evaluaciones": evaluaciones,
-            "nota_final": nota_final
-        })
-
-    df = pd.DataFrame(data)
-    # La función 'categorizar_nota' sigue siendo la misma y es correcta
-    df["rendimiento"] = df["nota_final"].apply(categorizar_nota)
-    print("Datos generados. Distribución de rendimiento:")
-    print(df.rendimiento.value_counts()) # Verás que ahora está mucho más balanceado
-
-    # 2. Entrenar y guardar el Modelo de Regresión
-    print("Entrenando modelo de Regresión Lineal...")
-    X_reg = df[["asistencia", "participaciones", "evaluaciones"]]
-    y_reg = df["nota_final"]
-    x_train_reg, x_test_reg, y_train_reg, y_test_reg = train_test_split(X_reg, y_reg, test_size=0.2, random_state=123)
-    
-    modelo_reg_entrenado = LinearRegression()
-    modelo_reg_entrenado.fit(x_train_reg, y_train_reg)
-    joblib.dump(modelo_reg_entrenado, 'modelo_regresion.pkl')
-    print("Modelo 'modelo_regresion.pkl' guardado.")
-
-    # 3. Entrenar y guardar el Modelo de Clasificación
-    print("Entrenando modelo de Clasificación (Random Forest)...")
-    X_clf = df[["asistencia", "participaciones", "evaluaciones"]]
-    y_clf = df["rendimiento"]
-    X_train_clf, X_test_clf, y_train_clf, y_test_clf = train_test_split(X_clf, y_clf, test_size=0.2, random_state=42)
-
-    modelo_clf_entrenado = RandomForestClassifier(n_estimators=100, random_state=42)
-    modelo_clf_entrenado.fit(X_train_clf, y_train_clf)
-    joblib.dump(modelo_clf_entrenado, 'modelo_clasificacion.pkl')
-    print("Modelo 'modelo_clasificacion.pkl' guardado.")
-
-    print("--- Entrenamiento finalizado ---")
\ No newline at end of file
+    df = generar_datos_sinteticos(opciones.muestras, opciones.semilla)
+    print(f"Datos generados en {time.perf_counter() - inicio:.2f} s. Distribución de rendimiento:")
+    print(df.rendimiento.value_counts())
+
+    print("Entrenando modelos de Regresión Lineal y Clasificación (Random Forest)...")
+    inicio_entrenamiento = time.perf_counter()
+    regresion, clasificacion, metricas = entrenar_modelos(df, opciones.n_jobs, opciones.arboles)
+    print(f"Modelos entrenados en {time.perf_counter() - inicio_entrenamiento:.2f} s: "
+          + ", ".join(f"{clave}={valor}" for clave, valor in metricas.items()))
+
+    salida = opciones.salida or "."
+    os.makedirs(salida, exist_ok=True)
+    joblib.dump(regresion, os.path.join(salida, 'modelo_regresion.pkl'))
+    joblib.dump(clasificacion, os.path.join(salida, 'modelo_clasificacion.pkl'))
+    print(f"Modelos 'modelo_regresion.pkl' y 'modelo_clasificacion.pkl' guardados en {salida}")
+
+    # Exportar ambos modelos al motor compilado (NumPy puro, sin sklearn)
+    compilado = compilar_modelos(regresion, clasificacion)
+    guardar_modelos_compilados(compilado, os.path.join(salida, 'modelo_compilado'))
+    print("Modelos compilados guardados en 'modelo_compilado/'.")
+
+    # Publicar una versión nueva en el registro. No se activa sola: se revisa
+    # y se pone en servicio con 'python modelo.py activar <version>'
+    if not opciones.sin_publicar:
+        registro = _registro_en(opciones.salida)
+        version = registro.publicar(
+            compilado, regresion=regresion, clasificacion=clasificacion,
+            origen='entrenamiento con datos sintéticos',
+            muestras=opciones.muestras, semilla=opciones.semilla, **metricas,
+        )
+        activar = f"python modelo.py activar {version}"
+        if opciones.salida:
+            activar = f"MODELOS_REGISTRO_DIR={registro.ruta} {activar}"
+        print(f"Versión {version} publicada en {registro.ruta}. Para servirla: {activar}")
+
+    print(f"--- Entrenamiento finalizado en {time.perf_counter() - inicio:.2f} s ---")
+
+
+if __name__ == "__main__":
+    import sys
+    if sys.argv[1:2] == ["compilar"]:
+        _compilar_desde_pkl()
+        sys.exit(0)
+    if sys.argv[1:2] == ["comparar"]:
+        _comparar_motores()
+        sys.exit(0)
+    if sys.argv[1:2] == ["memoria"]:
+        _medir_memoria_workers(int(sys.argv[2]) if len(sys.argv) > 2 else 4)
+        sys.exit(0)
+    if sys.argv[1:2] == ["publicar"]:
+        _publicar_desde_pkl(sys.argv[2:])
+        sys.exit(0)
+    if sys.argv[1:2] == ["versiones"]:
+        _listar_versiones()
+        sys.exit(0)
+    if sys.argv[1:2] == ["activar"] and len(sys.argv) > 2:
+        registro_modelos.activar(sys.argv[2])
+        print(f"Versión {sys.argv[2]} activada; los workers la cargarán en menos de {INTERVALO_REVISION:g} s.")
+        sys.exit(0)
+    if sys.argv[1:2] == ["rollback"]:
+        print(f"Versión {registro_modelos.rollback()} reactivada.")
+        sys.exit(0)
+
+    _entrenar(sys.argv[1:])